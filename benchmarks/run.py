@@ -0,0 +1,237 @@
+"""Benchmark every pipeline stage on a synthetic corpus
+
+    python -m benchmarks.run --save-baseline baseline.json   # before an upgrade
+    python -m benchmarks.run --baseline baseline.json        # after it
+
+Writes a JSON report with docs/sec, p50/p99 latency and peak RSS growth per
+stage and, with --baseline, exits non-zero when a stage is slower than the
+baseline by more than --tolerance.
+"""
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import click
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import SyntheticCorpus
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class Stage:
+    """Collects per-call latencies and the number of documents they covered
+
+    ru_maxrss only ever grows, so the stage reports how far it raised the
+    process peak (peak_rss_growth_mb) rather than the peak itself, which
+    would repeat the heaviest earlier stage.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.documents = 0
+        self.rss_before = self.rss_after = peak_rss_mb()
+
+    def time(self, fn, *args, documents=1, **kwargs):
+        started = time.perf_counter()
+        result = fn(*args, **kwargs)
+        self.add(time.perf_counter() - started, documents)
+        return result
+
+    def add(self, seconds, documents):
+        self.latencies.append(seconds)
+        self.documents += documents
+        self.rss_after = peak_rss_mb()
+
+    def report(self):
+        latencies = np.array(self.latencies or [0.0])
+        seconds = float(latencies.sum())
+        return {
+            'documents': self.documents,
+            'calls': len(self.latencies),
+            'seconds': round(seconds, 6),
+            'docs_per_sec': round(self.documents / seconds, 3) if seconds else None,
+            'p50_ms': round(float(np.percentile(latencies, 50)) * 1000, 4),
+            'p99_ms': round(float(np.percentile(latencies, 99)) * 1000, 4),
+            'peak_rss_growth_mb': (round(self.rss_after - self.rss_before, 3)
+                                   if self.rss_before is not None else None)
+        }
+
+
+def run_benchmarks(corpus, workdir, batch_size=100, top_k=5, query_sample=1000):
+    """Run every stage on the corpus inside workdir and return the report dict"""
+    from src.data_fetchers.resume_parser import ResumeParser
+    from src.ranking.matcher import ResumeJobMatcher
+    from src.ranking.topk import top_k_indices
+    from src.utils.database import DatabaseManager
+
+    stages = {}
+
+    def stage(name):
+        stages[name] = Stage(name)
+        return stages[name]
+
+    db = DatabaseManager(os.path.join(workdir, 'bench.db'))
+    matcher = ResumeJobMatcher(db=db, use_daemon=False)
+    processor = matcher.text_processor
+    jobs = corpus.jobs()
+    paths = corpus.write_resumes(os.path.join(workdir, 'resumes'))
+
+    # Parsing
+    parser = ResumeParser(os.path.join(workdir, 'resumes'))
+    parse = stage('parse')
+    resumes = [parse.time(parser.parse_resume, path) for path in paths]
+    contents = [resume['content'] for resume in resumes] + [job['content'] for job in jobs]
+
+    # Preprocessing and skills, per document
+    preprocess = stage('preprocess')
+    processed = [preprocess.time(processor.preprocess_text, text) for text in contents]
+    skills_stage = stage('extract_skills')
+    skills = [', '.join(skills_stage.time(processor.extract_skills, text)) for text in contents]
+
+    # DB load in batches
+    n = len(resumes)
+    resume_rows = pd.DataFrame({
+        'filename': [resume['filename'] for resume in resumes],
+        'content': contents[:n], 'processed_content': processed[:n],
+        'skills': skills[:n], 'experience': ''
+    })
+    job_rows = pd.DataFrame(jobs)
+    job_rows['processed_content'] = processed[n:]
+    job_rows['required_skills'] = skills[n:]
+    load = stage('db_load')
+    for rows, upsert in ((resume_rows, db.upsert_resumes), (job_rows, db.upsert_jobs)):
+        for start in range(0, len(rows), batch_size):
+            batch = rows.iloc[start:start + batch_size]
+            load.time(upsert, batch, documents=len(batch))
+
+    # Embedding in batches (cache misses: a fresh database)
+    embed = stage('embed')
+    for start in range(0, len(processed), batch_size):
+        batch = processed[start:start + batch_size]
+        embed.time(processor.encode_normalized, batch, documents=len(batch))
+
+    # All-pairs scoring plus top-k, block by block
+    resumes_df = db.get_resumes()
+    jobs_df = db.get_jobs()
+    score = stage('score')
+    blocks = matcher.iter_score_blocks(resumes_df, jobs_df, block_size=batch_size)
+    while True:
+        started = time.perf_counter()
+        block = next(blocks, None)
+        if block is None:
+            break
+        top_k_indices(block[1]['combined'], top_k)
+        score.add(time.perf_counter() - started, len(block[1]['combined']))
+
+    # Full calculate_matches run, including saving the matches
+    matches = stage('calculate_matches')
+    matches.time(matcher.calculate_matches, top_k=top_k, block_size=batch_size,
+                 documents=len(resumes_df))
+
+    # Uncached per-resume lookups
+    query = stage('query')
+    for filename in resumes_df['filename'][:query_sample]:
+        query.time(db.get_top_matches, filename, limit=top_k)
+
+    db.close()
+    return {
+        'meta': {
+            'resumes': corpus.n_resumes,
+            'jobs': corpus.n_jobs,
+            'resume_words': corpus.resume_words,
+            'job_words': corpus.job_words,
+            'seed': corpus.seed,
+            'batch_size': batch_size,
+            'top_k': top_k,
+            'mock_model': processor.model is None,
+            'python': platform.python_version(),
+            'platform': platform.platform()
+        },
+        'stages': {name: stage.report() for name, stage in stages.items()},
+        'embedding_batches': processor.embedding_stats()
+    }
+
+
+def compare_to_baseline(report, baseline, tolerance=0.2):
+    """List stages whose throughput fell more than tolerance below the baseline"""
+    regressions = []
+    for name, result in report['stages'].items():
+        before = baseline.get('stages', {}).get(name, {}).get('docs_per_sec')
+        after = result.get('docs_per_sec')
+        if before and after is not None and after < before * (1 - tolerance):
+            regressions.append({'stage': name, 'baseline_docs_per_sec': before,
+                                'docs_per_sec': after,
+                                'change': round(after / before - 1, 4)})
+    return regressions
+
+
+@click.command()
+@click.option('--resumes', default=1000, help='Synthetic resumes to generate')
+@click.option('--jobs', default=200, help='Synthetic jobs to generate')
+@click.option('--resume-words', default=300, help='Words per resume')
+@click.option('--job-words', default=150, help='Words per job description')
+@click.option('--skills-per-resume', default=8)
+@click.option('--skills-per-job', default=6)
+@click.option('--skill-skew', default=1.1, help='Zipf exponent of skill popularity')
+@click.option('--seed', default=0)
+@click.option('--batch-size', default=100)
+@click.option('--output', default='benchmark_report.json', help='Where to write the report')
+@click.option('--baseline', default=None, help='Report to compare against')
+@click.option('--tolerance', default=0.2, help='Allowed throughput drop vs the baseline')
+@click.option('--save-baseline', default=None, help='Also write the report here')
+def main(resumes, jobs, resume_words, job_words, skills_per_resume, skills_per_job,
+         skill_skew, seed, batch_size, output, baseline, tolerance, save_baseline):
+    """Benchmark every pipeline stage on a synthetic corpus"""
+    corpus = SyntheticCorpus(resumes, jobs, resume_words, job_words, skills_per_resume,
+                             skills_per_job, skill_skew, seed=seed)
+    workdir = tempfile.mkdtemp(prefix='resume-matcher-bench-')
+    try:
+        report = run_benchmarks(corpus, workdir, batch_size=batch_size)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    regressions = []
+    if baseline:
+        with open(baseline, 'r') as file:
+            baseline_report = json.load(file)
+        regressions = compare_to_baseline(report, baseline_report, tolerance)
+        report['regressions'] = regressions
+        mismatched = [key for key in ('resumes', 'jobs', 'resume_words', 'job_words',
+                                      'seed', 'batch_size', 'mock_model')
+                      if baseline_report.get('meta', {}).get(key) != report['meta'][key]]
+        if mismatched:
+            click.echo(f"Warning: baseline was run with different {', '.join(mismatched)}",
+                       err=True)
+
+    for path in filter(None, (output, save_baseline)):
+        with open(path, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    for name, result in report['stages'].items():
+        click.echo(f"{name:>18}: {result['docs_per_sec'] or 0:>12.1f} docs/s  "
+                   f"p50 {result['p50_ms']:.3f} ms  p99 {result['p99_ms']:.3f} ms")
+    for regression in regressions:
+        click.echo(f"REGRESSION {regression['stage']}: {regression['change']:+.1%} "
+                   f"vs baseline", err=True)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
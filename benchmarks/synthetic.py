@@ -0,0 +1,76 @@
+import os
+
+import numpy as np
+
+from src.nlp.skill_extractor import DEFAULT_TAXONOMY_PATH, load_taxonomy
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ne', 'ro', 'ta', 'vu', 'si', 'de', 'pa', 'zu', 'ri']
+COMMON_WORDS = ['experience', 'team', 'projects', 'developed', 'built', 'using', 'with',
+                'and', 'the', 'for', 'years', 'worked', 'on', 'systems', 'data', 'design']
+
+
+class SyntheticCorpus:
+    """Deterministic resumes and job descriptions for benchmarks
+
+    Documents mix filler words with skills from the taxonomy. Skills are
+    drawn with Zipf-like weights (skill_skew), so a few skills are common
+    and most are rare, like real postings. The same seed always yields the
+    same corpus.
+    """
+
+    def __init__(self, n_resumes=1000, n_jobs=200, resume_words=300, job_words=150,
+                 skills_per_resume=8, skills_per_job=6, skill_skew=1.1,
+                 vocabulary_size=5000, seed=0, taxonomy_path=None):
+        self.n_resumes = n_resumes
+        self.n_jobs = n_jobs
+        self.resume_words = resume_words
+        self.job_words = job_words
+        self.skills_per_resume = skills_per_resume
+        self.skills_per_job = skills_per_job
+        self.seed = seed
+
+        self.skills = sorted(set(load_taxonomy(taxonomy_path or DEFAULT_TAXONOMY_PATH).values()))
+        weights = 1.0 / np.arange(1, len(self.skills) + 1) ** skill_skew
+        self.skill_weights = weights / weights.sum()
+
+        rng = np.random.default_rng(seed)
+        syllables = rng.choice(SYLLABLES, size=(vocabulary_size, 3))
+        self.vocabulary = COMMON_WORDS + [''.join(parts) for parts in syllables]
+
+    def _document(self, rng, n_words, n_skills):
+        words = list(rng.choice(self.vocabulary, size=n_words))
+        n_skills = min(n_skills, len(self.skills))
+        skills = rng.choice(self.skills, size=n_skills, replace=False, p=self.skill_weights)
+        for skill, position in zip(skills, rng.integers(0, n_words + 1, size=n_skills)):
+            words.insert(position, skill)
+        return ' '.join(words)
+
+    def resumes(self):
+        """List of {'filename', 'content'} dicts"""
+        rng = np.random.default_rng([self.seed, 1])
+        return [{'filename': f"resume_{i:06d}.txt",
+                 'content': self._document(rng, self.resume_words, self.skills_per_resume)}
+                for i in range(self.n_resumes)]
+
+    def jobs(self):
+        """List of {'title', 'company', 'content', 'source_id'} dicts"""
+        rng = np.random.default_rng([self.seed, 2])
+        jobs = []
+        for i in range(self.n_jobs):
+            title = f"Engineer {i}"
+            body = self._document(rng, self.job_words, self.skills_per_job)
+            jobs.append({'title': title, 'company': f"Company {i % 50}",
+                         'content': f"Job Title: {title}\n\n{body}",
+                         'source_id': f"synthetic:{i}"})
+        return jobs
+
+    def write_resumes(self, folder):
+        """Write the resumes as .txt files and return their paths"""
+        os.makedirs(folder, exist_ok=True)
+        paths = []
+        for resume in self.resumes():
+            path = os.path.join(folder, resume['filename'])
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(resume['content'])
+            paths.append(path)
+        return paths
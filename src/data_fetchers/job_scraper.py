@@ -98,4 +98,8 @@ class JobScraper:
         print(f"Simulating scraping for '{keywords}'...")
         time.sleep(2)  # Simulate API delay
         
-        return self.create_sample_jobs()
\ No newline at end of file
+        return self.create_sample_jobs()
+    
+    def fetch(self):
+        """Job source interface: the sample jobs, without the simulated delay"""
+        return self.create_sample_jobs()
@@ -0,0 +1,300 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+JOB_COLUMNS = ['title', 'company', 'content', 'source_id']
+FIELD_PATTERN = re.compile(r'^\s*(job title|title|company)\s*:\s*(.+?)\s*$',
+                           re.IGNORECASE | re.MULTILINE)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def parse_job_text(text, default_title=''):
+    """Build a job record from plain text with 'Job Title:'/'Company:' lines"""
+    fields = {}
+    for name, value in FIELD_PATTERN.findall(text):
+        fields.setdefault('company' if name.lower() == 'company' else 'title', value)
+    return {
+        'title': fields.get('title', default_title),
+        'company': fields.get('company', ''),
+        'content': text
+    }
+
+
+class FolderJobSource:
+    """Reads job descriptions from the .txt files of a folder
+
+    Files are read on a thread pool, and each job's source_id is its file
+    name, so renaming a file creates a new job.
+    """
+
+    def __init__(self, folder="data/job_descriptions/", num_workers=4):
+        self.folder = folder
+        self.num_workers = num_workers
+
+    def _read(self, path):
+        with open(path, 'r', encoding='utf-8') as file:
+            text = file.read()
+        name = os.path.basename(path)
+        job = parse_job_text(text, default_title=os.path.splitext(name)[0])
+        job['source_id'] = f"file:{name}"
+        return job
+
+    def _paths(self):
+        if not os.path.isdir(self.folder):
+            logger.warning(f"Job descriptions folder not found: {self.folder}")
+            return []
+        return sorted(
+            entry.path for entry in os.scandir(self.folder)
+            if entry.is_file() and entry.name.lower().endswith('.txt')
+        )
+
+    def fetch(self):
+        paths = self._paths()
+        with ThreadPoolExecutor(max_workers=max(1, self.num_workers)) as executor:
+            jobs = list(executor.map(self._read, paths))
+        return pd.DataFrame(jobs, columns=JOB_COLUMNS)
+
+    def iter_fetch(self, batch_size):
+        """Yield the jobs as DataFrames of at most batch_size files each"""
+        paths = self._paths()
+        with ThreadPoolExecutor(max_workers=max(1, self.num_workers)) as executor:
+            for start in range(0, len(paths), batch_size):
+                jobs = list(executor.map(self._read, paths[start:start + batch_size]))
+                yield pd.DataFrame(jobs, columns=JOB_COLUMNS)
+
+
+class TokenBucket:
+    """Async token bucket: `rate` requests per second with bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class HttpJobSource:
+    """Fetches job postings from HTTP endpoints concurrently
+
+    Requests run on a pooled requests.Session from an asyncio event loop.
+    Each host gets its own concurrency limit and token bucket. Timeouts,
+    connection errors, 429 and 5xx responses are retried with exponential
+    backoff. Retry-After is honoured when present. When a DatabaseManager is
+    given, later fetches send the stored ETag/Last-Modified validators as
+    If-None-Match/If-Modified-Since, and postings answered with 304 are
+    skipped. The validators of a fetch are only stored by save_validators(),
+    which the pipeline calls once the postings are loaded; a run that fails
+    in between fetches them again in full.
+
+    A response is either a JSON object (or list of objects) with title,
+    company, content and an optional id, or plain text parsed like the job
+    descriptions folder.
+    """
+
+    def __init__(self, urls, db=None, max_per_host=4, rate=5.0, burst=None,
+                 retries=3, backoff=0.5, timeout=10, session=None):
+        self.urls = list(urls)
+        self.db = db
+        self.max_per_host = max_per_host
+        self.rate = rate
+        self.burst = burst
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = session
+        self.stats = {}
+        self.validators = []
+
+    def _make_session(self, pool_size):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def fetch(self, urls=None):
+        """Fetch every url and return the new or changed postings as a DataFrame
+
+        Their validators are added to self.validators until save_validators().
+        """
+        jobs_df, validators = asyncio.run(
+            self.fetch_async(self.urls if urls is None else list(urls)))
+        self.validators.extend(validators)
+        return jobs_df
+
+    def iter_fetch(self, batch_size):
+        """Fetch the urls batch_size at a time, yielding each batch's postings
+
+        Validators are collected as in fetch(); stats cover every batch.
+        """
+        totals = dict.fromkeys(('fetched', 'not_modified', 'failed', 'retries'), 0)
+        for start in range(0, len(self.urls), batch_size):
+            jobs_df, validators = asyncio.run(
+                self.fetch_async(self.urls[start:start + batch_size]))
+            self.validators.extend(validators)
+            totals = {name: totals[name] + self.stats[name] for name in totals}
+            yield jobs_df
+        self.stats = totals
+
+    def save_validators(self):
+        """Store the validators of the postings fetched so far (call after loading them)"""
+        if self.db is not None and self.validators:
+            self.db.save_http_validators(self.validators)
+        self.validators = []
+
+    async def fetch_async(self, urls):
+        """Fetch urls; returns (postings DataFrame, [(url, etag, last_modified)])"""
+        self.stats = {'fetched': 0, 'not_modified': 0, 'failed': 0, 'retries': 0}
+        if not urls:
+            return pd.DataFrame(columns=JOB_COLUMNS), []
+
+        hosts = {urlsplit(url).netloc for url in urls}
+        pool_size = self.max_per_host * len(hosts)
+        session = self.session or self._make_session(pool_size)
+        validators = self.db.get_http_validators(urls) if self.db is not None else {}
+        limits = {host: asyncio.Semaphore(self.max_per_host) for host in hosts}
+        buckets = {host: TokenBucket(self.rate, self.burst) for host in hosts} if self.rate else {}
+
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=pool_size)
+        try:
+            results = await asyncio.gather(*[
+                self._fetch_one(loop, executor, session, url, validators.get(url),
+                                limits, buckets)
+                for url in urls
+            ])
+        finally:
+            executor.shutdown(wait=True)
+            if self.session is None:
+                session.close()
+
+        jobs, seen = [], []
+        for url, response in zip(urls, results):
+            if response is None:
+                continue
+            jobs.extend(self._parse_response(url, response))
+            seen.append((url, response.headers.get('ETag'),
+                         response.headers.get('Last-Modified')))
+
+        logger.info(f"Fetched {self.stats['fetched']} job pages "
+                    f"({self.stats['not_modified']} not modified, "
+                    f"{self.stats['failed']} failed, {self.stats['retries']} retries)")
+        return pd.DataFrame(jobs, columns=JOB_COLUMNS), seen
+
+    async def _fetch_one(self, loop, executor, session, url, validator, limits, buckets):
+        """GET one url with retries; returns the response or None (304/failure)"""
+        host = urlsplit(url).netloc
+        headers = {}
+        if validator:
+            etag, last_modified = validator
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+
+        for attempt in range(self.retries + 1):
+            delay = self.backoff * (2 ** attempt)
+            async with limits[host]:
+                if buckets:
+                    await buckets[host].acquire()
+                try:
+                    response = await loop.run_in_executor(
+                        executor,
+                        lambda: session.get(url, headers=headers, timeout=self.timeout))
+                except Exception as e:
+                    error = str(e)
+                    response = None
+
+            if response is not None:
+                if response.status_code == 304:
+                    self.stats['not_modified'] += 1
+                    return None
+                if response.status_code not in RETRY_STATUSES:
+                    if response.ok:
+                        self.stats['fetched'] += 1
+                        return response
+                    logger.warning(f"GET {url} failed with HTTP {response.status_code}")
+                    self.stats['failed'] += 1
+                    return None
+                error = f"HTTP {response.status_code}"
+                retry_after = response.headers.get('Retry-After', '')
+                if retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+
+            if attempt < self.retries:
+                self.stats['retries'] += 1
+                await asyncio.sleep(delay)
+
+        logger.warning(f"GET {url} failed after {self.retries + 1} attempts: {error}")
+        self.stats['failed'] += 1
+        return None
+
+    def _parse_response(self, url, response):
+        if 'json' in response.headers.get('Content-Type', ''):
+            payload = response.json()
+            postings = payload if isinstance(payload, list) else [payload]
+            jobs = []
+            for position, posting in enumerate(postings):
+                posting_id = posting.get('id', position if isinstance(payload, list) else None)
+                jobs.append({
+                    'title': posting.get('title', ''),
+                    'company': posting.get('company', ''),
+                    'content': posting.get('content') or json.dumps(posting),
+                    'source_id': url if posting_id is None else f"{url}#{posting_id}"
+                })
+            return jobs
+
+        job = parse_job_text(response.text)
+        job['source_id'] = url
+        return [job]
+
+
+def build_job_sources(specs, db=None, default_folder="data/job_descriptions/"):
+    """Create job sources from the data_sources.job_sources config entries"""
+    from src.data_fetchers.job_scraper import JobScraper
+
+    sources = []
+    for spec in specs or []:
+        kind = spec.get('type')
+        if kind == 'folder':
+            sources.append(FolderJobSource(spec.get('path', default_folder),
+                                           num_workers=spec.get('num_workers', 4)))
+        elif kind == 'http':
+            sources.append(HttpJobSource(
+                spec.get('urls', []), db=db,
+                max_per_host=spec.get('max_per_host', 4),
+                rate=spec.get('rate', 5.0),
+                burst=spec.get('burst'),
+                retries=spec.get('retries', 3),
+                backoff=spec.get('backoff', 0.5),
+                timeout=spec.get('timeout', 10)
+            ))
+        elif kind == 'sample':
+            sources.append(JobScraper())
+        else:
+            raise ValueError(f"Unknown job source type: {kind}")
+    return sources
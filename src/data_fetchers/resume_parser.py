@@ -1,23 +1,87 @@
 import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.connection import wait
 import pandas as pd
 from docx import Document
 import PyPDF2
+from src.utils.hashing import file_hash
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt')
+CACHED_EXTENSIONS = ('.pdf', '.docx')
+
+# Bump when extraction output changes so cached text is not reused
+EXTRACTION_VERSION = 1
+
+
+def _extract_pdf_pages(pdf_path, start, stop):
+    """Extract the text of pages [start, stop) of a PDF"""
+    with open(pdf_path, 'rb') as file:
+        pages = PyPDF2.PdfReader(file).pages
+        return [pages[number].extract_text() for number in range(start, stop)]
+
+
+def _parse_worker(conn, options):
+    """Worker process loop: receive file paths, send back parsed text"""
+    parser = ResumeParser(**options)
+    while True:
+        try:
+            file_path = conn.recv()
+        except EOFError:
+            return
+        if file_path is None:
+            return
+        try:
+            result = parser.parse_resume(file_path)
+        except Exception as e:
+            result = {'file_path': file_path, 'error': str(e)}
+        conn.send(result)
 
 
 class ResumeParser:
-    def __init__(self, resume_folder="data/resumes/"):
+    def __init__(self, resume_folder="data/resumes/", num_workers=1, timeout=60,
+                 cache_dir=None, page_workers=1, parallel_page_threshold=16):
+        """Resume file parser
+
+        num_workers > 1 parses files in a process pool with a per-file timeout.
+        cache_dir, when set, stores extracted PDF/DOCX text keyed by file
+        content hash so unchanged files are never parsed twice. PDFs with at
+        least parallel_page_threshold pages are split across page_workers
+        processes when parsing in-process (pool workers parse pages serially).
+        """
         self.resume_folder = resume_folder
+        self.num_workers = num_workers
+        self.timeout = timeout
+        self.cache_dir = cache_dir
+        self.page_workers = page_workers
+        self.parallel_page_threshold = parallel_page_threshold
         os.makedirs(resume_folder, exist_ok=True)
     
+    def _read_pdf(self, pdf_path):
+        with open(pdf_path, 'rb') as file:
+            page_count = len(PyPDF2.PdfReader(file).pages)
+        
+        if self.page_workers > 1 and page_count >= self.parallel_page_threshold:
+            chunk = -(-page_count // self.page_workers)
+            ranges = [(start, min(start + chunk, page_count))
+                      for start in range(0, page_count, chunk)]
+            with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+                parts = executor.map(_extract_pdf_pages, [pdf_path] * len(ranges),
+                                     *zip(*ranges))
+                pages = [text for part in parts for text in part]
+        else:
+            pages = _extract_pdf_pages(pdf_path, 0, page_count)
+        return ''.join(pages)
+    
+    def _read_docx(self, docx_path):
+        doc = Document(docx_path)
+        return ''.join(paragraph.text + "\n" for paragraph in doc.paragraphs)
+    
     def extract_text_from_pdf(self, pdf_path):
         """Extract text from PDF file"""
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text()
-                return text
+            return self._read_pdf(pdf_path)
         except Exception as e:
             print(f"Error reading PDF {pdf_path}: {e}")
             return ""
@@ -25,11 +89,7 @@ class ResumeParser:
     def extract_text_from_docx(self, docx_path):
         """Extract text from DOCX file"""
         try:
-            doc = Document(docx_path)
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text
+            return self._read_docx(docx_path)
         except Exception as e:
             print(f"Error reading DOCX {docx_path}: {e}")
             return ""
@@ -48,7 +108,15 @@ class ResumeParser:
         filename = os.path.basename(file_path)
         extension = os.path.splitext(filename)[1].lower()
         
-        if extension == '.pdf':
+        if self.cache_dir and extension in CACHED_EXTENSIONS:
+            try:
+                content = self._extract_cached(file_path, extension)
+            except Exception as e:
+                # Reported as an error so the file is not stored or recorded
+                # in the manifest, and the next run retries it
+                print(f"Error reading {extension[1:].upper()} {file_path}: {e}")
+                return {'file_path': file_path, 'error': str(e)}
+        elif extension == '.pdf':
             content = self.extract_text_from_pdf(file_path)
         elif extension == '.docx':
             content = self.extract_text_from_docx(file_path)
@@ -64,14 +132,134 @@ class ResumeParser:
             'file_path': file_path
         }
     
-    def parse_all_resumes(self):
-        """Parse all resumes in the folder"""
+    def _cache_path(self, digest):
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.v{EXTRACTION_VERSION}.txt")
+    
+    def _extract_cached(self, file_path, extension):
+        """Extract text through the on-disk cache keyed by file content hash
+
+        Raises when the file cannot be read.
+        """
+        cache_path = self._cache_path(file_hash(file_path))
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as file:
+                return file.read()
+        except FileNotFoundError:
+            pass
+        
+        # Failures raise before anything is cached
+        content = self._read_pdf(file_path) if extension == '.pdf' else self._read_docx(file_path)
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        os.replace(tmp_path, cache_path)
+        return content
+    
+    def iter_parse(self, file_paths):
+        """Parse files one by one, yielding each result"""
+        if self.num_workers > 1 and len(file_paths) > 1:
+            yield from self.iter_parse_parallel(file_paths)
+            return
+        for file_path in file_paths:
+            resume_data = self.parse_resume(file_path)
+            if resume_data:
+                yield resume_data
+    
+    def iter_parse_parallel(self, file_paths, num_workers=None, timeout=None,
+                            mp_context=None):
+        """Parse files in worker processes, yielding results in completion order
+
+        Each worker handles one file at a time and sends back only the extracted
+        text and metadata. A file that raises or exceeds the timeout (seconds)
+        yields a dict with an 'error' key; a stuck or crashed worker is killed
+        and replaced so the rest of the batch keeps going.
+        """
+        num_workers = min(num_workers or self.num_workers, len(file_paths)) or 1
+        timeout = timeout or self.timeout
+        context = mp_context or multiprocessing.get_context()
+        pending = list(reversed(file_paths))
+        workers = {}  # connection -> [process, file_path, started_at]
+        options = {'resume_folder': self.resume_folder, 'cache_dir': self.cache_dir}
+        
+        def start_worker():
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=_parse_worker, args=(child_conn, options),
+                                      daemon=True)
+            process.start()
+            child_conn.close()
+            workers[parent_conn] = [process, None, None]
+        
+        def stop_worker(conn):
+            process = workers.pop(conn)[0]
+            process.kill()
+            process.join()
+            conn.close()
+        
+        for _ in range(num_workers):
+            start_worker()
+        
+        try:
+            while True:
+                # Hand out work to idle workers
+                for conn, state in workers.items():
+                    if state[1] is None and pending:
+                        state[1], state[2] = pending.pop(), time.monotonic()
+                        conn.send(state[1])
+                
+                busy = {conn: state for conn, state in workers.items() if state[1] is not None}
+                if not busy:
+                    return
+                
+                now = time.monotonic()
+                next_deadline = min(state[2] + timeout for state in busy.values())
+                for conn in wait(list(busy), timeout=max(next_deadline - now, 0)):
+                    file_path = busy[conn][1]
+                    try:
+                        result = conn.recv()
+                    except EOFError:
+                        # The replacement worker is not in busy; clear the file
+                        # so the timeout check below skips the stopped one
+                        busy[conn][1] = None
+                        stop_worker(conn)
+                        start_worker()
+                        yield {'file_path': file_path, 'error': 'worker process crashed'}
+                        continue
+                    busy[conn][1] = None
+                    if result:
+                        yield result
+                
+                now = time.monotonic()
+                for conn, state in list(busy.items()):
+                    if state[1] is not None and now - state[2] > timeout:
+                        stop_worker(conn)
+                        start_worker()
+                        yield {'file_path': state[1],
+                               'error': f'timed out after {timeout}s'}
+        finally:
+            for conn in list(workers):
+                try:
+                    conn.send(None)
+                except OSError:
+                    pass
+                stop_worker(conn)
+    
+    def parse_files(self, file_paths):
+        """Parse the given resume files (failed files are reported and skipped)"""
         resumes = []
-        for filename in os.listdir(self.resume_folder):
-            if filename.lower().endswith(('.pdf', '.docx', '.txt')):
-                file_path = os.path.join(self.resume_folder, filename)
-                resume_data = self.parse_resume(file_path)
-                if resume_data:
-                    resumes.append(resume_data)
+        for resume_data in self.iter_parse(list(file_paths)):
+            if 'error' in resume_data:
+                print(f"Error parsing {resume_data['file_path']}: {resume_data['error']}")
+                continue
+            resumes.append(resume_data)
         
-        return pd.DataFrame(resumes)
\ No newline at end of file
+        return pd.DataFrame(resumes)
+    
+    def parse_all_resumes(self):
+        """Parse all resumes in the folder"""
+        file_paths = [
+            os.path.join(self.resume_folder, filename)
+            for filename in os.listdir(self.resume_folder)
+            if filename.lower().endswith(SUPPORTED_EXTENSIONS)
+        ]
+        return self.parse_files(file_paths)
\ No newline at end of file
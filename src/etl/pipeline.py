@@ -1,116 +1,257 @@
+import os
+import time
 import pandas as pd
 from src.utils.database import DatabaseManager
-from src.data_fetchers.resume_parser import ResumeParser
+from src.data_fetchers.resume_parser import ResumeParser, SUPPORTED_EXTENSIONS
 from src.data_fetchers.job_scraper import JobScraper
+from src.data_fetchers.job_sources import build_job_sources
 from src.nlp.text_processor import TextProcessor
-from tqdm import tqdm
+from src.utils.config import config
+from src.utils.hashing import content_hash, file_hash
+from src.utils.metrics import metrics
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def _batched(items, size):
+    """Yield lists of up to size items from any iterable"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
 class ETLPipeline:
-    def __init__(self):
-        self.db = DatabaseManager()
-        self.resume_parser = ResumeParser()
+    def __init__(self, db=None, resume_folder=None):
+        self.db = db if db is not None else DatabaseManager()
+        self.num_workers = config.get('processing.num_workers', 1)
+        self.resume_parser = ResumeParser(
+            resume_folder or config.get('data_sources.resume_folder', 'data/resumes/'),
+            num_workers=self.num_workers,
+            timeout=config.get('processing.parse_timeout', 60),
+            cache_dir=self.extraction_cache_dir(),
+            page_workers=config.get('processing.pdf_page_workers', 1),
+            parallel_page_threshold=config.get('processing.pdf_parallel_pages', 16)
+        )
         self.job_scraper = JobScraper()
-        self.text_processor = TextProcessor()
+        self.job_sources = build_job_sources(
+            config.get('data_sources.job_sources'), db=self.db,
+            default_folder=config.get('data_sources.job_descriptions_folder',
+                                      'data/job_descriptions/')
+        )
+        self.text_processor = TextProcessor(
+            config.get('nlp.model', 'all-MiniLM-L6-v2'),
+            skills_taxonomy=config.get('nlp.skills_taxonomy'),
+            backend=config.get('nlp.backend', 'transformer'),
+            max_features=config.get('nlp.max_features', 1000),
+            max_batch_tokens=config.get('nlp.max_batch_tokens', 8192),
+            max_batch_size=config.get('nlp.max_batch_size', 64)
+        )
+    
+    def extraction_cache_dir(self):
+        """Directory of cached PDF/DOCX text, kept next to the database"""
+        if not config.get('processing.cache_extracted_text', True):
+            return None
+        return os.path.join(os.path.dirname(os.path.abspath(self.db.db_path)), 'extracted_text')
+    
+    def scan_resume_changes(self, full=False):
+        """Compare the resume folder with the manifest of ingested files
+
+        Returns (changed, touched, deleted): changed is a list of
+        (path, size, mtime, content_hash) for new or modified files, touched
+        lists files whose stat changed but content did not, and deleted maps
+        paths that disappeared to their resume id. Files whose size and mtime
+        match the manifest are not read at all. Paths are resolved with
+        os.path.realpath, so the same folder given as a relative or absolute
+        path maps to the same entries.
+        """
+        stored = self.db.get_manifest('resume')
+        manifest = {}
+        # Entries already keyed by their real path win over older spellings
+        for path, entry in sorted(stored.items(),
+                                  key=lambda item: item[0] == os.path.realpath(item[0])):
+            manifest[os.path.realpath(path)] = entry
+        changed, touched = [], []
+        seen = set()
+        
+        with os.scandir(self.resume_parser.resume_folder) as entries:
+            for entry in entries:
+                if not entry.is_file() or not entry.name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    continue
+                path = os.path.realpath(entry.path)
+                stat = entry.stat()
+                seen.add(path)
+                
+                known = manifest.get(path)
+                if (not full and known and known['size'] == stat.st_size
+                        and known['mtime'] == stat.st_mtime):
+                    continue
+                
+                digest = file_hash(path)
+                if not full and known and known['content_hash'] == digest:
+                    touched.append((path, stat.st_size, stat.st_mtime, digest,
+                                    known['record_id']))
+                else:
+                    changed.append((path, stat.st_size, stat.st_mtime, digest))
+        
+        deleted = {path: entry['record_id'] for path, entry in stored.items()
+                   if os.path.realpath(path) not in seen}
+        return changed, touched, deleted
     
-    def extract_resumes(self):
-        """Extract resume data"""
+    @metrics.timed('stage', stage='extract')
+    def extract_resumes(self, paths=None):
+        """Extract resume data (only the given files when paths is provided)"""
         logger.info("Extracting resumes...")
-        resumes_df = self.resume_parser.parse_all_resumes()
+        if paths is None:
+            resumes_df = self.resume_parser.parse_all_resumes()
+        else:
+            resumes_df = self.resume_parser.parse_files(paths)
         logger.info(f"Extracted {len(resumes_df)} resumes")
+        metrics.inc('documents', len(resumes_df), stage='extract')
         return resumes_df
     
+    @metrics.timed('stage', stage='extract')
     def extract_jobs(self, keywords="python developer"):
         """Extract job descriptions"""
         logger.info("Extracting job descriptions...")
-        jobs_df = self.job_scraper.scrape_jobs_basic(keywords)
+        if self.job_sources:
+            jobs_df = pd.concat([source.fetch() for source in self.job_sources],
+                                ignore_index=True)
+        else:
+            jobs_df = self.job_scraper.scrape_jobs_basic(keywords)
         logger.info(f"Extracted {len(jobs_df)} job descriptions")
+        metrics.inc('documents', len(jobs_df), stage='extract')
         return jobs_df
     
+    def save_job_validators(self):
+        """Store HTTP validators of the fetched postings, once they are loaded
+
+        Saving them earlier would let a failed run's postings come back as
+        304 Not Modified next time and never be loaded.
+        """
+        for source in self.job_sources:
+            if hasattr(source, 'save_validators'):
+                source.save_validators()
+    
+    def filter_changed_jobs(self, jobs_df, full=False):
+        """Key jobs by source_id and drop those whose content is unchanged"""
+        if jobs_df.empty:
+            return jobs_df
+        
+        jobs_df = jobs_df.copy()
+        default_ids = jobs_df['company'] + '|' + jobs_df['title']
+        if 'source_id' not in jobs_df.columns:
+            jobs_df['source_id'] = default_ids
+        else:
+            jobs_df['source_id'] = jobs_df['source_id'].fillna(default_ids)
+        jobs_df['content_hash'] = [content_hash(text) for text in jobs_df['content']]
+        if full:
+            return jobs_df
+        
+        known = self.db.get_job_hashes()
+        changed = [known.get(source_id) != digest
+                   for source_id, digest in zip(jobs_df['source_id'], jobs_df['content_hash'])]
+        logger.info(f"Skipping {len(jobs_df) - sum(changed)} unchanged job descriptions")
+        return jobs_df[changed].reset_index(drop=True)
+    
+    @metrics.timed('stage', stage='transform')
     def transform_resumes(self, resumes_df):
         """Transform resume data"""
         logger.info("Transforming resumes...")
+        if resumes_df.empty:
+            return pd.DataFrame()
+        
+        # Extract skills and process text for the whole batch
+        all_skills = self.text_processor.extract_skills_batch(resumes_df['content'])
+        processed_content = self.text_processor.preprocess_batch(
+            resumes_df['content'], num_workers=self.num_workers)
+        
+        transformed_resumes = pd.DataFrame({
+            'filename': resumes_df['filename'].tolist(),
+            'content': resumes_df['content'].tolist(),
+            'processed_content': processed_content,
+            'skills': [', '.join(skills) for skills in all_skills],
+            'experience': '',  # Could extract experience years with more advanced NLP
+            'content_hash': self._column(resumes_df, 'content_hash')
+        })
         
-        transformed_resumes = []
-        for _, resume in tqdm(resumes_df.iterrows(), total=len(resumes_df)):
-            # Process text
-            processed_content = self.text_processor.preprocess_text(resume['content'])
-            
-            # Extract skills
-            skills = self.text_processor.extract_skills(resume['content'])
-            
-            transformed_resumes.append({
-                'filename': resume['filename'],
-                'content': resume['content'],
-                'processed_content': processed_content,
-                'skills': ', '.join(skills),
-                'experience': ''  # Could extract experience years with more advanced NLP
-            })
-        
-        return pd.DataFrame(transformed_resumes)
+        metrics.inc('documents', len(transformed_resumes), stage='transform')
+        return transformed_resumes
     
+    @metrics.timed('stage', stage='transform')
     def transform_jobs(self, jobs_df):
         """Transform job description data"""
         logger.info("Transforming job descriptions...")
+        if jobs_df.empty:
+            return pd.DataFrame()
         
-        transformed_jobs = []
-        for _, job in tqdm(jobs_df.iterrows(), total=len(jobs_df)):
-            # Process text
-            processed_content = self.text_processor.preprocess_text(job['content'])
-            
-            # Extract required skills
-            required_skills = self.text_processor.extract_skills(job['content'])
-            
-            transformed_jobs.append({
-                'title': job['title'],
-                'company': job['company'],
-                'content': job['content'],
-                'processed_content': processed_content,
-                'required_skills': ', '.join(required_skills)
-            })
-        
-        return pd.DataFrame(transformed_jobs)
+        # Extract required skills and process text for the whole batch
+        all_required_skills = self.text_processor.extract_skills_batch(jobs_df['content'])
+        processed_content = self.text_processor.preprocess_batch(
+            jobs_df['content'], num_workers=self.num_workers)
+        
+        transformed_jobs = pd.DataFrame({
+            'title': jobs_df['title'].tolist(),
+            'company': jobs_df['company'].tolist(),
+            'content': jobs_df['content'].tolist(),
+            'processed_content': processed_content,
+            'required_skills': [', '.join(skills) for skills in all_required_skills],
+            'source_id': self._column(jobs_df, 'source_id'),
+            'content_hash': self._column(jobs_df, 'content_hash')
+        })
+        
+        metrics.inc('documents', len(transformed_jobs), stage='transform')
+        return transformed_jobs
+    
+    def _column(self, df, name):
+        """Values of an optional column, or None for every row"""
+        return df[name].tolist() if name in df else [None] * len(df)
     
+    @metrics.timed('stage', stage='load')
     def load_data(self, resumes_df, jobs_df):
-        """Load data into database"""
+        """Load data into database with bulk upserts (one transaction per table)
+
+        Returns the upsert results for resumes and jobs; see
+        DatabaseManager.upsert_resumes.
+        """
         logger.info("Loading data into database...")
         
-        # Load resumes
-        for _, resume in resumes_df.iterrows():
-            try:
-                self.db.insert_resume(
-                    filename=resume['filename'],
-                    content=resume['content'],
-                    processed_content=resume['processed_content'],
-                    skills=resume['skills'],
-                    experience=resume['experience']
-                )
-            except Exception as e:
-                logger.warning(f"Resume already exists or error: {e}")
-        
-        # Load jobs
-        for _, job in jobs_df.iterrows():
-            try:
-                self.db.insert_job(
-                    title=job['title'],
-                    company=job['company'],
-                    content=job['content'],
-                    processed_content=job['processed_content'],
-                    required_skills=job['required_skills']
-                )
-            except Exception as e:
-                logger.warning(f"Job already exists or error: {e}")
-    
-    def run_etl(self):
-        """Run complete ETL pipeline"""
+        resume_result = self.db.upsert_resumes(resumes_df)
+        job_result = self.db.upsert_jobs(jobs_df)
+        metrics.inc('documents', len(resumes_df) + len(jobs_df), stage='load')
+        
+        for name, result in (('Resumes', resume_result), ('Jobs', job_result)):
+            logger.info(f"{name}: {result['inserted']} inserted, {result['updated']} updated, "
+                        f"{result['unchanged']} unchanged")
+        
+        return resume_result, job_result
+    
+    def run_etl(self, full=False):
+        """Run the ETL pipeline incrementally
+
+        Unchanged resume files and job descriptions are skipped before parsing,
+        modified ones are updated in place and deleted files are tombstoned.
+        Affected resumes are queued for `calculate-matches --incremental`.
+        With full=True every file and job is reprocessed.
+        """
         logger.info("Starting ETL pipeline...")
         
-        # Extract
-        resumes_df = self.extract_resumes()
-        jobs_df = self.extract_jobs()
+        # Extract only what changed since the last run
+        changed, touched, deleted = self.scan_resume_changes(full)
+        logger.info(f"Resumes: {len(changed)} new or modified, {len(touched)} touched, "
+                    f"{len(deleted)} deleted")
+        resumes_df = pd.DataFrame()
+        if changed:
+            resumes_df = self.extract_resumes([path for path, *_ in changed])
+            hashes = {os.path.basename(path): digest for path, _, _, digest in changed}
+            resumes_df['content_hash'] = resumes_df['filename'].map(hashes)
+        jobs_df = self.filter_changed_jobs(self.extract_jobs(), full)
         
         # Transform
         if not resumes_df.empty:
@@ -119,7 +260,151 @@ class ETLPipeline:
             jobs_df = self.transform_jobs(jobs_df)
         
         # Load
-        self.load_data(resumes_df, jobs_df)
+        resume_result, job_result = self.load_data(resumes_df, jobs_df)
+        self.save_job_validators()
+        
+        # Update the manifest and tombstone deleted files. Files that failed to
+        # parse are left out so the next run retries them.
+        ids_by_filename = resume_result['ids']
+        self.db.save_manifest_entries('resume', [
+            (path, size, mtime, digest, ids_by_filename[os.path.basename(path)])
+            for path, size, mtime, digest in changed
+            if os.path.basename(path) in ids_by_filename
+        ] + touched)
+        self._remove_deleted(deleted, set(ids_by_filename.values()) |
+                             {entry[4] for entry in touched})
+        
+        # Queue affected resumes for re-matching; changed jobs affect everyone
+        if job_result['changed_ids']:
+            self.db.mark_pending_matches()
+        elif resume_result['changed_ids']:
+            self.db.mark_pending_matches(resume_result['changed_ids'])
+        
+        logger.info("ETL pipeline completed successfully!")
+        return resumes_df, jobs_df
+    
+    def iter_resume_batches(self, changed, batch_size):
+        """Extract stage: parse changed files, yielding (entries, resumes_df) batches
+
+        entries are the manifest tuples of the files in the batch that parsed;
+        files that failed are logged and left out so the next run retries them.
+        Parsing is streamed, so only one batch of raw content is held at a time.
+        """
+        by_path = {path: (path, size, mtime, digest) for path, size, mtime, digest in changed}
+        parsed = self.resume_parser.iter_parse(list(by_path))
+        started = time.perf_counter()
+        for batch in _batched(parsed, batch_size):
+            metrics.observe('stage_seconds', time.perf_counter() - started, stage='extract')
+            metrics.inc('documents', len(batch), stage='extract')
+            records = [record for record in batch if 'error' not in record]
+            entries = [by_path[record['file_path']] for record in records]
+            for record in batch:
+                if 'error' in record:
+                    logger.warning(f"Error parsing {record['file_path']}: {record['error']}")
+            resumes_df = pd.DataFrame(records)
+            if not resumes_df.empty:
+                hashes = {path: digest for path, _, _, digest in entries}
+                resumes_df['content_hash'] = resumes_df['file_path'].map(hashes)
+            yield entries, resumes_df
+            started = time.perf_counter()
+    
+    def iter_extract_jobs(self, batch_size):
+        """Extract job descriptions in DataFrames of at most batch_size rows
+
+        Sources with iter_fetch are read one chunk at a time, so the full job
+        list is never held in memory; other sources are fetched whole.
+        """
+        if not self.job_sources:
+            jobs_df = self.extract_jobs()
+            for start in range(0, len(jobs_df), batch_size):
+                yield jobs_df.iloc[start:start + batch_size].reset_index(drop=True)
+            return
+        
+        chunks = (chunk for source in self.job_sources
+                  for chunk in (source.iter_fetch(batch_size)
+                                if hasattr(source, 'iter_fetch') else [source.fetch()]))
+        started = time.perf_counter()
+        for jobs_df in chunks:
+            for start in range(0, len(jobs_df), batch_size):
+                batch = jobs_df.iloc[start:start + batch_size].reset_index(drop=True)
+                metrics.observe('stage_seconds', time.perf_counter() - started, stage='extract')
+                metrics.inc('documents', len(batch), stage='extract')
+                yield batch
+                started = time.perf_counter()
+    
+    def iter_job_batches(self, batch_size, full=False):
+        """Extract stage for jobs: changed job descriptions in batches"""
+        for jobs_df in self.iter_extract_jobs(batch_size):
+            jobs_df = self.filter_changed_jobs(jobs_df, full)
+            if not jobs_df.empty:
+                yield jobs_df
+    
+    def run_etl_streaming(self, full=False, batch_size=None):
+        """Run the ETL pipeline one batch at a time
+
+        Extract, transform and load are chained generator stages passing
+        batches of processing.batch_size rows, so memory is bounded by the
+        batch size rather than the corpus size. Each batch is committed as soon
+        as it is loaded and recorded in the manifest last, so a crash mid-run
+        keeps every completed batch and the next run picks up the files that
+        were not loaded yet. Deleted files are removed after loading.
+        Returns total (resumes, jobs) row counts.
+        """
+        batch_size = batch_size or config.get('processing.batch_size', 100)
+        logger.info(f"Starting streaming ETL pipeline (batch size {batch_size})...")
         
+        changed, touched, deleted = self.scan_resume_changes(full)
+        logger.info(f"Resumes: {len(changed)} new or modified, {len(touched)} touched, "
+                    f"{len(deleted)} deleted")
+        self.db.save_manifest_entries('resume', touched)
+        
+        # Jobs first: a changed job queues every stored resume for re-matching
+        job_total = 0
+        transformed_jobs = (self.transform_jobs(jobs_df)
+                            for jobs_df in self.iter_job_batches(batch_size, full))
+        for jobs_df in transformed_jobs:
+            with metrics.timer('stage', stage='load'):
+                result = self.db.upsert_jobs(jobs_df)
+            metrics.inc('documents', len(jobs_df), stage='load')
+            if result['changed_ids']:
+                self.db.mark_pending_matches()
+            job_total += len(jobs_df)
+        self.save_job_validators()
+        
+        resume_total = 0
+        loaded_ids = {entry[4] for entry in touched}
+        transformed_resumes = (
+            (entries, self.transform_resumes(resumes_df) if not resumes_df.empty else resumes_df)
+            for entries, resumes_df in self.iter_resume_batches(changed, batch_size)
+        )
+        for entries, resumes_df in transformed_resumes:
+            with metrics.timer('stage', stage='load'):
+                ids_by_filename = self.db.upsert_resumes(resumes_df)['ids']
+            metrics.inc('documents', len(resumes_df), stage='load')
+            # Queue the whole batch (not only changed rows) before recording it
+            # in the manifest, so a batch interrupted in between is re-queued
+            if ids_by_filename:
+                self.db.mark_pending_matches(list(ids_by_filename.values()))
+                loaded_ids.update(ids_by_filename.values())
+            self.db.save_manifest_entries('resume', [
+                (path, size, mtime, digest, ids_by_filename.get(os.path.basename(path)))
+                for path, size, mtime, digest in entries
+            ])
+            resume_total += len(resumes_df)
+            logger.info(f"Loaded batch of {len(resumes_df)} resumes ({resume_total} so far)")
+        
+        self._remove_deleted(deleted, loaded_ids)
         logger.info("ETL pipeline completed successfully!")
-        return resumes_df, jobs_df
\ No newline at end of file
+        return resume_total, job_total
+    
+    def _remove_deleted(self, deleted, loaded_ids):
+        """Tombstone deleted files and delete their resumes
+
+        Resume ids loaded or kept in this run (loaded_ids) are never deleted,
+        even if an older manifest entry for the same file looks deleted.
+        """
+        if not deleted:
+            return
+        self.db.tombstone_manifest_entries(list(deleted))
+        self.db.delete_resumes([rid for rid in deleted.values()
+                                if rid is not None and rid not in loaded_ids])
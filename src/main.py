@@ -1,37 +1,194 @@
 import click
-from src.etl.pipeline import ETLPipeline
-from src.ranking.matcher import ResumeJobMatcher
+
+# Heavy modules (pandas, NLP models, PDF parsers) are imported inside each
+# command so read-only commands start quickly.
 
 
 @click.group()
-def cli():
+@click.option('--profile', 'profile_path', default=None, metavar='PATH',
+              help='Write a cProfile dump of the command to PATH (view with pstats/snakeviz)')
+@click.option('--metrics', 'metrics_path', default=None, metavar='PATH',
+              help='Write stage timings and counters to PATH (.prom for Prometheus text, '
+                   'otherwise JSON)')
+@click.pass_context
+def cli(ctx, profile_path, metrics_path):
     """Resume-Job Matcher CLI"""
-    pass
+    if profile_path:
+        import cProfile
+        
+        profiler = cProfile.Profile()
+        profiler.enable()
+        
+        def dump_profile():
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+            click.echo(f"Profile written to {profile_path}", err=True)
+        
+        ctx.call_on_close(dump_profile)
+    
+    if metrics_path:
+        def write_metrics():
+            from src.utils.metrics import metrics
+            metrics.write(metrics_path)
+            click.echo(f"Metrics written to {metrics_path}", err=True)
+        
+        ctx.call_on_close(write_metrics)
 
 @cli.command()
-def run_etl():
+@click.option('--full', is_flag=True, help='Reprocess every file, not only changed ones')
+@click.option('--streaming', is_flag=True,
+              help='Process and commit processing.batch_size rows at a time')
+def run_etl(full, streaming):
     """Run the ETL pipeline"""
+    from src.etl.pipeline import ETLPipeline
+    
     click.echo("Running ETL pipeline...")
     pipeline = ETLPipeline()
-    resumes_df, jobs_df = pipeline.run_etl()
-    click.echo(f"Processed {len(resumes_df)} resumes and {len(jobs_df)} jobs")
+    if streaming:
+        resume_count, job_count = pipeline.run_etl_streaming(full=full)
+    else:
+        resumes_df, jobs_df = pipeline.run_etl(full=full)
+        resume_count, job_count = len(resumes_df), len(jobs_df)
+    click.echo(f"Processed {resume_count} resumes and {job_count} jobs")
 
 @cli.command()
 @click.option('--top-k', default=5, help='Number of top matches to return')
-def calculate_matches(top_k):
+@click.option('--ann/--exact', default=None,
+              help='Use the approximate job index (default: ranking.ann.enabled)')
+@click.option('--n-probe', type=int, default=None,
+              help='Index lists to scan per resume (higher = better recall)')
+@click.option('--incremental', is_flag=True,
+              help='Only re-score resumes changed by the last ETL run')
+@click.option('--job-top-k', type=int, default=None,
+              help='Candidates kept per job (default: ranking.job_top_k, else --top-k)')
+@click.option('--workers', type=int, default=None,
+              help='Scoring processes (default: processing.num_workers)')
+def calculate_matches(top_k, ann, n_probe, incremental, job_top_k, workers):
     """Calculate resume-job matches"""
+    from src.ranking.matcher import ResumeJobMatcher
+    
+    def progress(done, total):
+        click.echo(f"\rScored {done}/{total} resumes", nl=done == total)
+    
     click.echo("Calculating matches...")
     matcher = ResumeJobMatcher()
-    matches_df = matcher.calculate_matches(top_k=top_k)
+    matches_df = matcher.calculate_matches(top_k=top_k, use_index=ann, n_probe=n_probe,
+                                           incremental=incremental, job_top_k=job_top_k,
+                                           num_workers=workers, progress=progress)
     click.echo(f"Generated {len(matches_df)} matches")
 
+@cli.command()
+@click.option('--rebuild', is_flag=True, help='Re-cluster the index from scratch')
+def build_index(rebuild):
+    """Build or incrementally update the approximate job index"""
+    from src.ranking.matcher import ResumeJobMatcher
+    
+    matcher = ResumeJobMatcher()
+    index = matcher.sync_job_index(rebuild=rebuild)
+    click.echo(f"Job index holds {len(index)} jobs in {len(index.centroids)} lists")
+
+@cli.command()
+@click.option('--top-k', default=5, help='k for recall@k')
+@click.option('--n-probe', type=int, default=None, help='Index lists to scan per query')
+@click.option('--sample-size', default=100, help='Number of resumes to evaluate')
+def index_recall(top_k, n_probe, sample_size):
+    """Report recall@k of the job index against exact search"""
+    from src.ranking.matcher import ResumeJobMatcher
+    
+    matcher = ResumeJobMatcher()
+    recall = matcher.evaluate_index(top_k=top_k, n_probe=n_probe, sample_size=sample_size)
+    click.echo(f"Recall@{top_k}: {recall:.3f}")
+
+@cli.command()
+@click.option('--dtype', type=click.Choice(['float32', 'float16', 'int8']), default=None,
+              help='Storage type (default: ranking.embedding_store.dtype)')
+@click.option('--rebuild', is_flag=True, help='Rewrite the matrix even if jobs are unchanged')
+def build_embedding_store(dtype, rebuild):
+    """Write the memory-mapped job embedding matrix"""
+    from src.ranking.matcher import ResumeJobMatcher
+    
+    matcher = ResumeJobMatcher()
+    store = matcher.sync_embedding_store(dtype=dtype, rebuild=rebuild)
+    click.echo(f"Embedding store holds {len(store)} {store.dtype} jobs "
+               f"({store.nbytes / 1024 / 1024:.1f} MB) at {store.path}")
+
+@cli.command()
+@click.option('--top-k', default=5, help='k for recall@k')
+@click.option('--dtype', type=click.Choice(['float32', 'float16', 'int8']), default=None,
+              help='Storage type to evaluate (default: ranking.embedding_store.dtype)')
+@click.option('--sample-size', default=100, help='Number of resumes to evaluate')
+def embedding_store_accuracy(top_k, dtype, sample_size):
+    """Report ranking accuracy of the quantized job matrix against float32"""
+    from src.ranking.matcher import ResumeJobMatcher
+    
+    matcher = ResumeJobMatcher()
+    report = matcher.evaluate_embedding_store(top_k=top_k, sample_size=sample_size, dtype=dtype)
+    click.echo(f"{report['dtype']}: recall@{top_k} {report['recall_at_k']:.3f}, "
+               f"max score error {report['max_score_error']:.5f}, "
+               f"mean score error {report['mean_score_error']:.5f}, "
+               f"{report['bytes'] / max(report['float32_bytes'], 1):.0%} of float32 size")
+
+@cli.command()
+def gc_embeddings():
+    """Remove cached embeddings for stale content or models"""
+    from src.ranking.matcher import ResumeJobMatcher
+    
+    matcher = ResumeJobMatcher()
+    removed = matcher.gc_embeddings()
+    click.echo(f"Removed {removed} cached embeddings")
+
+@cli.command()
+@click.option('--socket', 'socket_path', default=None,
+              help='Unix socket to listen on (default: service.socket_path)')
+def serve(socket_path):
+    """Keep the model warm and serve encode/score/top-k requests"""
+    from src.service.daemon import MatcherDaemon
+    from src.utils.config import config
+    
+    socket_path = socket_path or config.get('service.socket_path', 'data/matcher.sock')
+    daemon = MatcherDaemon(
+        socket_path,
+        max_batch_size=config.get('service.max_batch_size', 64),
+        max_wait_ms=config.get('service.max_wait_ms', 5)
+    )
+    click.echo(f"Serving on {socket_path} (Ctrl+C to stop)")
+    daemon.serve_forever()
+
+@cli.command()
+@click.argument('file_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--top-k', default=5, help='Number of top matches to show')
+def match_file(file_path, top_k):
+    """Match one resume file against the stored jobs without saving it"""
+    from src.ranking.matcher import ResumeJobMatcher
+    
+    matcher = ResumeJobMatcher()
+    try:
+        matches = matcher.match_file(file_path, top_k=top_k)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    
+    if matches.empty:
+        click.echo("No jobs found. Run 'run-etl' first.")
+        return
+    
+    click.echo(f"\nTop {top_k} matches for {file_path}:")
+    click.echo("-" * 50)
+    
+    for match in matches.itertuples(index=False):
+        click.echo(f"{match.rank}. {match.job_title} at {match.company}")
+        click.echo(f"   Score: {match.combined_score:.3f}")
+        click.echo()
+
 @cli.command()
 @click.option('--resume', required=True, help='Resume filename')
 @click.option('--top-k', default=5, help='Number of top matches to show')
-def show_matches(resume, top_k):
+@click.option('--after-rank', default=0, help='Show matches ranked below this rank (paging)')
+def show_matches(resume, top_k, after_rank):
     """Show top matches for a specific resume"""
+    from src.ranking.matcher import ResumeJobMatcher
+    
     matcher = ResumeJobMatcher()
-    matches = matcher.get_top_matches_for_resume(resume, top_k)
+    matches = matcher.get_top_matches_for_resume(resume, top_k, after_rank=after_rank)
     
     if matches.empty:
         click.echo(f"No matches found for {resume}")
@@ -46,26 +203,53 @@ def show_matches(resume, top_k):
         click.echo()
 
 @cli.command()
-def summary():
-    """Show summary of all matches"""
+@click.option('--job-id', required=True, type=int, help='Job description id')
+@click.option('--top-k', default=5, help='Number of top candidates to show')
+@click.option('--after-rank', default=0, help='Show candidates ranked below this rank (paging)')
+def show_candidates(job_id, top_k, after_rank):
+    """Show the best-matching resumes for a job"""
+    from src.ranking.matcher import ResumeJobMatcher
+    
     matcher = ResumeJobMatcher()
-    summary_df = matcher.get_match_summary()
+    candidates = matcher.get_top_candidates_for_job(job_id, top_k, after_rank=after_rank)
     
-    if summary_df.empty:
-        click.echo("No matches found. Run 'calculate-matches' first.")
+    if candidates.empty:
+        click.echo(f"No candidates found for job {job_id}")
         return
     
-    click.echo("\nMatch Summary:")
-    click.echo("-" * 60)
+    first = candidates.iloc[0]
+    click.echo(f"\nTop {top_k} candidates for {first['title']} at {first['company']}:")
+    click.echo("-" * 50)
+    
+    for candidate in candidates.itertuples(index=False):
+        click.echo(f"{candidate.rank}. {candidate.filename}")
+        click.echo(f"   Score: {candidate.combined_score:.3f}")
+        click.echo()
+
+@cli.command()
+@click.option('--chunk-size', default=1000, help='Rows read from the database at a time')
+def summary(chunk_size):
+    """Show summary of all matches"""
+    from src.ranking.matcher import ResumeJobMatcher
+    
+    matcher = ResumeJobMatcher()
     
     current_resume = None
-    for _, row in summary_df.iterrows():
-        if current_resume != row['resume']:
-            current_resume = row['resume']
-            click.echo(f"\n{current_resume}:")
+    for chunk in matcher.iter_match_summary(chunk_size):
+        if current_resume is None:
+            click.echo("\nMatch Summary:")
+            click.echo("-" * 60)
         
-        click.echo(f"  {row['rank']}. {row['job_title']} at {row['company']} "
-                  f"(Score: {row['combined_score']:.3f})")
+        for row in chunk.itertuples(index=False):
+            if current_resume != row.resume:
+                current_resume = row.resume
+                click.echo(f"\n{current_resume}:")
+            
+            click.echo(f"  {row.rank}. {row.job_title} at {row.company} "
+                      f"(Score: {row.combined_score:.3f})")
+    
+    if current_resume is None:
+        click.echo("No matches found. Run 'calculate-matches' first.")
 
 if __name__ == '__main__':
     cli()
\ No newline at end of file
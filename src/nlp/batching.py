@@ -0,0 +1,105 @@
+import time
+import numpy as np
+
+# Tokens added to every text by the tokenizer ([CLS] and [SEP])
+SPECIAL_TOKENS = 2
+
+
+def token_lengths(texts, model=None):
+    """Estimated tokens each text occupies in a model batch, after truncation
+
+    Whitespace words plus the special tokens, capped at the model's
+    max_seq_length since longer texts are truncated before encoding. The
+    model's own tokenizer is not used: model.encode tokenizes every text
+    anyway, and running it here too would tokenize each text twice.
+    """
+    max_length = getattr(model, 'max_seq_length', None)
+    lengths = np.array([len(text.split()) + SPECIAL_TOKENS for text in texts],
+                       dtype=np.int64)
+    if max_length:
+        lengths = np.minimum(lengths, max_length)
+    return lengths
+
+
+def plan_batches(lengths, max_tokens, max_batch_size):
+    """Group text indices into batches by length under a padded-token budget
+
+    Texts are sorted longest first, so each batch pads to its first text and
+    holds as many texts as fit in max_tokens (at least one, at most
+    max_batch_size). Returns a list of index arrays.
+    """
+    lengths = np.asarray(lengths)
+    order = np.argsort(-lengths, kind='stable')
+    batches = []
+    start = 0
+    while start < len(order):
+        longest = max(int(lengths[order[start]]), 1)
+        size = max(1, min(max_batch_size, max_tokens // longest))
+        batches.append(order[start:start + size])
+        start += size
+    return batches
+
+
+class BatchStats:
+    """Running totals of the batches sent to the model"""
+
+    def __init__(self):
+        self.texts = 0
+        self.batches = 0
+        self.tokens = 0
+        self.padded_tokens = 0
+        self.seconds = 0.0
+
+    def copy(self):
+        stats = BatchStats()
+        stats.__dict__.update(self.__dict__)
+        return stats
+
+    def since(self, earlier):
+        """Totals added after earlier, a copy() of these stats"""
+        stats = BatchStats()
+        for name in vars(stats):
+            setattr(stats, name, getattr(self, name) - getattr(earlier, name))
+        return stats
+
+    def add(self, lengths, seconds):
+        self.texts += len(lengths)
+        self.batches += 1
+        self.tokens += int(np.sum(lengths))
+        self.padded_tokens += int(np.max(lengths)) * len(lengths)
+        self.seconds += seconds
+
+    def to_dict(self):
+        return {
+            'texts': self.texts,
+            'batches': self.batches,
+            'tokens': self.tokens,
+            'padded_tokens': self.padded_tokens,
+            'padding_ratio': 1 - self.tokens / self.padded_tokens if self.padded_tokens else 0.0,
+            'tokens_per_sec': self.tokens / self.seconds if self.seconds else None,
+            'texts_per_sec': self.texts / self.seconds if self.seconds else None
+        }
+
+
+def encode_bucketed(model, texts, max_tokens, max_batch_size, stats=None, on_batch=None):
+    """Encode texts in length-sorted, token-budgeted batches, in the original order
+
+    on_batch(lengths, seconds) is called after each model call.
+    """
+    lengths = token_lengths(texts, model)
+    embeddings = None
+    for batch in plan_batches(lengths, max_tokens, max_batch_size):
+        started = time.perf_counter()
+        encoded = np.asarray(model.encode([texts[i] for i in batch], batch_size=len(batch),
+                                          convert_to_numpy=True), dtype=np.float32)
+        seconds = time.perf_counter() - started
+        if embeddings is None:
+            embeddings = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+        embeddings[batch] = encoded
+        if stats is not None:
+            stats.add(lengths[batch], seconds)
+        if on_batch is not None:
+            on_batch(lengths[batch], seconds)
+    if embeddings is None:
+        return np.zeros((0, 0), dtype=np.float32)
+    return embeddings
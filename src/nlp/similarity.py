@@ -0,0 +1,56 @@
+import numpy as np
+
+
+def normalize_rows(matrix):
+    """L2-normalize each row of a matrix (zero rows stay zero)"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def cosine_similarity_matrix(left, right, normalized=False):
+    """All-pairs cosine similarity between the rows of two matrices"""
+    if not normalized:
+        left = normalize_rows(left)
+        right = normalize_rows(right)
+    return left @ right.T
+
+
+def jaccard_similarity_matrix(left, right):
+    """All-pairs Jaccard similarity between the rows of two boolean matrices
+
+    Intersections come from a single matrix product, unions from the row
+    counts: |A u B| = |A| + |B| - |A n B|. Pairs where either side is empty
+    score 0.0.
+    """
+    left = np.asarray(left, dtype=np.float32)
+    right = np.asarray(right, dtype=np.float32)
+    intersection = left @ right.T
+    left_counts = left.sum(axis=1)
+    right_counts = right.sum(axis=1)
+    union = left_counts[:, None] + right_counts[None, :] - intersection
+
+    scores = np.zeros_like(intersection)
+    valid = (left_counts[:, None] > 0) & (right_counts[None, :] > 0) & (union > 0)
+    np.divide(intersection, union, out=scores, where=valid)
+    return scores
+
+
+def word_set_matrix(texts, vocabulary=None):
+    """Build a boolean document x word matrix from whitespace-split lowercase words"""
+    word_sets = [set(text.lower().split()) if isinstance(text, str) else set()
+                 for text in texts]
+    if vocabulary is None:
+        vocabulary = {}
+        for words in word_sets:
+            for word in words:
+                vocabulary.setdefault(word, len(vocabulary))
+
+    matrix = np.zeros((len(word_sets), len(vocabulary)), dtype=bool)
+    for row, words in enumerate(word_sets):
+        columns = [vocabulary[word] for word in words if word in vocabulary]
+        matrix[row, columns] = True
+    return matrix, vocabulary
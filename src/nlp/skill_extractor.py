@@ -0,0 +1,99 @@
+import os
+import re
+from functools import lru_cache
+
+import yaml
+
+DEFAULT_TAXONOMY_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', '..', 'config', 'skills.yaml'
+)
+
+# Words may contain '+' and '#' (c++, c#) and inner '.'/'-' (node.js, scikit-learn)
+TOKEN_PATTERN = re.compile(r'[a-z0-9+#]+(?:[.\-][a-z0-9+#]+)*')
+SPLIT_PATTERN = re.compile(r'[.\-]')
+
+
+def load_taxonomy(path):
+    """Load a skills taxonomy file into a dict of alias -> canonical skill"""
+    with open(path, 'r') as file:
+        categories = yaml.safe_load(file) or {}
+
+    aliases = {}
+    for entries in categories.values():
+        for entry in entries or []:
+            if isinstance(entry, dict):
+                for canonical, names in entry.items():
+                    canonical = str(canonical).lower()
+                    aliases[canonical] = canonical
+                    for name in names or []:
+                        aliases[str(name).lower()] = canonical
+            else:
+                canonical = str(entry).lower()
+                aliases[canonical] = canonical
+    return aliases
+
+
+class SkillExtractor:
+    """Finds every taxonomy skill in a text with one scan over its words
+
+    Skill phrases (and their aliases) are compiled once into a word-level trie.
+    Extraction tokenizes the text a single time and walks the trie from each
+    word, so the cost is linear in the text length regardless of how many
+    skills the taxonomy defines.
+    """
+
+    def __init__(self, aliases):
+        self.trie = {}
+        self.words = set()
+        for alias, canonical in aliases.items():
+            tokens = TOKEN_PATTERN.findall(alias.lower())
+            if not tokens:
+                continue
+            node = self.trie
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node[None] = canonical
+            self.words.update(tokens)
+
+    @classmethod
+    def from_file(cls, path):
+        return cls(load_taxonomy(path))
+
+    def tokenize(self, text):
+        """Lowercase words; compound words unknown to the taxonomy are split"""
+        tokens = []
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            if token in self.words or not SPLIT_PATTERN.search(token):
+                tokens.append(token)
+            else:
+                tokens.extend(part for part in SPLIT_PATTERN.split(token) if part)
+        return tokens
+
+    def extract(self, text):
+        """Return canonical skills found in text, in order of first appearance"""
+        if not isinstance(text, str):
+            return []
+
+        tokens = self.tokenize(text)
+        found = {}
+        for start in range(len(tokens)):
+            node = self.trie
+            # Walk by index: slicing tokens[start:] would copy the rest of the
+            # list for every start position
+            for end in range(start, len(tokens)):
+                node = node.get(tokens[end])
+                if node is None:
+                    break
+                if None in node:
+                    found.setdefault(node[None])
+        return list(found)
+
+    def extract_batch(self, texts):
+        """Extract skills for a list of documents"""
+        return [self.extract(text) for text in texts]
+
+
+@lru_cache(maxsize=None)
+def get_skill_extractor(path=None):
+    """Compiled extractor for a taxonomy file, built once per process"""
+    return SkillExtractor.from_file(path or DEFAULT_TAXONOMY_PATH)
@@ -0,0 +1,53 @@
+import numpy as np
+
+from src.nlp.similarity import jaccard_similarity_matrix
+
+
+def parse_skills(skills):
+    """Split a comma-joined skills string into a set of lowercase skills"""
+    if not isinstance(skills, str) or not skills:
+        return set()
+    return {skill.strip().lower() for skill in skills.split(',') if skill.strip()}
+
+
+class SkillVocabulary:
+    """Maps each skill to an integer id so skill sets become bit vectors
+
+    Documents are encoded once into a boolean document x skill matrix, and
+    all-pairs Jaccard similarity is then computed from intersection/union
+    counts instead of per-pair Python sets.
+    """
+
+    def __init__(self, skills=()):
+        self.index = {}
+        for skill in skills:
+            self.add(skill)
+
+    def __len__(self):
+        return len(self.index)
+
+    def add(self, skill):
+        """Return the id of a skill, assigning a new one if needed"""
+        return self.index.setdefault(skill, len(self.index))
+
+    def fit(self, documents):
+        """Register every skill in an iterable of comma-joined skills strings"""
+        for skills in documents:
+            for skill in sorted(parse_skills(skills)):
+                self.add(skill)
+        return self
+
+    def encode(self, documents):
+        """Encode skills strings as a boolean matrix; unknown skills are ignored"""
+        documents = list(documents)
+        matrix = np.zeros((len(documents), len(self.index)), dtype=bool)
+        for row, skills in enumerate(documents):
+            columns = [self.index[skill] for skill in parse_skills(skills)
+                       if skill in self.index]
+            matrix[row, columns] = True
+        return matrix
+
+
+def skills_similarity_matrix(resume_bits, job_bits):
+    """All-pairs Jaccard similarity between two boolean skill matrices"""
+    return jaccard_similarity_matrix(resume_bits, job_bits)
@@ -1,14 +1,48 @@
 import re
-import spacy
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
 import numpy as np
 import os
+from functools import lru_cache
+from src.utils.hashing import content_hash
+from src.utils.metrics import SIZE_BUCKETS, metrics
+from src.nlp.skill_extractor import get_skill_extractor
+from src.nlp.similarity import cosine_similarity_matrix, normalize_rows
+from src.nlp.tfidf import TfidfEngine, hashed_term_frequencies
+from src.nlp.batching import BatchStats, encode_bucketed
 
-# Download required NLTK data
+_NOT_LOADED = object()
+
+_NON_LETTERS = re.compile(r'[^a-zA-Z\s]')
+
+# Words NLTK's word_tokenize splits even in letters-only text (its CONTRACTIONS2 rules)
+_TOKENIZER_SPLITS = {
+    'cannot': ('can', 'not'),
+    'gimme': ('gim', 'me'),
+    'gonna': ('gon', 'na'),
+    'gotta': ('got', 'ta'),
+    'lemme': ('lem', 'me'),
+    'wanna': ('wan', 'na')
+}
+
+
+def _preprocess_chunk(texts, stop_words, split_contractions):
+    """preprocess_text for many texts: one regex pass, a split and a set lookup per token"""
+    processed = []
+    for text in texts:
+        if not isinstance(text, str):
+            processed.append("")
+            continue
+        tokens = _NON_LETTERS.sub('', text.lower()).split()
+        if split_contractions:
+            tokens = [part for token in tokens for part in _TOKENIZER_SPLITS.get(token, (token,))]
+        processed.append(' '.join([token for token in tokens if token not in stop_words]))
+    return processed
+
+# Download required NLTK data (NLTK is imported and probed once, on first use)
+@lru_cache(maxsize=None)
 def download_nltk_data():
     """Download all required NLTK data"""
+    import nltk
+    
     try:
         nltk.data.find('tokenizers/punkt')
     except LookupError:
@@ -24,37 +58,101 @@ def download_nltk_data():
     except LookupError:
         nltk.download('stopwords')
 
-# Download data when module is imported
-download_nltk_data()
-
 class TextProcessor:
-    def __init__(self, model_name="all-MiniLM-L6-v2"):
-        """Initialize TextProcessor with CI/CD support"""
-        self.stop_words = set(stopwords.words('english'))
-        self.model = None
+    def __init__(self, model_name="all-MiniLM-L6-v2", embedding_cache=None,
+                 skills_taxonomy=None, daemon_socket=None, backend="transformer",
+                 max_features=1000, max_batch_tokens=8192, max_batch_size=64):
+        """Initialize TextProcessor with CI/CD support
+
+        Models and NLTK data are loaded lazily on first use, so constructing a
+        TextProcessor is cheap for callers that never encode text.
+        embedding_cache is an optional store with get_embeddings/save_embeddings
+        (e.g. DatabaseManager) used to skip encoding unchanged texts.
+        skills_taxonomy is the skills file used by extract_skills (defaults to
+        config/skills.yaml). When daemon_socket points at a running matcher
+        daemon, encoding is delegated to its warm model instead of loading one.
+        backend "tfidf" never loads a model and scores with sparse TF-IDF
+        vectors (max_features terms), the same engine used when no model is
+        available.
+        Texts are encoded longest first in batches of at most max_batch_size
+        texts and max_batch_tokens padded tokens; embedding_stats() reports
+        throughput and padding.
+        """
+        self.model_name = model_name
+        self.daemon_socket = daemon_socket
+        self.embedding_cache = embedding_cache
+        self.skills_taxonomy = skills_taxonomy
+        self.backend = backend
+        self.max_features = max_features
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.batch_stats = BatchStats()
+        self._stop_words = None
+        self._model = _NOT_LOADED
+        self._nlp = _NOT_LOADED
+    
+    @property
+    def model(self):
+        """SentenceTransformer model, loaded on first access (None in CI/CD)"""
+        if self._model is _NOT_LOADED:
+            self._model = self._load_model()
+        return self._model
+    
+    @model.setter
+    def model(self, model):
+        self._model = model
+    
+    def _load_model(self):
+        if self.backend == "tfidf":
+            return None
         
         # Check if running in CI/CD environment
         is_ci = os.getenv('CI') or os.getenv('GITLAB_CI') or os.getenv('MOCK_MODEL')
         
         if is_ci:
             print("Running in CI/CD environment - using mock model")
-            self.model = None
-        else:
-            try:
-                from sentence_transformers import SentenceTransformer
-                self.model = SentenceTransformer(model_name)
-                print(f"Loaded SentenceTransformer model: {model_name}")
-            except Exception as e:
-                print(f"Failed to load SentenceTransformer: {e}")
-                print("Continuing with basic text processing only")
-                self.model = None
+            return None
+        
+        if self.daemon_socket:
+            from src.service.client import DaemonClient
+            client = DaemonClient(self.daemon_socket)
+            if client.available(self.model_name):
+                print(f"Using matcher daemon at {self.daemon_socket}")
+                return client
         
-        # Initialize spaCy
         try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except OSError:
-            print("spaCy model not found. Install with: python -m spacy download en_core_web_sm")
-            self.nlp = None
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(self.model_name)
+            print(f"Loaded SentenceTransformer model: {self.model_name}")
+            return model
+        except Exception as e:
+            print(f"Failed to load SentenceTransformer: {e}")
+            print("Continuing with basic text processing only")
+            return None
+    
+    @property
+    def nlp(self):
+        """spaCy pipeline, loaded on first access"""
+        if self._nlp is _NOT_LOADED:
+            try:
+                import spacy
+                self._nlp = spacy.load("en_core_web_sm")
+            except OSError:
+                print("spaCy model not found. Install with: python -m spacy download en_core_web_sm")
+                self._nlp = None
+        return self._nlp
+    
+    @property
+    def stop_words(self):
+        if self._stop_words is None:
+            download_nltk_data()
+            from nltk.corpus import stopwords
+            self._stop_words = set(stopwords.words('english'))
+        return self._stop_words
+    
+    @property
+    def skill_extractor(self):
+        return get_skill_extractor(self.skills_taxonomy)
     
     def clean_text(self, text):
         """Clean and preprocess text"""
@@ -62,30 +160,18 @@ class TextProcessor:
             return ""
         
         text = text.lower()
-        text = re.sub(r'[^a-zA-Z\s]', '', text)
+        text = _NON_LETTERS.sub('', text)
         text = ' '.join(text.split())
         
         return text
     
     def extract_skills(self, text):
         """Extract technical skills from text"""
-        skills_patterns = [
-            r'\b(?:python|java|javascript|c\+\+|c#|php|ruby|go|rust|kotlin|swift)\b',
-            r'\b(?:react|angular|vue|django|flask|spring|express|nodejs)\b',
-            r'\b(?:sql|mysql|postgresql|mongodb|redis|elasticsearch)\b',
-            r'\b(?:aws|azure|gcp|docker|kubernetes|jenkins|git)\b',
-            r'\b(?:machine learning|deep learning|ai|nlp|computer vision)\b',
-            r'\b(?:tensorflow|pytorch|scikit-learn|pandas|numpy)\b'
-        ]
-        
-        skills = set()
-        text_lower = text.lower()
-        
-        for pattern in skills_patterns:
-            matches = re.findall(pattern, text_lower)
-            skills.update(matches)
-        
-        return list(skills)
+        return self.skill_extractor.extract(text)
+    
+    def extract_skills_batch(self, texts):
+        """Extract technical skills from a list of texts"""
+        return self.skill_extractor.extract_batch(texts)
     
     def preprocess_text(self, text):
         """Complete text preprocessing with error handling"""
@@ -95,6 +181,8 @@ class TextProcessor:
             
             # Tokenize with fallback
             try:
+                download_nltk_data()
+                from nltk.tokenize import word_tokenize
                 tokens = word_tokenize(cleaned)
             except LookupError:
                 # Fallback to simple split if NLTK fails
@@ -113,38 +201,180 @@ class TextProcessor:
             # Return cleaned text as fallback
             return self.clean_text(text)
     
+    def preprocess_batch(self, texts, num_workers=1, chunk_size=1000):
+        """Preprocess many texts; each result is identical to preprocess_text(text)
+
+        clean_text leaves only lowercase letters and spaces, so tokenizing is a
+        plain split plus the few word splits word_tokenize would still make
+        (e.g. "cannot" -> "can not"), applied only when NLTK's tokenizer data
+        is installed, as in preprocess_text. With num_workers > 1, chunks of
+        chunk_size texts are processed in parallel.
+        """
+        texts = list(texts)
+        try:
+            stop_words = self.stop_words
+            split_contractions = self._word_tokenize_available()
+        except Exception as e:
+            print(f"Error in text preprocessing: {e}")
+            return [self.clean_text(text) for text in texts]
+        
+        if num_workers > 1 and len(texts) > chunk_size:
+            from concurrent.futures import ProcessPoolExecutor
+            chunks = [texts[start:start + chunk_size]
+                      for start in range(0, len(texts), chunk_size)]
+            with ProcessPoolExecutor(max_workers=min(num_workers, len(chunks))) as executor:
+                results = executor.map(_preprocess_chunk, chunks,
+                                       [stop_words] * len(chunks),
+                                       [split_contractions] * len(chunks))
+                return [text for chunk in results for text in chunk]
+        
+        return _preprocess_chunk(texts, stop_words, split_contractions)
+    
+    def _word_tokenize_available(self):
+        """Whether preprocess_text tokenizes with NLTK (else it falls back to split)"""
+        try:
+            download_nltk_data()
+            from nltk.tokenize import word_tokenize
+            word_tokenize("")
+            return True
+        except LookupError:
+            return False
+    
     def get_embeddings(self, texts):
-        """Get sentence embeddings"""
+        """Get sentence embeddings
+
+        Without a model these are hashed term frequencies, max_features wide
+        whatever the texts, so vectors from separate calls are comparable.
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+        
         if self.model is None:
-            # Return mock embeddings for CI/CD or when model unavailable
-            if isinstance(texts, str):
-                texts = [texts]
-            # Return random embeddings for testing
-            return np.random.rand(len(texts), 384)  # 384 is dimension of all-MiniLM-L6-v2
+            return hashed_term_frequencies(texts, self.max_features)
         
+        return self._encode(texts)
+    
+    def encode_normalized(self, texts, batch_size=None):
+        """Encode texts in batches and return L2-normalized float32 vectors"""
         if isinstance(texts, str):
             texts = [texts]
+        texts = list(texts)
+        if not texts:
+            width = self.max_features if self.model is None else 384
+            return np.zeros((0, width), dtype=np.float32)
+
+        if self.model is None:
+            embeddings = self.get_embeddings(texts)
+        elif self.embedding_cache is None:
+            embeddings = self._encode(texts, batch_size)
+        else:
+            embeddings = self._encode_cached(texts, batch_size)
+        return normalize_rows(embeddings)
+
+    def _encode(self, texts, batch_size=None):
+        """Encode texts in length-bucketed, token-budgeted batches (original order kept)"""
+        def on_batch(lengths, seconds):
+            metrics.observe('model_batch_size', len(lengths), buckets=SIZE_BUCKETS)
+            metrics.inc('embed_tokens', int(lengths.sum()))
+            metrics.inc('embed_padded_tokens', int(lengths.max()) * len(lengths))
         
-        embeddings = self.model.encode(texts)
-        return embeddings
+        metrics.inc('documents', len(texts), stage='embed')
+        with metrics.timer('stage', stage='embed'):
+            return encode_bucketed(self.model, texts, self.max_batch_tokens,
+                                   batch_size or self.max_batch_size,
+                                   stats=self.batch_stats, on_batch=on_batch)
     
+    def embedding_stats(self, since=None):
+        """Texts, batches, tokens/sec and padding ratio of every model call so far
+
+        since is an earlier batch_stats.copy(); only calls made after it count.
+        """
+        stats = self.batch_stats if since is None else self.batch_stats.since(since)
+        return stats.to_dict()
+
+    def _encode_cached(self, texts, batch_size):
+        """Encode texts, looking up and storing vectors in the embedding cache"""
+        hashes = [content_hash(text) for text in texts]
+        vectors = self.embedding_cache.get_embeddings(self.model_name, hashes)
+
+        # Encode each distinct missing text once
+        missing = {}
+        for digest, text in zip(hashes, texts):
+            if digest not in vectors:
+                missing.setdefault(digest, text)
+        metrics.inc('embedding_cache_hits', len(texts) - len(missing))
+        metrics.inc('embedding_cache_misses', len(missing))
+        if missing:
+            encoded = self._encode(list(missing.values()), batch_size)
+            self.embedding_cache.save_embeddings(self.model_name, list(missing), encoded)
+            vectors.update(zip(missing, encoded))
+
+        return np.vstack([vectors[digest] for digest in hashes])
+
+    def fit_tfidf(self, documents):
+        """Return a TF-IDF engine fitted on documents (max_features terms)
+
+        Fit once on the corpus being searched (e.g. every job's
+        processed_content) and pass it as tfidf= to the similarity methods.
+        The processor keeps no fitted state.
+        """
+        return TfidfEngine(self.max_features).fit(documents)
+
+    def _tfidf_engine(self, texts, tfidf=None):
+        """The given TF-IDF engine, else term frequencies over texts alone
+
+        Unweighted term frequencies make ad-hoc scores independent of which
+        other texts are in the call.
+        """
+        if tfidf is not None:
+            return tfidf
+        return TfidfEngine(max_features=None, use_idf=False).fit(texts)
+
+    def similarity_matrix(self, texts1, texts2, batch_size=None, tfidf=None):
+        """Calculate the full cosine similarity matrix between two lists of texts
+
+        Every text is encoded exactly once, so scoring N resumes against M jobs
+        costs N + M model passes instead of 2 * N * M. Without a model, tfidf
+        is the engine from fit_tfidf to score with.
+        """
+        texts1 = [text if isinstance(text, str) else "" for text in texts1]
+        texts2 = [text if isinstance(text, str) else "" for text in texts2]
+
+        if self.model is None:
+            engine = self._tfidf_engine(texts1 + texts2, tfidf)
+            return engine.similarity_matrix(engine.transform(texts1), engine.transform(texts2))
+
+        left = self.encode_normalized(texts1, batch_size=batch_size)
+        right = self.encode_normalized(texts2, batch_size=batch_size)
+        return cosine_similarity_matrix(left, right, normalized=True)
+
+    def iter_similarity_blocks(self, texts1, texts2, block_size, batch_size=None, tfidf=None):
+        """Yield (start, block) slices of similarity_matrix(texts1, texts2, tfidf=tfidf)
+
+        texts2 is encoded once up front; texts1 is encoded one block at a time,
+        so memory is bounded by block_size x len(texts2).
+        """
+        texts1 = [text if isinstance(text, str) else "" for text in texts1]
+        texts2 = [text if isinstance(text, str) else "" for text in texts2]
+
+        if self.model is None:
+            engine = self._tfidf_engine(texts1 + texts2, tfidf)
+            right = engine.transform(texts2)
+            for start in range(0, len(texts1), block_size):
+                left = engine.transform(texts1[start:start + block_size])
+                with metrics.timer('stage', stage='score'):
+                    block = engine.similarity_matrix(left, right)
+                yield start, block
+            return
+
+        right = self.encode_normalized(texts2, batch_size=batch_size)
+        for start in range(0, len(texts1), block_size):
+            left = self.encode_normalized(texts1[start:start + block_size],
+                                          batch_size=batch_size)
+            with metrics.timer('stage', stage='score'):
+                block = cosine_similarity_matrix(left, right, normalized=True)
+            yield start, block
+
     def calculate_similarity(self, text1, text2):
         """Calculate cosine similarity between two texts"""
-        if self.model is None:
-            # Return mock similarity for CI/CD
-            # Use simple text overlap as fallback
-            words1 = set(text1.lower().split())
-            words2 = set(text2.lower().split())
-            if not words1 or not words2:
-                return 0.0
-            intersection = len(words1.intersection(words2))
-            union = len(words1.union(words2))
-            return float(intersection / union) if union > 0 else 0.0
-        
-        embeddings = self.get_embeddings([text1, text2])
-        
-        similarity = np.dot(embeddings[0], embeddings[1]) / (
-            np.linalg.norm(embeddings[0]) * np.linalg.norm(embeddings[1])
-        )
-        
-        return float(similarity)
\ No newline at end of file
+        return float(self.similarity_matrix([text1], [text2])[0, 0])
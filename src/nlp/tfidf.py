@@ -0,0 +1,68 @@
+import numpy as np
+
+# Every run of word characters is a term, matching the whitespace-joined
+# output of TextProcessor.preprocess_text
+TOKEN_PATTERN = r'(?u)\b\w+\b'
+
+
+class TfidfEngine:
+    """Sparse TF-IDF vectors and cosine similarity without a neural model
+
+    fit() learns the vocabulary (capped at max_features terms) and IDF weights
+    from a corpus once; transform() turns texts into L2-normalized sparse rows,
+    so all-pairs cosine similarity is a single sparse matrix product. With
+    use_idf=False every term weighs the same, which makes scores independent
+    of the corpus the vocabulary was built from.
+    """
+
+    def __init__(self, max_features=1000, use_idf=True):
+        self.max_features = max_features
+        self.use_idf = use_idf
+        self.vectorizer = None
+
+    @property
+    def dim(self):
+        return len(self.vectorizer.vocabulary_) if self.vectorizer is not None else 0
+
+    def fit(self, documents):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        documents = [text if isinstance(text, str) else "" for text in documents]
+        vectorizer = TfidfVectorizer(token_pattern=TOKEN_PATTERN,
+                                     max_features=self.max_features,
+                                     use_idf=self.use_idf, dtype=np.float32)
+        try:
+            vectorizer.fit(documents)
+            self.vectorizer = vectorizer
+        except ValueError:
+            # Empty vocabulary: every document scores 0
+            self.vectorizer = None
+        return self
+
+    def transform(self, texts):
+        """L2-normalized sparse CSR rows for texts (terms outside the vocabulary are dropped)"""
+        from scipy import sparse
+
+        texts = [text if isinstance(text, str) else "" for text in texts]
+        if self.vectorizer is None:
+            return sparse.csr_matrix((len(texts), 0), dtype=np.float32)
+        return self.vectorizer.transform(texts).astype(np.float32)
+
+    def similarity_matrix(self, left, right):
+        """All-pairs cosine similarity between two sets of sparse rows, as a dense array"""
+        if left.shape[1] == 0:
+            return np.zeros((left.shape[0], right.shape[0]), dtype=np.float32)
+        return np.asarray((left @ right.T).toarray(), dtype=np.float32)
+
+
+def hashed_term_frequencies(texts, n_features):
+    """Dense, L2-normalized term frequencies hashed into n_features columns
+
+    Needs no fitting, so every call returns vectors of the same width.
+    """
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    texts = [text if isinstance(text, str) else "" for text in texts]
+    vectorizer = HashingVectorizer(token_pattern=TOKEN_PATTERN, n_features=n_features,
+                                   alternate_sign=False, dtype=np.float32)
+    return vectorizer.transform(texts).toarray()
@@ -0,0 +1,193 @@
+import os
+import numpy as np
+import logging
+
+from src.nlp.similarity import normalize_rows
+
+logger = logging.getLogger(__name__)
+
+
+class IVFIndex:
+    """Inverted-file (IVF) index for approximate cosine nearest-neighbour search
+
+    Vectors are L2-normalized and clustered with spherical k-means. A query only
+    scans the n_probe lists whose centroids are closest to it, so raising
+    n_probe trades latency for recall (n_probe == n_lists is an exact search).
+    Each stored id carries a content hash so the index can be synced
+    incrementally against the job table.
+    """
+
+    def __init__(self, n_lists=0, n_probe=8, seed=0):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.seed = seed
+        self.model_name = None
+        self.centroids = None
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.hashes = np.zeros(0, dtype=object)
+        self.vectors = None
+        self.assignments = np.zeros(0, dtype=np.int64)
+        self.added_since_build = 0
+        self._lists = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def is_built(self):
+        return self.centroids is not None
+
+    def build(self, ids, vectors, hashes=None, n_iter=10):
+        """Cluster vectors with k-means and (re)build every inverted list"""
+        if len(vectors) == 0:
+            raise ValueError("Cannot build an index without vectors")
+        vectors = normalize_rows(vectors)
+        n_lists = min(self.n_lists or int(np.sqrt(len(vectors))), len(vectors))
+        n_lists = max(n_lists, 1)
+
+        self.centroids = self._kmeans(vectors, n_lists, n_iter)
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.hashes = np.asarray(hashes if hashes is not None else [''] * len(ids),
+                                 dtype=object)
+        self.vectors = vectors
+        self.assignments = self._assign(vectors)
+        self.added_since_build = 0
+        self._lists = None
+        logger.info(f"Built IVF index with {len(self.ids)} vectors in {n_lists} lists")
+
+    def add(self, ids, vectors, hashes=None):
+        """Insert or replace vectors, assigning them to the existing centroids"""
+        ids = np.asarray(ids, dtype=np.int64)
+        if not self.is_built:
+            self.build(ids, vectors, hashes)
+            return
+        if len(ids) == 0:
+            return
+
+        self.remove(ids)
+        vectors = normalize_rows(vectors)
+        hashes = hashes if hashes is not None else [''] * len(ids)
+        self.ids = np.concatenate([self.ids, ids])
+        self.hashes = np.concatenate([self.hashes, np.asarray(hashes, dtype=object)])
+        self.vectors = np.vstack([self.vectors, vectors])
+        self.assignments = np.concatenate([self.assignments, self._assign(vectors)])
+        self.added_since_build += len(ids)
+        self._lists = None
+
+    def remove(self, ids):
+        """Remove vectors by id (unknown ids are ignored)"""
+        keep = ~np.isin(self.ids, np.asarray(ids, dtype=np.int64))
+        if keep.all():
+            return
+        self.ids = self.ids[keep]
+        self.hashes = self.hashes[keep]
+        self.vectors = self.vectors[keep]
+        self.assignments = self.assignments[keep]
+        self._lists = None
+
+    def needs_rebuild(self, max_added_ratio=0.5):
+        """Whether enough vectors were added after clustering to warrant a rebuild"""
+        return self.added_since_build > max_added_ratio * max(len(self.ids), 1)
+
+    def search(self, queries, k, n_probe=None):
+        """Return (ids, scores) arrays of shape (len(queries), k)
+
+        Rows with fewer than k candidates are padded with id -1 and score -inf.
+        """
+        queries = normalize_rows(queries)
+        n_probe = min(n_probe or self.n_probe, len(self.centroids))
+        lists = self._inverted_lists()
+
+        result_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        result_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+
+        centroid_scores = queries @ self.centroids.T
+        probes = np.argpartition(-centroid_scores, n_probe - 1, axis=1)[:, :n_probe]
+
+        for q, query in enumerate(queries):
+            rows = np.concatenate([lists[c] for c in probes[q]])
+            if len(rows) == 0:
+                continue
+            scores = self.vectors[rows] @ query
+            top = min(k, len(rows))
+            best = np.argpartition(-scores, top - 1)[:top]
+            best = best[np.argsort(-scores[best], kind='stable')]
+            result_ids[q, :top] = self.ids[rows[best]]
+            result_scores[q, :top] = scores[best]
+
+        return result_ids, result_scores
+
+    def save(self, path):
+        """Persist the index as an .npz file (written atomically)"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp.npz'
+        np.savez(
+            tmp_path,
+            centroids=self.centroids,
+            ids=self.ids,
+            hashes=self.hashes.astype(str),
+            vectors=self.vectors,
+            assignments=self.assignments,
+            meta=np.array([self.n_lists, self.n_probe, self.seed, self.added_since_build]),
+            model_name=np.array(self.model_name or '')
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Load an index written by save()"""
+        with np.load(path, allow_pickle=False) as data:
+            n_lists, n_probe, seed, added_since_build = (int(v) for v in data['meta'])
+            index = cls(n_lists=n_lists, n_probe=n_probe, seed=seed)
+            index.centroids = data['centroids']
+            index.ids = data['ids']
+            index.hashes = data['hashes'].astype(object)
+            index.vectors = data['vectors']
+            index.assignments = data['assignments']
+            index.added_since_build = added_since_build
+            index.model_name = str(data['model_name']) or None
+        return index
+
+    def _assign(self, vectors):
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int64)
+
+    def _inverted_lists(self):
+        if self._lists is None:
+            order = np.argsort(self.assignments, kind='stable')
+            bounds = np.searchsorted(self.assignments[order],
+                                     np.arange(len(self.centroids) + 1))
+            self._lists = [order[bounds[c]:bounds[c + 1]]
+                           for c in range(len(self.centroids))]
+        return self._lists
+
+    def _kmeans(self, vectors, n_lists, n_iter):
+        """Spherical k-means on a bounded training sample"""
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(len(vectors), 256 * n_lists)
+        sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+
+        for _ in range(n_iter):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = np.bincount(labels, minlength=n_lists) == 0
+            # Re-seed empty clusters with random sample points
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            centroids = normalize_rows(sums)
+
+        return centroids
+
+
+def recall_at_k(exact_ids, approx_ids):
+    """Mean fraction of the exact top-k ids that the approximate search returned"""
+    exact_ids = np.asarray(exact_ids)
+    approx_ids = np.asarray(approx_ids)
+    if exact_ids.size == 0:
+        return 1.0
+    hits = [
+        len(set(exact_row[exact_row >= 0]) & set(approx_row[approx_row >= 0]))
+        / max(int((exact_row >= 0).sum()), 1)
+        for exact_row, approx_row in zip(exact_ids, approx_ids)
+    ]
+    return float(np.mean(hits))
@@ -0,0 +1,134 @@
+import os
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+DTYPES = ('float32', 'float16', 'int8')
+
+
+def quantize(vectors, dtype):
+    """Return (matrix, scales) for normalized float32 vectors
+
+    int8 rows are scaled per vector so their largest component maps to 127;
+    scales is None for float types.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == 'int8':
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        matrix = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return matrix, scales.astype(np.float32)
+    return vectors.astype(dtype), None
+
+
+class EmbeddingStore:
+    """Job embeddings in a compact, memory-mapped matrix file
+
+    The matrix is a plain .npy file (float32, float16 or per-vector scaled
+    int8) opened with mmap_mode='r', so only the pages being scored are read
+    and a cold start costs no parsing. A sidecar .meta.npz maps each row back
+    to its job_descriptions.id and content hash.
+    """
+
+    def __init__(self, path, dtype='float16', chunk_rows=65536):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unsupported embedding dtype: {dtype}")
+        self.path = path
+        self.dtype = dtype
+        self.chunk_rows = chunk_rows
+        self.model_name = None
+        self.matrix = None
+        self.scales = None
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.hashes = np.zeros(0, dtype=object)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def meta_path(self):
+        return self.path + '.meta.npz'
+
+    @property
+    def nbytes(self):
+        """Size of the matrix (plus int8 scales) in bytes"""
+        if self.matrix is None:
+            return 0
+        return self.matrix.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def load(self):
+        """Open the stored matrix; returns False when it is missing or unusable"""
+        if not (os.path.exists(self.path) and os.path.exists(self.meta_path)):
+            return False
+        with np.load(self.meta_path, allow_pickle=False) as meta:
+            ids = meta['ids']
+            hashes = meta['hashes'].astype(object)
+            scales = meta['scales'] if 'scales' in meta else None
+            dtype = str(meta['dtype'])
+            model_name = str(meta['model_name']) or None
+        matrix = np.load(self.path, mmap_mode='r')
+        if dtype != self.dtype or len(matrix) != len(ids):
+            return False
+
+        self.matrix, self.scales = matrix, scales
+        self.ids, self.hashes, self.model_name = ids, hashes, model_name
+        return True
+
+    def is_current(self, ids, hashes, model_name):
+        """Whether the stored rows are exactly these jobs, in this order"""
+        return (self.matrix is not None and self.model_name == model_name
+                and np.array_equal(self.ids, np.asarray(ids, dtype=np.int64))
+                and list(self.hashes) == list(hashes))
+
+    def build(self, ids, hashes, texts, encode, model_name=None):
+        """Write a new matrix, encoding texts chunk_rows at a time
+
+        encode(texts) must return L2-normalized float32 vectors. Both files
+        are written to temporary paths and swapped in when complete.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) == 0:
+            raise ValueError("Cannot build an embedding store without jobs")
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.matrix = None  # release the old mapping before replacing its file
+
+        tmp_path = self.path + '.tmp.npy'
+        matrix = None
+        scales = np.ones(len(ids), dtype=np.float32)
+        for start in range(0, len(ids), self.chunk_rows):
+            vectors = encode(texts[start:start + self.chunk_rows])
+            if matrix is None:
+                matrix = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=self.dtype,
+                                                   shape=(len(ids), vectors.shape[1]))
+            block, block_scales = quantize(vectors, self.dtype)
+            matrix[start:start + len(block)] = block
+            if block_scales is not None:
+                scales[start:start + len(block)] = block_scales
+        matrix.flush()
+        del matrix
+
+        tmp_meta = self.meta_path + '.tmp.npz'
+        extra = {'scales': scales} if self.dtype == 'int8' else {}
+        np.savez(tmp_meta, ids=ids, hashes=np.asarray(hashes).astype(str),
+                 dtype=np.array(self.dtype), model_name=np.array(model_name or ''), **extra)
+        os.replace(tmp_path, self.path)
+        os.replace(tmp_meta, self.meta_path)
+        logger.info(f"Wrote {len(ids)} {self.dtype} job embeddings to {self.path}")
+        return self.load()
+
+    def similarity(self, queries):
+        """Cosine similarity of normalized float32 queries to every stored row
+
+        Rows are dequantized chunk_rows at a time, so memory stays bounded by
+        one chunk plus the len(queries) x len(self) result.
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        scores = np.empty((len(queries), len(self)), dtype=np.float32)
+        for start in range(0, len(self), self.chunk_rows):
+            end = start + self.chunk_rows
+            block = np.asarray(self.matrix[start:end], dtype=np.float32)
+            scores[:, start:end] = queries @ block.T
+            if self.scales is not None:
+                scores[:, start:end] *= self.scales[start:end]
+        return scores
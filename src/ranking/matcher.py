@@ -1,17 +1,70 @@
+import os
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
 from src.utils.database import DatabaseManager
 from src.nlp.text_processor import TextProcessor
+from src.nlp.skill_vocabulary import SkillVocabulary, parse_skills, skills_similarity_matrix
+from src.ranking.ann_index import IVFIndex, recall_at_k
+from src.ranking.embedding_store import EmbeddingStore
+from src.ranking.sharded import MatchingCancelled, SharedArrays, run_shards
+from src.ranking.topk import RunningTopK, top_k_indices
+from src.utils.config import config
+from src.utils.hashing import content_hash
+from src.utils.metrics import metrics
 import logging
 
 logger = logging.getLogger(__name__)
 
+CONTENT_WEIGHT = 0.7
+SKILLS_WEIGHT = 0.3
+# Shards per worker process; more shards give finer progress and load balancing
+SHARDS_PER_WORKER = 4
+
 class ResumeJobMatcher:
-    def __init__(self):
-        self.db = DatabaseManager()
-        self.text_processor = TextProcessor()
+    def __init__(self, db=None, use_daemon=True):
+        self.db = db if db is not None else DatabaseManager()
+        self.model_name = config.get('nlp.model', 'all-MiniLM-L6-v2')
+        self.text_processor = TextProcessor(
+            self.model_name, embedding_cache=self.db,
+            skills_taxonomy=config.get('nlp.skills_taxonomy'),
+            daemon_socket=config.get('service.socket_path') if use_daemon else None,
+            backend=config.get('nlp.backend', 'transformer'),
+            max_features=config.get('nlp.max_features', 1000),
+            max_batch_tokens=config.get('nlp.max_batch_tokens', 8192),
+            max_batch_size=config.get('nlp.max_batch_size', 64)
+        )
+        self.use_embedding_store = config.get('ranking.embedding_store.enabled', False)
+        self.match_cache_size = config.get('ranking.match_cache_size', 1024)
+        self._match_cache = OrderedDict()
+        self._match_cache_generation = None
+        self._job_corpus = None
     
-    def calculate_matches(self, top_k=5):
-        """Calculate similarity scores between all resumes and jobs"""
+    def calculate_matches(self, top_k=5, use_index=None, n_probe=None, block_size=None,
+                          incremental=False, job_top_k=None, num_workers=None,
+                          progress=None, cancel=None):
+        """Calculate similarity scores between all resumes and jobs
+
+        Resumes are scored in blocks of block_size (default:
+        processing.batch_size) and only the top K rows per resume are kept, so
+        memory stays flat as the job corpus grows. With use_index (default:
+        ranking.ann.enabled) each resume only re-scores the candidate jobs
+        returned by the ANN job index. With incremental, only resumes queued
+        by the ETL pipeline are re-scored and only their match rows replaced.
+        
+        The same pass also keeps the top job_top_k (default: ranking.job_top_k,
+        else top_k) resumes per job, stored in job_matches for
+        get_top_candidates_for_job. Incremental runs merge the re-scored
+        resumes into the stored per-job lists; a job whose list loses a
+        re-scored or deleted resume is re-scored against every resume, so the
+        lists equal those of a full run.
+        
+        Exact scoring runs in num_workers (default: processing.num_workers)
+        processes when there is more than one block of resumes; the results
+        are identical to a single-process run. progress(done, total) is
+        called as resumes are scored, and setting cancel (e.g. a
+        threading.Event) stops the run with MatchingCancelled.
+        """
         logger.info("Calculating resume-job matches...")
         
         # Get data from database
@@ -22,106 +75,719 @@ class ResumeJobMatcher:
             logger.warning("No resumes or jobs found in database")
             return pd.DataFrame()
         
-        matches = []
+        job_top_k = config.get('ranking.job_top_k', top_k) if job_top_k is None else job_top_k
+        all_resume_ids = resumes_df['id']
+        resume_ids = None
+        if incremental and self.db.has_matches():
+            resume_ids = self.db.get_pending_matches()
+            resumes_df = resumes_df[resumes_df['id'].isin(resume_ids)].reset_index(drop=True)
+            logger.info(f"Re-scoring {len(resumes_df)} pending resumes")
+            if resumes_df.empty:
+                # Per-job lists cut short by deleted resumes still need refilling
+                if job_top_k:
+                    none = self._build_job_matches_frame(
+                        resumes_df, jobs_df, self._job_selection(RunningTopK(job_top_k)))
+                    job_matches_df, job_ids = self._merge_job_matches(
+                        none, [], all_resume_ids, jobs_df, job_top_k, block_size)
+                    if len(job_ids):
+                        self._save_job_matches(job_matches_df)
+                return pd.DataFrame()
         
-        # Calculate similarities
-        for _, resume in resumes_df.iterrows():
-            resume_scores = []
-            
-            for _, job in jobs_df.iterrows():
-                # Content similarity
-                content_similarity = self.text_processor.calculate_similarity(
-                    resume['processed_content'],
-                    job['processed_content']
-                )
-                
-                # Skills similarity
-                skills_similarity = self._calculate_skills_similarity(
-                    resume['skills'],
-                    job['required_skills']
-                )
+        # Vectors from a previously configured model can never be hit again
+        self.db.purge_embeddings(keep_model=self.model_name)
+        batch_stats = self.text_processor.batch_stats.copy()
+        
+        if use_index is None:
+            use_index = config.get('ranking.ann.enabled', False)
+        if use_index and self.text_processor.model is None:
+            logger.warning("ANN index needs a sentence-transformer model; "
+                           "falling back to exact scoring")
+            use_index = False
+        
+        if num_workers is None:
+            num_workers = config.get('processing.num_workers', 1)
+        if use_index:
+            selected, job_selected = self._select_matches_ann(resumes_df, jobs_df, top_k,
+                                                              n_probe, job_top_k)
+        else:
+            selected, job_selected = self._select_matches_exact(
+                resumes_df, jobs_df, top_k, block_size, job_top_k,
+                num_workers=num_workers, progress=progress, cancel=cancel)
+        
+        matches_df = self._build_matches_frame(resumes_df, jobs_df, selected)
+        job_matches_df = self._build_job_matches_frame(resumes_df, jobs_df, job_selected)
+        if resume_ids is not None and job_top_k:
+            job_matches_df, _ = self._merge_job_matches(job_matches_df, resumes_df['id'],
+                                                        all_resume_ids, jobs_df, job_top_k,
+                                                        block_size)
+        
+        # Save to database
+        with metrics.timer('stage', stage='save'):
+            saved = self._save_matches(matches_df, resumes_df['id'].tolist(),
+                                       prune=resume_ids is None)
+            if saved and job_top_k:
+                saved = self._save_job_matches(job_matches_df)
+        metrics.inc('documents', len(resumes_df), stage='save')
+        # Keep the queue after a failed save so the next incremental run retries it
+        if saved:
+            self.db.clear_pending_matches(resume_ids)
+        
+        stats = self.text_processor.embedding_stats(since=batch_stats)
+        if stats['batches']:
+            logger.info(f"Encoded {stats['texts']} texts in {stats['batches']} batches: "
+                        f"{stats['tokens_per_sec'] or 0:.0f} tokens/sec, "
+                        f"{stats['padding_ratio']:.1%} padding")
+        
+        return matches_df
+    
+    def match_text(self, content, top_k=5, filename=None):
+        """Score one raw resume text against every job without storing anything
+
+        Job vectors and skill bits are built once and kept in memory until the
+        job table changes, so each call only encodes the one resume.
+        """
+        processed = self.text_processor.preprocess_text(content)
+        skills = ', '.join(self.text_processor.extract_skills(content))
+        corpus = self.job_corpus()
+        jobs_df = corpus['jobs']
+        if jobs_df.empty:
+            return pd.DataFrame()
+        
+        if corpus['tfidf'] is not None:
+            engine = corpus['tfidf']
+            content_scores = engine.similarity_matrix(engine.transform([processed]),
+                                                      corpus['vectors'])[0]
+        elif corpus['store'] is not None:
+            vector = self.text_processor.encode_normalized([processed])
+            content_scores = corpus['store'].similarity(vector)[0]
+        else:
+            vector = self.text_processor.encode_normalized([processed])[0]
+            content_scores = corpus['vectors'] @ vector
+        
+        # Jaccard against the cached job bits; resume skills no job lists
+        # only enlarge the union
+        resume_skills = parse_skills(skills)
+        columns = [corpus['vocabulary'].index[skill] for skill in resume_skills
+                   if skill in corpus['vocabulary'].index]
+        intersection = corpus['skill_bits'][:, columns].sum(axis=1, dtype=np.float32)
+        union = corpus['skill_counts'] + np.float32(len(resume_skills)) - intersection
+        skills_scores = np.zeros(len(jobs_df), dtype=np.float32)
+        np.divide(intersection, union, out=skills_scores,
+                  where=(corpus['skill_counts'] > 0) & (len(resume_skills) > 0) & (union > 0))
+        
+        combined = CONTENT_WEIGHT * content_scores + SKILLS_WEIGHT * skills_scores
+        scores = {'content': content_scores[None, :], 'skills': skills_scores[None, :],
+                  'combined': combined[None, :]}
+        selected = self._selection(0, top_k_indices(scores['combined'], top_k), scores)
+        
+        resume_df = pd.DataFrame([{'id': None, 'filename': filename}])
+        return self._build_matches_frame(resume_df, jobs_df, selected)
+    
+    def match_file(self, file_path, top_k=5):
+        """Parse one uploaded resume file and return its top-k jobs
+
+        Nothing is written to the database; other resumes' matches are
+        untouched.
+        """
+        from src.data_fetchers.resume_parser import ResumeParser
+        
+        parser = ResumeParser(os.path.dirname(os.path.abspath(file_path)))
+        resume = parser.parse_resume(file_path)
+        if resume is None:
+            raise ValueError(f"Unsupported resume file: {file_path}")
+        return self.match_text(resume['content'], top_k=top_k, filename=resume['filename'])
+    
+    def job_corpus(self):
+        """Jobs with their normalized vectors and skill bits, cached in memory
+
+        Rebuilt when the database's matches generation moves, which happens
+        whenever job rows change. Vectors come from the embedding cache, so a
+        rebuild only encodes jobs that were never encoded before. Without a
+        model, vectors are sparse TF-IDF rows and 'tfidf' holds the engine
+        fitted on the jobs. With the embedding store enabled, 'store' is the
+        memory-mapped job matrix and no vectors are held in memory.
+        """
+        generation = self.db.get_matches_generation()
+        if self._job_corpus is not None and self._job_corpus['generation'] == generation:
+            return self._job_corpus
+        
+        jobs_df = self.db.get_jobs()
+        vectors = tfidf = store = None
+        if not jobs_df.empty:
+            job_texts = jobs_df['processed_content'].fillna('').tolist()
+            if self._use_embedding_store():
+                store = self.sync_embedding_store(jobs_df)
+            elif self.text_processor.model is not None:
+                vectors = self.text_processor.encode_normalized(job_texts)
+            else:
+                tfidf = self.text_processor.fit_tfidf(job_texts)
+                vectors = tfidf.transform(job_texts)
+        vocabulary = SkillVocabulary().fit(jobs_df['required_skills'])
+        skill_bits = vocabulary.encode(jobs_df['required_skills'])
+        
+        self._job_corpus = {
+            'generation': generation,
+            'jobs': jobs_df,
+            'vectors': vectors,
+            'tfidf': tfidf,
+            'store': store,
+            'vocabulary': vocabulary,
+            'skill_bits': skill_bits,
+            'skill_counts': skill_bits.sum(axis=1, dtype=np.float32)
+        }
+        return self._job_corpus
+    
+    def iter_score_blocks(self, resumes_df, jobs_df, block_size=None):
+        """Yield (start, scores) for consecutive blocks of resumes
+
+        scores is a dict of block_size x M arrays: 'content', 'skills' and
+        'combined'. Job texts are encoded once for the whole run; without a
+        model the TF-IDF vocabulary is fitted on the job texts first.
+        """
+        block_size = block_size or config.get('processing.batch_size', 100)
+        if self._use_embedding_store():
+            content_blocks = self._iter_store_blocks(resumes_df, jobs_df, block_size)
+        else:
+            tfidf = None
+            if self.text_processor.model is None:
+                tfidf = self.text_processor.fit_tfidf(
+                    jobs_df['processed_content'].fillna('').tolist())
+            content_blocks = self.text_processor.iter_similarity_blocks(
+                resumes_df['processed_content'].tolist(),
+                jobs_df['processed_content'].tolist(),
+                block_size, tfidf=tfidf
+            )
+        return self._iter_combined_blocks(content_blocks, resumes_df, jobs_df, block_size)
+    
+    def _iter_combined_blocks(self, content_blocks, resumes_df, jobs_df, block_size):
+        """Add skills and combined scores to (start, content) resume blocks"""
+        vocabulary, job_skills = self._job_skill_bits(resumes_df, jobs_df)
+        
+        for start, content in content_blocks:
+            block = resumes_df.iloc[start:start + block_size]
+            with metrics.timer('stage', stage='score'):
+                skills = skills_similarity_matrix(vocabulary.encode(block['skills']),
+                                                  job_skills)
                 
                 # Combined score (weighted)
-                combined_score = (0.7 * content_similarity + 0.3 * skills_similarity)
-                
-                resume_scores.append({
-                    'resume_id': resume['id'],
-                    'resume_filename': resume['filename'],
-                    'job_id': job['id'],
-                    'job_title': job['title'],
-                    'company': job['company'],
-                    'content_similarity': content_similarity,
-                    'skills_similarity': skills_similarity,
-                    'combined_score': combined_score
-                })
+                combined = CONTENT_WEIGHT * content + SKILLS_WEIGHT * skills
             
-            # Sort jobs by score for this resume
-            resume_scores = sorted(resume_scores, key=lambda x: x['combined_score'], reverse=True)
+            yield start, {'content': content, 'skills': skills, 'combined': combined}
+    
+    def _iter_store_blocks(self, resumes_df, jobs_df, block_size):
+        """Content scores of resume blocks against the memory-mapped job matrix"""
+        store = self.sync_embedding_store(jobs_df)
+        texts = resumes_df['processed_content'].fillna('').tolist()
+        for start in range(0, len(texts), block_size):
+            queries = self.text_processor.encode_normalized(texts[start:start + block_size])
+            with metrics.timer('stage', stage='score'):
+                content = store.similarity(queries)
+            yield start, content
+    
+    def _job_skill_bits(self, resumes_df, jobs_df):
+        """Build the skill vocabulary and encode every job's skills once"""
+        vocabulary = SkillVocabulary().fit(jobs_df['required_skills'])
+        vocabulary.fit(resumes_df['skills'])
+        return vocabulary, vocabulary.encode(jobs_df['required_skills'])
+    
+    def score_matrix(self, resumes_df, jobs_df):
+        """Score every resume against every job in one pass
+
+        Returns a dict of N x M arrays: 'content', 'skills' and 'combined'.
+        """
+        _, scores = next(self.iter_score_blocks(resumes_df, jobs_df,
+                                                block_size=max(len(resumes_df), 1)))
+        return scores
+    
+    def _select_matches_exact(self, resumes_df, jobs_df, top_k, block_size=None,
+                              job_top_k=0, num_workers=1, progress=None, cancel=None):
+        """Score resumes block by block, keeping the top K jobs per resume and
+        the top job_top_k resumes per job from the same score blocks"""
+        block_size = block_size or config.get('processing.batch_size', 100)
+        if num_workers > 1 and len(resumes_df) > block_size:
+            return self._select_matches_sharded(resumes_df, jobs_df, top_k, block_size,
+                                                job_top_k, num_workers, progress, cancel)
+        
+        selected = []
+        per_job = RunningTopK(job_top_k)
+        blocks = self.iter_score_blocks(resumes_df, jobs_df, block_size)
+        while True:
+            if cancel is not None and cancel.is_set():
+                raise MatchingCancelled("Matching cancelled")
+            block = next(blocks, None)
+            if block is None:
+                break
+            start, scores = block
+            metrics.inc('documents', len(scores['combined']), stage='score')
             
-            # Add rank and take top K
-            for rank, match in enumerate(resume_scores[:top_k], 1):
-                match['rank'] = rank
-                matches.append(match)
+            with metrics.timer('stage', stage='top_k'):
+                job_rows = top_k_indices(scores['combined'], top_k)
+                selected.append(self._selection(start, job_rows, scores))
+                if job_top_k:
+                    per_job.update(start, scores['combined'], content=scores['content'],
+                                   skills=scores['skills'])
+            metrics.inc('documents', len(scores['combined']), stage='top_k')
+            if progress is not None:
+                progress(start + len(scores['combined']), len(resumes_df))
         
-        matches_df = pd.DataFrame(matches)
+        return self._concat_selections(selected), self._job_selection(per_job)
+    
+    def _select_matches_sharded(self, resumes_df, jobs_df, top_k, block_size, job_top_k,
+                                num_workers, progress=None, cancel=None):
+        """Score shards of resumes in worker processes and merge them in shard order
+
+        Job and resume matrices are copied into shared memory once. Shards
+        are runs of whole blocks of block_size resumes, scored exactly like the
+        single-process loop, so the merged results are identical to it.
+        """
+        arrays, options = self._shared_score_inputs(resumes_df, jobs_df, block_size)
+        starts = np.arange(0, len(resumes_df), block_size)
+        n_shards = min(len(starts), num_workers * SHARDS_PER_WORKER)
+        tasks = []
+        for shard, shard_starts in enumerate(np.array_split(starts, n_shards)):
+            end = min(int(shard_starts[-1]) + block_size, len(resumes_df))
+            tasks.append(dict(options, shard=shard, starts=shard_starts.tolist(),
+                              n_rows=end - int(shard_starts[0]), block_size=block_size,
+                              n_resumes=len(resumes_df), top_k=top_k, job_top_k=job_top_k))
         
-        # Save to database
-        self._save_matches(matches_df)
+        shared = SharedArrays(arrays)
+        try:
+            with metrics.timer('stage', stage='score'):
+                results = run_shards(shared.spec, tasks, min(num_workers, n_shards),
+                                     progress=progress, cancel=cancel)
+        finally:
+            shared.close()
+        metrics.inc('documents', len(resumes_df), stage='score')
         
-        return matches_df
+        selected = []
+        per_job = RunningTopK(job_top_k)
+        for shard_selected, shard_per_job in results:
+            selected.extend(shard_selected)
+            per_job.merge(shard_per_job)
+        return self._concat_selections(selected), self._job_selection(per_job)
     
-    def _calculate_skills_similarity(self, resume_skills, job_skills):
-        """Calculate similarity between skill sets"""
-        if not resume_skills or not job_skills:
-            return 0.0
+    def _shared_score_inputs(self, resumes_df, jobs_df, block_size):
+        """Arrays for the sharded workers, plus how they compute content scores
+
+        Everything is prepared as iter_score_blocks prepares it (resume
+        vectors are encoded block by block), so workers see identical inputs.
+        """
+        vocabulary, job_skills = self._job_skill_bits(resumes_df, jobs_df)
+        arrays = {'resume_skills': vocabulary.encode(resumes_df['skills']),
+                  'job_skills': job_skills}
+        resume_texts = resumes_df['processed_content'].fillna('').tolist()
+        job_texts = jobs_df['processed_content'].fillna('').tolist()
+        
+        if self._use_embedding_store():
+            store = self.sync_embedding_store(jobs_df)
+            arrays['resume_vectors'] = self._encode_blocks(resume_texts, block_size)
+            return arrays, {'content': 'store',
+                            'store': (store.path, store.dtype, store.chunk_rows)}
         
-        resume_skills_set = set(skill.strip().lower() for skill in resume_skills.split(',') if skill.strip())
-        job_skills_set = set(skill.strip().lower() for skill in job_skills.split(',') if skill.strip())
+        if self.text_processor.model is None:
+            engine = self.text_processor.fit_tfidf(job_texts)
+            resumes, jobs = engine.transform(resume_texts), engine.transform(job_texts)
+            for prefix, matrix in (('resume', resumes), ('job', jobs)):
+                arrays[f'{prefix}_data'] = matrix.data
+                arrays[f'{prefix}_indices'] = matrix.indices
+                arrays[f'{prefix}_indptr'] = matrix.indptr
+            return arrays, {'content': 'sparse', 'resume_shape': resumes.shape,
+                            'job_shape': jobs.shape}
         
-        if not resume_skills_set or not job_skills_set:
-            return 0.0
+        arrays['resume_vectors'] = self._encode_blocks(resume_texts, block_size)
+        arrays['job_vectors'] = self.text_processor.encode_normalized(job_texts)
+        return arrays, {'content': 'dense'}
+    
+    def _encode_blocks(self, texts, block_size):
+        """Normalized vectors for texts, encoded block_size at a time like iter_score_blocks"""
+        return np.vstack([self.text_processor.encode_normalized(texts[start:start + block_size])
+                          for start in range(0, len(texts), block_size)])
+    
+    def _job_selection(self, per_job):
+        """Flatten a RunningTopK over jobs into the same layout as _selection"""
+        if per_job.scores is None:
+            empty = np.zeros(0)
+            return {'resume_rows': empty.astype(np.int64), 'job_rows': empty.astype(np.int64),
+                    'content': empty, 'skills': empty, 'combined': empty,
+                    'rank': empty.astype(np.int64)}
+        n_jobs, k = per_job.scores.shape
+        return {
+            'resume_rows': per_job.rows.ravel(),
+            'job_rows': np.repeat(np.arange(n_jobs), k),
+            'content': per_job.values['content'].ravel(),
+            'skills': per_job.values['skills'].ravel(),
+            'combined': per_job.scores.ravel(),
+            'rank': np.tile(np.arange(1, k + 1), n_jobs)
+        }
+    
+    def _select_matches_ann(self, resumes_df, jobs_df, top_k, n_probe=None, job_top_k=0):
+        """Retrieve candidate jobs from the ANN index and re-score them exactly
+
+        Per-job lists are built from the same candidate scores, so a resume is
+        only considered for jobs the index retrieved for it.
+        """
+        index = self.sync_job_index(jobs_df)
+        n_candidates = max(config.get('ranking.ann.candidates', 50), top_k)
         
-        # Jaccard similarity
-        intersection = len(resume_skills_set.intersection(job_skills_set))
-        union = len(resume_skills_set.union(job_skills_set))
+        resume_vectors = self.text_processor.encode_normalized(
+            resumes_df['processed_content'].fillna('').tolist())
+        candidate_ids, _ = index.search(resume_vectors, n_candidates, n_probe=n_probe)
         
-        return intersection / union if union > 0 else 0.0
+        vocabulary, job_skills = self._job_skill_bits(resumes_df, jobs_df)
+        resume_skills = vocabulary.encode(resumes_df['skills'])
+        
+        job_row_of_id = pd.Series(np.arange(len(jobs_df)), index=jobs_df['id'].values)
+        index_row_of_id = pd.Series(np.arange(len(index.ids)), index=index.ids)
+        
+        selected = []
+        candidates = []
+        for i in range(len(resumes_df)):
+            ids = candidate_ids[i][candidate_ids[i] >= 0]
+            rows = job_row_of_id.loc[ids].to_numpy()
+            content = index.vectors[index_row_of_id.loc[ids].to_numpy()] @ resume_vectors[i]
+            skills = skills_similarity_matrix(resume_skills[i:i + 1], job_skills[rows])[0]
+            combined = CONTENT_WEIGHT * content + SKILLS_WEIGHT * skills
+            
+            scores = {'content': content[None, :], 'skills': skills[None, :],
+                      'combined': combined[None, :]}
+            best = top_k_indices(scores['combined'], top_k)
+            selection = self._selection(i, best, scores)
+            selection['job_rows'] = rows[best[0]]
+            selected.append(selection)
+            if job_top_k:
+                candidates.append({'resume_rows': np.full(len(rows), i), 'job_rows': rows,
+                                   'content': content, 'skills': skills,
+                                   'combined': combined})
+        
+        job_selected = self._job_selection(RunningTopK(job_top_k))
+        if candidates:
+            pairs = pd.DataFrame(self._concat_selections(candidates))
+            pairs = pairs.sort_values(['job_rows', 'combined', 'resume_rows'],
+                                      ascending=[True, False, True], kind='stable')
+            pairs = pairs.groupby('job_rows', sort=False).head(job_top_k)
+            pairs['rank'] = pairs.groupby('job_rows', sort=False).cumcount() + 1
+            job_selected = {key: pairs[key].to_numpy() for key in job_selected}
+        
+        return self._concat_selections(selected), job_selected
+    
+    @staticmethod
+    def _selection(start, job_rows, scores):
+        """Flatten the surviving (resume, job) cells of a score block"""
+        n_rows, k = job_rows.shape
+        return {
+            'resume_rows': np.repeat(np.arange(start, start + n_rows), k),
+            'job_rows': job_rows.ravel(),
+            'content': np.take_along_axis(scores['content'], job_rows, axis=1).ravel(),
+            'skills': np.take_along_axis(scores['skills'], job_rows, axis=1).ravel(),
+            'combined': np.take_along_axis(scores['combined'], job_rows, axis=1).ravel(),
+            'rank': np.tile(np.arange(1, k + 1), n_rows)
+        }
+    
+    def _concat_selections(self, selections):
+        return {key: np.concatenate([selection[key] for selection in selections])
+                for key in selections[0]}
+    
+    def _build_matches_frame(self, resumes_df, jobs_df, selected):
+        """Materialize only the selected matches into the output DataFrame"""
+        resume_rows = selected['resume_rows']
+        job_rows = selected['job_rows']
+        return pd.DataFrame({
+            'resume_id': resumes_df['id'].to_numpy()[resume_rows],
+            'resume_filename': resumes_df['filename'].to_numpy()[resume_rows],
+            'job_id': jobs_df['id'].to_numpy()[job_rows],
+            'job_title': jobs_df['title'].to_numpy()[job_rows],
+            'company': jobs_df['company'].to_numpy()[job_rows],
+            'content_similarity': selected['content'].astype(float),
+            'skills_similarity': selected['skills'].astype(float),
+            'combined_score': selected['combined'].astype(float),
+            'rank': selected['rank']
+        })
+    
+    def _build_job_matches_frame(self, resumes_df, jobs_df, selected):
+        """Per-job top resumes as rows of the job_matches table"""
+        return pd.DataFrame({
+            'job_id': jobs_df['id'].to_numpy()[selected['job_rows']],
+            'resume_id': resumes_df['id'].to_numpy()[selected['resume_rows']],
+            'content_similarity': selected['content'].astype(float),
+            'skills_similarity': selected['skills'].astype(float),
+            'combined_score': selected['combined'].astype(float),
+            'rank': selected['rank']
+        })
+    
+    def _merge_job_matches(self, job_matches_df, rescored_ids, resume_ids, jobs_df,
+                           job_top_k, block_size=None):
+        """Merge per-job lists of re-scored resumes into the stored lists
+
+        A full stored list only holds the top job_top_k resumes, so every
+        resume left out of it ranks below its last entry. When a re-scored
+        resume drops below that entry the true next-best resume may be one
+        of those left out. A list cut short (e.g. by deleted resumes) has
+        lost that bound unless it holds every resume not re-scored. Such
+        jobs are re-scored against every resume. Returns the merged lists
+        and the ids of the re-scored jobs.
+        """
+        order = ['job_id', 'combined_score', 'resume_id']
+        stored = self.db.get_job_matches()
+        stored = stored[stored['resume_id'].isin(resume_ids) & stored['job_id'].isin(jobs_df['id'])]
+        stored = stored.sort_values(order, ascending=[True, False, True], kind='stable')
+        kept = stored[~stored['resume_id'].isin(rescored_ids)]
+        merged = pd.concat([kept[list(job_matches_df.columns)], job_matches_df],
+                           ignore_index=True)
+        merged = merged.sort_values(order, ascending=[True, False, True], kind='stable')
+        merged = merged.groupby('job_id', sort=False).head(job_top_k)
+        
+        job_ids = pd.Index(jobs_df['id'])
+        sizes = stored.groupby('job_id').size().reindex(job_ids, fill_value=0)
+        known = kept.groupby('job_id').size().reindex(job_ids, fill_value=0)
+        unscored = len(set(resume_ids) - set(rescored_ids))
+        short = (sizes < job_top_k) & (known < unscored)
+        
+        stored_last = stored.groupby('job_id').agg(size=('resume_id', 'size'),
+                                                   score=('combined_score', 'last'),
+                                                   resume_id=('resume_id', 'last'))
+        merged_last = merged.groupby('job_id').agg(size=('resume_id', 'size'),
+                                                   score=('combined_score', 'last'),
+                                                   resume_id=('resume_id', 'last'))
+        last = stored_last[stored_last['size'] >= job_top_k].join(merged_last, rsuffix='_merged')
+        below = ((last['size_merged'].fillna(0) < job_top_k)
+                 | (last['score_merged'] < last['score'])
+                 | ((last['score_merged'] == last['score'])
+                    & (last['resume_id_merged'] > last['resume_id'])))
+        job_ids = job_ids[short.to_numpy()].union(last.index[below]).to_numpy()
+        if len(job_ids):
+            logger.info(f"Re-scoring {len(job_ids)} jobs whose candidate lists lost a resume")
+            merged = pd.concat([merged[~merged['job_id'].isin(job_ids)],
+                                self._rescore_job_lists(jobs_df, job_ids, job_top_k, block_size)],
+                               ignore_index=True)
+            merged = merged.sort_values(order, ascending=[True, False, True], kind='stable')
+        
+        merged = merged.reset_index(drop=True)
+        merged['rank'] = merged.groupby('job_id', sort=False).cumcount() + 1
+        return merged, job_ids
     
-    def _save_matches(self, matches_df):
-        """Save matches to database"""
+    def _rescore_job_lists(self, jobs_df, job_ids, job_top_k, block_size=None):
+        """Top job_top_k resumes of the given jobs, scored against every resume"""
+        block_size = block_size or config.get('processing.batch_size', 100)
+        resumes_df = self.db.get_resumes()
+        jobs = jobs_df[jobs_df['id'].isin(job_ids)].reset_index(drop=True)
+        tfidf = None
+        if self.text_processor.model is None:
+            # IDF weights come from every job, as in the full run
+            tfidf = self.text_processor.fit_tfidf(jobs_df['processed_content'].fillna('').tolist())
+        content_blocks = self.text_processor.iter_similarity_blocks(
+            resumes_df['processed_content'].tolist(), jobs['processed_content'].tolist(),
+            block_size, tfidf=tfidf)
+        
+        per_job = RunningTopK(job_top_k)
+        for start, scores in self._iter_combined_blocks(content_blocks, resumes_df, jobs,
+                                                        block_size):
+            per_job.update(start, scores['combined'], content=scores['content'],
+                           skills=scores['skills'])
+        return self._build_job_matches_frame(resumes_df, jobs, self._job_selection(per_job))
+    
+    def _save_job_matches(self, job_matches_df):
+        """Replace the stored per-job lists; returns whether the save succeeded"""
         try:
-            matches_df.to_sql('matches', self.db.engine, if_exists='replace', index=False)
-            logger.info(f"Saved {len(matches_df)} matches to database")
+            self.db.replace_job_matches(job_matches_df)
+            logger.info(f"Saved {len(job_matches_df)} job-centric matches to database")
+            return True
+        except Exception as e:
+            logger.error(f"Error saving job matches: {e}")
+            return False
+    
+    def index_path(self):
+        """Location of the persisted job index, next to the database file"""
+        return os.path.join(os.path.dirname(self.db.db_path), 'job_index.npz')
+    
+    def sync_job_index(self, jobs_df=None, rebuild=False):
+        """Load the persisted job index and bring it up to date with the job table
+
+        Only new or changed jobs are encoded and inserted; deleted jobs are
+        removed. The index is re-clustered when rebuild is set, when the model
+        changed, or when too many vectors were added since the last build.
+        """
+        if jobs_df is None:
+            jobs_df = self.db.get_jobs()
+        
+        path = self.index_path()
+        index = None
+        if not rebuild and os.path.exists(path):
+            index = IVFIndex.load(path)
+            if index.model_name != self.model_name:
+                index = None
+            else:
+                index.n_probe = config.get('ranking.ann.n_probe', index.n_probe)
+        if index is None:
+            index = IVFIndex(n_lists=config.get('ranking.ann.n_lists', 0),
+                             n_probe=config.get('ranking.ann.n_probe', 8))
+            index.model_name = self.model_name
+        
+        texts = jobs_df['processed_content'].fillna('').tolist()
+        hashes = np.array([content_hash(text) for text in texts], dtype=object)
+        ids = jobs_df['id'].to_numpy(dtype=np.int64)
+        
+        indexed = dict(zip(index.ids.tolist(), index.hashes.tolist()))
+        changed = np.array([indexed.get(job_id) != digest
+                            for job_id, digest in zip(ids.tolist(), hashes)], dtype=bool)
+        deleted = np.setdiff1d(index.ids, ids)
+        
+        if not changed.any() and len(deleted) == 0:
+            return index
+        
+        index.remove(deleted)
+        changed_rows = np.flatnonzero(changed)
+        vectors = self.text_processor.encode_normalized([texts[r] for r in changed_rows])
+        index.add(ids[changed_rows], vectors, hashes[changed_rows])
+        
+        if index.needs_rebuild():
+            index.build(index.ids, index.vectors, index.hashes)
+        
+        index.save(path)
+        logger.info(f"Job index updated: {len(changed_rows)} upserted, "
+                    f"{len(deleted)} removed")
+        return index
+    
+    def evaluate_index(self, top_k=5, n_probe=None, sample_size=100):
+        """Measure recall@k of the ANN content search against exact search"""
+        resumes_df = self.db.get_resumes()
+        if len(resumes_df) > sample_size:
+            resumes_df = resumes_df.sample(sample_size, random_state=0)
+        index = self.sync_job_index()
+        
+        queries = self.text_processor.encode_normalized(
+            resumes_df['processed_content'].fillna('').tolist())
+        exact_scores = queries @ index.vectors.T
+        exact_top = np.argsort(-exact_scores, axis=1, kind='stable')[:, :top_k]
+        approx_ids, _ = index.search(queries, top_k, n_probe=n_probe)
+        
+        return recall_at_k(index.ids[exact_top], approx_ids)
+    
+    def _use_embedding_store(self):
+        if self.use_embedding_store and self.text_processor.model is None:
+            logger.warning("The embedding store needs a sentence-transformer model; "
+                           "scoring without it")
+            self.use_embedding_store = False
+        return self.use_embedding_store
+    
+    def embedding_store_path(self, dtype):
+        """Location of the memory-mapped job embedding matrix, next to the database file"""
+        return os.path.join(os.path.dirname(self.db.db_path), f'job_embeddings.{dtype}.npy')
+    
+    def sync_embedding_store(self, jobs_df=None, dtype=None, rebuild=False):
+        """Open the job embedding matrix, rewriting it if the jobs or model changed
+
+        Rows follow jobs_df order and store.ids maps them back to
+        job_descriptions.id. A rewrite takes its vectors from the embedding
+        cache, so only new or changed jobs are encoded.
+        """
+        if jobs_df is None:
+            jobs_df = self.db.get_jobs()
+        dtype = dtype or config.get('ranking.embedding_store.dtype', 'float16')
+        store = EmbeddingStore(self.embedding_store_path(dtype), dtype,
+                               chunk_rows=config.get('ranking.embedding_store.chunk_rows', 65536))
+        
+        texts = jobs_df['processed_content'].fillna('').tolist()
+        hashes = [content_hash(text) for text in texts]
+        ids = jobs_df['id'].to_numpy(dtype=np.int64)
+        if rebuild or not store.load() or not store.is_current(ids, hashes, self.model_name):
+            store.build(ids, hashes, texts, self.text_processor.encode_normalized,
+                        model_name=self.model_name)
+        return store
+    
+    def evaluate_embedding_store(self, top_k=5, sample_size=100, dtype=None):
+        """Compare rankings from the quantized job matrix with float32 rankings
+
+        Returns recall@k of the quantized top k against the float32 top k,
+        the score errors and the matrix size against float32.
+        """
+        resumes_df = self.db.get_resumes()
+        if len(resumes_df) > sample_size:
+            resumes_df = resumes_df.sample(sample_size, random_state=0)
+        jobs_df = self.db.get_jobs()
+        store = self.sync_embedding_store(jobs_df, dtype=dtype)
+        
+        queries = self.text_processor.encode_normalized(
+            resumes_df['processed_content'].fillna('').tolist())
+        approx = store.similarity(queries)
+        texts = jobs_df['processed_content'].fillna('').tolist()
+        exact = np.hstack([
+            queries @ self.text_processor.encode_normalized(texts[start:start + store.chunk_rows]).T
+            for start in range(0, len(texts), store.chunk_rows)
+        ])
+        
+        errors = np.abs(exact - approx)
+        return {
+            'dtype': store.dtype,
+            'recall_at_k': recall_at_k(top_k_indices(exact, top_k), top_k_indices(approx, top_k)),
+            'max_score_error': float(errors.max()),
+            'mean_score_error': float(errors.mean()),
+            'bytes': store.nbytes,
+            'float32_bytes': store.matrix.shape[0] * store.matrix.shape[1] * 4
+        }
+    
+    def gc_embeddings(self):
+        """Remove cached embeddings no longer referenced by any resume or job"""
+        removed = self.db.gc_embeddings(keep_model=self.model_name)
+        logger.info(f"Removed {removed} orphaned embeddings")
+        return removed
+    
+    def _save_matches(self, matches_df, resume_ids, prune=False):
+        """Upsert the matches of the re-scored resume_ids (see DatabaseManager.save_matches)
+
+        Returns whether the save succeeded.
+        """
+        try:
+            result = self.db.save_matches(matches_df, resume_ids, prune=prune)
+            logger.info(f"Saved {len(matches_df)} matches to database "
+                        f"({result['upserted']} written, {result['deleted']} removed)")
+            return True
         except Exception as e:
             logger.error(f"Error saving matches: {e}")
+            return False
     
-    def get_top_matches_for_resume(self, resume_filename, top_k=5):
-        """Get top job matches for a specific resume"""
-        query = f"""
-        SELECT m.*, r.filename, j.title, j.company
-        FROM matches m
-        JOIN resumes r ON m.resume_id = r.id
-        JOIN job_descriptions j ON m.job_id = j.id
-        WHERE r.filename = '{resume_filename}'
-        ORDER BY m.combined_score DESC
-        LIMIT {top_k}
+    def get_top_matches_for_resume(self, resume_filename, top_k=5, after_rank=0):
+        """Get top job matches for a specific resume, in rank order
+
+        Pass the last rank already shown as after_rank to page through the
+        rest. Hot results are kept in an in-process LRU cache that is dropped
+        as soon as the stored matches change.
         """
+        return self._cached_lookup((resume_filename, top_k, after_rank),
+                                   lambda: self.db.get_top_matches(
+                                       resume_filename, limit=top_k, after_rank=after_rank))
+    
+    def _cached_lookup(self, key, load):
+        """Serve a read from the LRU cache, dropping it when matches changed"""
+        generation = self.db.get_matches_generation()
+        if generation != self._match_cache_generation:
+            self._match_cache.clear()
+            self._match_cache_generation = generation
         
-        return pd.read_sql(query, self.db.engine)
+        result = self._match_cache.get(key)
+        if result is None:
+            result = load()
+            self._match_cache[key] = result
+            if len(self._match_cache) > self.match_cache_size:
+                self._match_cache.popitem(last=False)
+        else:
+            self._match_cache.move_to_end(key)
+        
+        return result.copy()
+    
+    def get_top_candidates_for_job(self, job_id, top_k=5, after_rank=0):
+        """Get the best-ranked resumes for a job (cached like get_top_matches_for_resume)"""
+        return self._cached_lookup(('job', int(job_id), top_k, after_rank),
+                                   lambda: self.db.get_top_candidates(
+                                       job_id, limit=top_k, after_rank=after_rank))
+    
+    def iter_match_summary(self, chunk_size=1000):
+        """Stream the summary of all matches in chunks, ordered by resume and rank"""
+        return self.db.iter_match_summary(chunk_size)
     
     def get_match_summary(self):
         """Get summary of all matches"""
-        query = """
-        SELECT 
-            r.filename as resume,
-            j.title as job_title,
-            j.company,
-            m.combined_score,
-            m.rank
-        FROM matches m
-        JOIN resumes r ON m.resume_id = r.id
-        JOIN job_descriptions j ON m.job_id = j.id
-        ORDER BY r.filename, m.rank
-        """
-        
-        return pd.read_sql(query, self.db.engine)
\ No newline at end of file
+        chunks = list(self.iter_match_summary())
+        if not chunks:
+            return pd.DataFrame(columns=['resume', 'job_title', 'company',
+                                         'combined_score', 'rank'])
+        return pd.concat(chunks, ignore_index=True)
@@ -0,0 +1,150 @@
+import multiprocessing
+import time
+import numpy as np
+import logging
+from multiprocessing import shared_memory
+
+from src.nlp.similarity import cosine_similarity_matrix
+from src.nlp.skill_vocabulary import skills_similarity_matrix
+from src.nlp.tfidf import TfidfEngine
+from src.ranking.topk import RunningTopK, top_k_indices
+
+logger = logging.getLogger(__name__)
+
+# Set in each pool worker by _init_worker: attached arrays and their segments
+_shared = {}
+_segments = []
+_stores = {}
+
+
+class MatchingCancelled(RuntimeError):
+    """Raised when a sharded matching run is cancelled"""
+
+
+class SharedArrays:
+    """Copies named numpy arrays into shared memory segments once
+
+    spec describes each array (segment name, shape, dtype) so worker
+    processes can attach() to them without copying.
+    """
+
+    def __init__(self, arrays):
+        self.segments = []
+        self.spec = {}
+        try:
+            for name, array in arrays.items():
+                array = np.ascontiguousarray(array)
+                segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                self.segments.append(segment)
+                np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+                self.spec[name] = (segment.name, array.shape, array.dtype.str)
+        except Exception:
+            self.close()
+            raise
+
+    @staticmethod
+    def attach(spec):
+        """Map the arrays described by spec; returns (arrays, segments)"""
+        arrays, segments = {}, []
+        for name, (segment_name, shape, dtype) in spec.items():
+            segment = shared_memory.SharedMemory(name=segment_name)
+            segments.append(segment)
+            arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf)
+        return arrays, segments
+
+    def close(self):
+        """Release and remove every segment"""
+        for segment in self.segments:
+            segment.close()
+            segment.unlink()
+        self.segments = []
+
+
+def _init_worker(spec):
+    arrays, segments = SharedArrays.attach(spec)
+    _shared.update(arrays)
+    _segments.extend(segments)
+
+
+def _open_store(args):
+    """The memory-mapped job matrix, opened once per worker"""
+    if args not in _stores:
+        from src.ranking.embedding_store import EmbeddingStore
+        store = EmbeddingStore(*args)
+        if not store.load():
+            raise RuntimeError(f"Embedding store {args[0]} is missing or out of date")
+        _stores[args] = store
+    return _stores[args]
+
+
+def _content_scores(task, start, end):
+    """Content similarity of resume rows start..end to every job, like the single-process path"""
+    if task['content'] == 'dense':
+        return cosine_similarity_matrix(_shared['resume_vectors'][start:end],
+                                        _shared['job_vectors'], normalized=True)
+    if task['content'] == 'store':
+        return _open_store(task['store']).similarity(_shared['resume_vectors'][start:end])
+
+    from scipy import sparse
+    resumes = sparse.csr_matrix((_shared['resume_data'], _shared['resume_indices'],
+                                 _shared['resume_indptr']), shape=task['resume_shape'])
+    jobs = sparse.csr_matrix((_shared['job_data'], _shared['job_indices'],
+                              _shared['job_indptr']), shape=task['job_shape'])
+    return TfidfEngine().similarity_matrix(resumes[start:end], jobs)
+
+
+def _score_shard(task):
+    """Score one shard (consecutive resume blocks) against every job
+
+    Returns (shard, per-resume top-k cells, per-job RunningTopK) for the
+    parent to merge in shard order.
+    """
+    # Imported here so the module stays importable from the matcher
+    from src.ranking.matcher import CONTENT_WEIGHT, SKILLS_WEIGHT, ResumeJobMatcher
+
+    selected = []
+    per_job = RunningTopK(task['job_top_k'])
+    for start in task['starts']:
+        end = min(start + task['block_size'], task['n_resumes'])
+        content = _content_scores(task, start, end)
+        skills = skills_similarity_matrix(_shared['resume_skills'][start:end],
+                                          _shared['job_skills'])
+        combined = CONTENT_WEIGHT * content + SKILLS_WEIGHT * skills
+        scores = {'content': content, 'skills': skills, 'combined': combined}
+
+        selected.append(ResumeJobMatcher._selection(
+            start, top_k_indices(combined, task['top_k']), scores))
+        if task['job_top_k']:
+            per_job.update(start, combined, content=content, skills=skills)
+    return task['shard'], selected, per_job
+
+
+def run_shards(spec, tasks, num_workers, progress=None, cancel=None, poll_interval=0.05,
+               mp_context=None):
+    """Run _score_shard over tasks in a worker pool, returning results in shard order
+
+    progress(done, total) is called with resume counts as shards finish.
+    When cancel (e.g. a threading.Event) is set, the workers are terminated
+    and MatchingCancelled is raised.
+    """
+    context = mp_context or multiprocessing.get_context()
+    total = sum(task['n_rows'] for task in tasks)
+    done = 0
+    results = [None] * len(tasks)
+    logger.info(f"Scoring {total} resumes in {len(tasks)} shards on {num_workers} workers")
+    with context.Pool(num_workers, initializer=_init_worker, initargs=(spec,)) as pool:
+        pending = {task['shard']: pool.apply_async(_score_shard, (task,)) for task in tasks}
+        while pending:
+            if cancel is not None and cancel.is_set():
+                raise MatchingCancelled(f"Matching cancelled after {done} of {total} resumes")
+            finished = [shard for shard, result in pending.items() if result.ready()]
+            if not finished:
+                time.sleep(poll_interval)
+                continue
+            for shard in finished:
+                _, selected, per_job = pending.pop(shard).get()
+                results[shard] = (selected, per_job)
+                done += tasks[shard]['n_rows']
+                if progress is not None:
+                    progress(done, total)
+    return results
@@ -0,0 +1,78 @@
+import numpy as np
+
+
+def top_k_indices(scores, k):
+    """Column indices of the k highest scores in each row, best first
+
+    Uses partial selection (np.partition) so only the surviving k columns
+    per row are sorted.
+    Equal scores are ordered by column index, matching a stable full sort.
+    """
+    scores = np.asarray(scores)
+    if scores.ndim == 1:
+        scores = scores.reshape(1, -1)
+    n_rows, n_cols = scores.shape
+    k = min(k, n_cols)
+    if k <= 0:
+        return np.zeros((n_rows, 0), dtype=np.int64)
+
+    if k < n_cols:
+        # The k-th largest score per row; cells above it always survive and
+        # ties at the cut-off are filled from the lowest column index.
+        kth = -np.partition(-scores, k - 1, axis=1)[:, k - 1:k]
+        above = scores > kth
+        ties = scores == kth
+        needed = k - above.sum(axis=1, keepdims=True)
+        keep = above | (ties & (np.cumsum(ties, axis=1) <= needed))
+        candidates = np.nonzero(keep)[1].reshape(n_rows, k)
+    else:
+        candidates = np.tile(np.arange(n_cols), (n_rows, 1))
+
+    selected = np.take_along_axis(scores, candidates, axis=1)
+    order = np.lexsort((candidates, -selected), axis=1)
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+class RunningTopK:
+    """Keeps the k best rows of every column of a score matrix streamed in row blocks
+
+    Blocks must arrive in row order. Equal scores keep the earlier row, so the
+    result matches a stable sort of each full column. Extra per-cell arrays
+    (e.g. component scores) passed to update are carried along.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self.scores = None
+        self.rows = None
+        self.values = {}
+
+    def update(self, start, scores, **values):
+        """Merge a block of rows start .. start + len(scores) into the running top k"""
+        columns = np.asarray(scores).T
+        rows = np.broadcast_to(np.arange(start, start + columns.shape[1]), columns.shape)
+        values = {name: np.asarray(value).T for name, value in values.items()}
+        if self.scores is not None:
+            columns = np.hstack([self.scores, columns])
+            rows = np.hstack([self.rows, rows])
+            values = {name: np.hstack([self.values[name], value])
+                      for name, value in values.items()}
+        self._keep(columns, rows, values)
+
+    def merge(self, other):
+        """Merge a RunningTopK that covered later rows of the same columns"""
+        if other.scores is None:
+            return
+        if self.scores is None:
+            self.scores, self.rows, self.values = other.scores, other.rows, dict(other.values)
+            return
+        self._keep(np.hstack([self.scores, other.scores]), np.hstack([self.rows, other.rows]),
+                   {name: np.hstack([value, other.values[name]])
+                    for name, value in self.values.items()})
+
+    def _keep(self, columns, rows, values):
+        keep = top_k_indices(columns, self.k)
+        self.scores = np.take_along_axis(columns, keep, axis=1)
+        self.rows = np.take_along_axis(rows, keep, axis=1)
+        self.values = {name: np.take_along_axis(value, keep, axis=1)
+                       for name, value in values.items()}
@@ -0,0 +1,85 @@
+import base64
+import json
+import os
+import socket
+
+import numpy as np
+
+
+def encode_array(array):
+    """Pack a NumPy array into a JSON-safe dict"""
+    array = np.ascontiguousarray(array, dtype=np.float32)
+    return {
+        'shape': list(array.shape),
+        'data': base64.b64encode(array.tobytes()).decode('ascii')
+    }
+
+
+def decode_array(payload):
+    """Unpack a dict produced by encode_array"""
+    data = base64.b64decode(payload['data'])
+    return np.frombuffer(data, dtype=np.float32).reshape(payload['shape'])
+
+
+class DaemonError(RuntimeError):
+    """Raised when the daemon answers a request with an error"""
+
+
+class DaemonClient:
+    """Client for the matcher daemon started with `python -m src.main serve`
+
+    Requests and responses are single JSON lines over a Unix socket. The
+    client exposes encode() with the same shape as SentenceTransformer.encode,
+    so TextProcessor can use it in place of a local model.
+    """
+
+    def __init__(self, socket_path, timeout=30.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def request(self, op, **params):
+        """Send one request and return the decoded response"""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            sock.sendall(json.dumps({'op': op, **params}).encode('utf-8') + b'\n')
+            with sock.makefile('rb') as stream:
+                line = stream.readline()
+        if not line:
+            raise DaemonError("Daemon closed the connection without answering")
+
+        response = json.loads(line)
+        if 'error' in response:
+            raise DaemonError(response['error'])
+        return response
+
+    def available(self, model_name=None):
+        """Whether a daemon with a loaded model is listening on the socket
+
+        With model_name, the daemon must also be running that model: vectors
+        from another model would be cached under the wrong key.
+        """
+        if not hasattr(socket, 'AF_UNIX') or not os.path.exists(self.socket_path):
+            return False
+        try:
+            response = self.request('ping')
+        except (OSError, ValueError, DaemonError):
+            return False
+        if not response.get('model'):
+            return False
+        return model_name is None or response.get('model_name') == model_name
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, **kwargs):
+        """Raw (unnormalized) embeddings computed by the daemon's model"""
+        if isinstance(texts, str):
+            texts = [texts]
+        return decode_array(self.request('encode', texts=list(texts))['embeddings'])
+
+    def score(self, texts1, texts2):
+        """Full similarity matrix between two lists of texts"""
+        return decode_array(self.request('score', texts1=list(texts1),
+                                         texts2=list(texts2))['scores'])
+
+    def top_k(self, content, top_k=5):
+        """Top K jobs for a raw resume text, as a list of match dicts"""
+        return self.request('top_k', content=content, top_k=top_k)['matches']
@@ -0,0 +1,176 @@
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+
+from src.service.client import encode_array
+
+logger = logging.getLogger(__name__)
+
+
+class EncodeBatcher:
+    """Coalesces concurrent encode calls into single model.encode batches
+
+    Callers block on encode() while a worker thread drains the queue: it waits
+    up to max_wait_ms for more requests (or until max_batch_size texts are
+    queued), encodes them in one call and hands each caller its rows.
+    """
+
+    def __init__(self, model, max_batch_size=64, max_wait_ms=5):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='encode-batcher',
+                                        daemon=True)
+        self._thread.start()
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, **kwargs):
+        if isinstance(texts, str):
+            texts = [texts]
+        future = Future()
+        self._queue.put((list(texts), future))
+        return future.result()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            pending = [item]
+            queued = len(item[0])
+
+            # Gather whatever else arrives within the batching window
+            while queued < self.max_batch_size:
+                try:
+                    item = self._queue.get(timeout=self.max_wait)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                pending.append(item)
+                queued += len(item[0])
+
+            self._encode(pending)
+
+    def _encode(self, pending):
+        texts = [text for batch, _ in pending for text in batch]
+        try:
+            embeddings = np.asarray(self.model.encode(texts, batch_size=len(texts),
+                                                      convert_to_numpy=True))
+        except Exception as e:
+            for _, future in pending:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        start = 0
+        for batch, future in pending:
+            future.set_result(embeddings[start:start + len(batch)])
+            start += len(batch)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                response = self.server.matcher_daemon.dispatch(json.loads(line))
+            except Exception as e:
+                logger.exception("Daemon request failed")
+                response = {'error': str(e)}
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class MatcherDaemon:
+    """Keeps one warm TextProcessor/ResumeJobMatcher and serves it on a Unix socket
+
+    Supported ops: ping, encode, score and top_k. All model work goes through
+    an EncodeBatcher, so concurrent clients share model.encode calls.
+    """
+
+    def __init__(self, socket_path, matcher=None, max_batch_size=64, max_wait_ms=5):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise RuntimeError("The matcher daemon needs Unix domain sockets")
+
+        if matcher is None:
+            from src.ranking.matcher import ResumeJobMatcher
+            matcher = ResumeJobMatcher(use_daemon=False)
+        self.socket_path = socket_path
+        self.matcher = matcher
+        self.processor = matcher.text_processor
+        self.batcher = None
+
+        model = self.processor.model
+        if model is not None:
+            self.batcher = EncodeBatcher(model, max_batch_size, max_wait_ms)
+            self.processor.model = self.batcher
+        self.server = None
+
+    def dispatch(self, request):
+        op = request.get('op')
+        if op == 'ping':
+            return {'ok': True, 'model': self.batcher is not None,
+                    'model_name': self.processor.model_name}
+        if op == 'encode':
+            if self.batcher is None:
+                raise RuntimeError("Daemon has no sentence-transformer model loaded")
+            return {'embeddings': encode_array(self.batcher.encode(request['texts']))}
+        if op == 'score':
+            scores = self.processor.similarity_matrix(request['texts1'], request['texts2'])
+            return {'scores': encode_array(scores)}
+        if op == 'top_k':
+            matches = self.matcher.match_text(request['content'],
+                                              top_k=request.get('top_k', 5))
+            return {'matches': json.loads(matches.to_json(orient='records'))}
+        raise ValueError(f"Unknown op: {op}")
+
+    def start(self):
+        """Bind the socket and serve requests on a background thread"""
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        os.makedirs(os.path.dirname(self.socket_path) or '.', exist_ok=True)
+        self.server = _UnixServer(self.socket_path, _RequestHandler)
+        self.server.matcher_daemon = self
+        thread = threading.Thread(target=self.server.serve_forever, name='matcher-daemon',
+                                  daemon=True)
+        thread.start()
+        logger.info(f"Matcher daemon listening on {self.socket_path}")
+
+    def serve_forever(self):
+        """Serve until interrupted (used by the `serve` CLI command)"""
+        self.start()
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        if self.batcher is not None:
+            self.batcher.close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
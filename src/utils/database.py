@@ -1,7 +1,55 @@
 import sqlite3
+import threading
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine
 import os
+from src.utils.hashing import content_hash
+from src.utils.metrics import metrics
+
+RESUME_COLUMNS = ('filename', 'content', 'processed_content', 'skills', 'experience',
+                  'content_hash')
+JOB_COLUMNS = ('source_id', 'title', 'company', 'content', 'processed_content',
+               'required_skills', 'content_hash')
+MATCH_COLUMNS = ('resume_id', 'job_id', 'content_similarity', 'skills_similarity',
+                 'combined_score', 'rank')
+JOB_MATCH_COLUMNS = ('job_id', 'resume_id', 'content_similarity', 'skills_similarity',
+                     'combined_score', 'rank')
+
+
+def _iter_row_tuples(rows, columns):
+    """Yield tuples of column values from a DataFrame or an iterable of dicts"""
+    if isinstance(rows, pd.DataFrame):
+        frame = rows.reindex(columns=list(columns)).astype(object)
+        frame = frame.where(frame.notna(), None)
+        yield from frame.itertuples(index=False, name=None)
+    else:
+        for row in rows:
+            yield tuple(row.get(column) for column in columns)
+
+
+def _present_columns(rows, columns):
+    """(rows, columns) limited to the columns the rows actually provide
+
+    Iterables of dicts are materialized; a column counts as present when any
+    row has it.
+    """
+    if isinstance(rows, pd.DataFrame):
+        return rows, tuple(column for column in columns if column in rows.columns)
+    rows = list(rows)
+    keys = set().union(*rows) if rows else set(columns)
+    return rows, tuple(column for column in columns if column in keys)
+
+
+def _chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
 
 class DatabaseManager:
     def __init__(self, db_path="data/resume_matcher.db"):
@@ -9,9 +57,43 @@ class DatabaseManager:
         if db_dir:  # Only create directory if it's not empty
            os.makedirs(db_dir, exist_ok=True)
         self.db_path = db_path
-        self.engine = create_engine(f'sqlite:///{db_path}')
+        self._engine = None
+        self._local = threading.local()
+        self._readers = []
+        self._readers_lock = threading.Lock()
         self.init_tables()
     
+    @property
+    def engine(self):
+        """SQLAlchemy engine, created on first use (used by DataFrame.to_sql)"""
+        if self._engine is None:
+            from sqlalchemy import create_engine
+            self._engine = create_engine(f'sqlite:///{self.db_path}')
+        return self._engine
+    
+    def _reader(self):
+        """Long-lived read connection for the calling thread
+
+        Hot lookups reuse it so sqlite3's statement cache keeps their prepared
+        plans instead of re-parsing the SQL on a fresh connection every call.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+    
+    @metrics.timed('sql', op='read_sql')
+    def read_sql(self, query, params=None):
+        """Run a read-only query into a DataFrame over a plain sqlite3 connection"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return pd.read_sql(query, conn, params=params)
+        finally:
+            conn.close()
+    
     
     def init_tables(self):
         """Initialize database tables"""
@@ -27,6 +109,7 @@ class DatabaseManager:
                 processed_content TEXT,
                 skills TEXT,
                 experience TEXT,
+                content_hash TEXT,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
@@ -40,26 +123,208 @@ class DatabaseManager:
                 content TEXT,
                 processed_content TEXT,
                 required_skills TEXT,
+                source_id TEXT,
+                content_hash TEXT,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
         
-        # Matches table
+        # Columns added after the first release
+        self._ensure_columns(cursor, 'resumes', {'content_hash': 'TEXT'})
+        self._ensure_columns(cursor, 'job_descriptions',
+                             {'source_id': 'TEXT', 'content_hash': 'TEXT'})
+        
+        # Jobs are keyed by where they came from. When the key is first
+        # introduced, older rows get company|title. Rows that are exact
+        # duplicates (same key and content) left by earlier ETL runs are
+        # collapsed; different postings sharing a key get company|title|id so
+        # the unique index can be built without losing any of them.
+        has_source_index = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' "
+            "AND name = 'idx_job_descriptions_source_id'"
+        ).fetchone()
+        if not has_source_index:
+            self._migrate_job_keys(cursor)
+        
+        # Matches table (older databases are migrated to this schema once)
+        has_match_index = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' "
+            "AND name = 'idx_matches_resume_score'"
+        ).fetchone()
+        if not has_match_index:
+            self._migrate_matches(cursor)
+        
+        # Best resumes per job, produced by the same pass as matches
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS job_matches (
+                job_id INTEGER NOT NULL,
+                resume_id INTEGER NOT NULL,
+                content_similarity REAL,
+                skills_similarity REAL,
+                combined_score REAL,
+                rank INTEGER,
+                PRIMARY KEY (job_id, resume_id),
+                FOREIGN KEY (resume_id) REFERENCES resumes (id),
+                FOREIGN KEY (job_id) REFERENCES job_descriptions (id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_job_matches_job_rank
+            ON job_matches (job_id, rank)
+        ''')
+        
+        # Embedding cache, content-addressed by (model, hash of processed_content)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model_name TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (model_name, content_hash)
+            )
+        ''')
+        
+        # Manifest of ingested source files, used to skip unchanged files
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS source_files (
+                path TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                size INTEGER,
+                mtime REAL,
+                content_hash TEXT,
+                status TEXT NOT NULL DEFAULT 'active',
+                record_id INTEGER,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Resumes whose matches are stale and must be recomputed
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS pending_matches (
+                resume_id INTEGER PRIMARY KEY
+            )
+        ''')
+        
+        # Counters such as matches_generation, bumped whenever stored matches
+        # (or the resume/job rows they are shown with) change
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS metadata (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )
+        ''')
+        
+        # Validators for conditional HTTP requests made by job sources
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS http_cache (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        conn.commit()
+        conn.close()
+    
+    def _migrate_job_keys(self, cursor):
+        """Give every job a unique source_id and build its unique index"""
+        cursor.execute('''
+            UPDATE job_descriptions
+            SET source_id = COALESCE(company, '') || '|' || COALESCE(title, '')
+            WHERE source_id IS NULL
+        ''')
+        
+        duplicates = [row[0] for row in cursor.execute('''
+            SELECT id FROM job_descriptions AS job
+            WHERE EXISTS (
+                SELECT 1 FROM job_descriptions AS earlier
+                WHERE earlier.source_id = job.source_id
+                AND earlier.content IS job.content AND earlier.id < job.id
+            )
+        ''').fetchall()]
+        tables = {row[0] for row in cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()}
+        for chunk in _chunked(duplicates, 500):
+            placeholders = ', '.join('?' * len(chunk))
+            # Matches of a duplicate repeat those of the job that is kept
+            for table in ('matches', 'job_matches'):
+                if table in tables:
+                    cursor.execute(f'DELETE FROM {table} WHERE job_id IN ({placeholders})',
+                                   chunk)
+            cursor.execute(f'DELETE FROM job_descriptions WHERE id IN ({placeholders})', chunk)
+        
+        cursor.execute('''
+            UPDATE job_descriptions SET source_id = source_id || '|' || id
+            WHERE id NOT IN (SELECT MIN(id) FROM job_descriptions GROUP BY source_id)
+        ''')
+        cursor.execute('''
+            CREATE UNIQUE INDEX idx_job_descriptions_source_id
+            ON job_descriptions (source_id)
+        ''')
+    
+    def _create_matches_table(self, cursor):
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS matches (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                resume_id INTEGER,
-                job_id INTEGER,
-                similarity_score REAL,
-                rank_position INTEGER,
+                resume_id INTEGER NOT NULL,
+                job_id INTEGER NOT NULL,
+                content_similarity REAL,
+                skills_similarity REAL,
+                combined_score REAL,
+                rank INTEGER,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (resume_id, job_id),
                 FOREIGN KEY (resume_id) REFERENCES resumes (id),
                 FOREIGN KEY (job_id) REFERENCES job_descriptions (id)
             )
         ''')
+        # Top matches per resume and per job are read in score order
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_matches_resume_score
+            ON matches (resume_id, combined_score DESC)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_matches_job_score
+            ON matches (job_id, combined_score DESC)
+        ''')
+    
+    def _migrate_matches(self, cursor):
+        """Rebuild a legacy matches table (original schema, or one written by
+        DataFrame.to_sql) with the current schema, keeping its scores"""
+        existing = {row[1] for row in cursor.execute('PRAGMA table_info(matches)')}
+        if not existing:
+            self._create_matches_table(cursor)
+            return
         
-        conn.commit()
-        conn.close()
+        cursor.execute('ALTER TABLE matches RENAME TO matches_legacy')
+        self._create_matches_table(cursor)
+        if 'combined_score' in existing:
+            cursor.execute('''
+                INSERT OR IGNORE INTO matches
+                    (resume_id, job_id, content_similarity, skills_similarity,
+                     combined_score, rank)
+                SELECT resume_id, job_id, content_similarity, skills_similarity,
+                       combined_score, rank
+                FROM matches_legacy
+                WHERE resume_id IS NOT NULL AND job_id IS NOT NULL
+            ''')
+        elif 'similarity_score' in existing:
+            cursor.execute('''
+                INSERT OR IGNORE INTO matches (resume_id, job_id, combined_score, rank)
+                SELECT resume_id, job_id, similarity_score, rank_position
+                FROM matches_legacy
+                WHERE resume_id IS NOT NULL AND job_id IS NOT NULL
+            ''')
+        cursor.execute('DROP TABLE matches_legacy')
+    
+    def _ensure_columns(self, cursor, table, columns):
+        """Add missing columns to an existing table"""
+        existing = {row[1] for row in cursor.execute(f'PRAGMA table_info({table})')}
+        for name, column_type in columns.items():
+            if name not in existing:
+                cursor.execute(f'ALTER TABLE {table} ADD COLUMN {name} {column_type}')
     
     def insert_resume(self, filename, content, processed_content="", skills="", experience=""):
         """Insert resume into database"""
@@ -83,14 +348,504 @@ class DatabaseManager:
         }])
         df.to_sql('job_descriptions', self.engine, if_exists='append', index=False)
     
+    def upsert_resumes(self, rows, chunk_size=500):
+        """Bulk insert/update resumes by filename in a single transaction
+
+        rows is a DataFrame or an iterable of dicts; columns missing from rows
+        keep their stored values, and a missing or NULL filename raises
+        ValueError. Returns a dict with
+        'inserted', 'updated' and 'unchanged' counts, 'ids' (filename -> id)
+        and 'changed_ids' (ids of inserted or updated rows).
+        """
+        return self._bulk_upsert('resumes', RESUME_COLUMNS, rows, chunk_size)
+    
+    def upsert_jobs(self, rows, chunk_size=500):
+        """Bulk insert/update job descriptions by source_id in a single transaction
+
+        Same arguments and return value as upsert_resumes (ids keyed by source_id).
+        """
+        return self._bulk_upsert('job_descriptions', JOB_COLUMNS, rows, chunk_size)
+    
+    def upsert_resume(self, filename, content, processed_content="", skills="",
+                      experience="", content_hash=None):
+        """Insert a resume or update it in place by filename; returns its id"""
+        result = self.upsert_resumes([{
+            'filename': filename,
+            'content': content,
+            'processed_content': processed_content,
+            'skills': skills,
+            'experience': experience,
+            'content_hash': content_hash
+        }])
+        return result['ids'][filename]
+    
+    def upsert_job(self, source_id, title, company, content, processed_content="",
+                   required_skills="", content_hash=None):
+        """Insert a job or update it in place by source_id; returns its id"""
+        result = self.upsert_jobs([{
+            'source_id': source_id,
+            'title': title,
+            'company': company,
+            'content': content,
+            'processed_content': processed_content,
+            'required_skills': required_skills,
+            'content_hash': content_hash
+        }])
+        return result['ids'][source_id]
+    
+    @metrics.timed('sql', op='upsert')
+    def _bulk_upsert(self, table, columns, rows, chunk_size):
+        """INSERT ... ON CONFLICT DO UPDATE keyed on columns[0], via executemany
+
+        Only the columns present in rows are written, so existing values of
+        the others are kept. Existing rows are read per chunk so identical
+        rows are counted as unchanged and never rewritten. Raises ValueError
+        when the key column is missing or NULL.
+        """
+        key = columns[0]
+        rows, columns = _present_columns(rows, columns)
+        if key not in columns:
+            if len(rows):
+                raise ValueError(f"{table} rows need a {key} column")
+            columns = (key,)
+        column_list = ', '.join(columns)
+        updates = ', '.join(f'{column} = excluded.{column}' for column in columns[1:])
+        upsert_sql = (
+            f'INSERT INTO {table} ({column_list}) '
+            f'VALUES ({", ".join("?" * len(columns))}) '
+            f'ON CONFLICT ({key}) ' + (f'DO UPDATE SET {updates}' if updates else 'DO NOTHING')
+        )
+        
+        result = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'ids': {},
+                  'changed_ids': []}
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                for chunk in _chunked(_iter_row_tuples(rows, columns), chunk_size):
+                    if any(row[0] is None for row in chunk):
+                        raise ValueError(f"{table} rows need a non-NULL {key}")
+                    # Last occurrence wins when a key repeats within a chunk
+                    chunk = list({row[0]: row for row in chunk}.values())
+                    keys = [row[0] for row in chunk]
+                    placeholders = ','.join('?' * len(keys))
+                    existing = {
+                        row[0]: row[1:] for row in conn.execute(
+                            f'SELECT {column_list} FROM {table} '
+                            f'WHERE {key} IN ({placeholders})', keys)
+                    }
+                    
+                    changed = []
+                    for row in chunk:
+                        if row[0] not in existing:
+                            result['inserted'] += 1
+                            changed.append(row)
+                        elif existing[row[0]] != row[1:]:
+                            result['updated'] += 1
+                            changed.append(row)
+                        else:
+                            result['unchanged'] += 1
+                    conn.executemany(upsert_sql, changed)
+                    
+                    ids = dict(conn.execute(
+                        f'SELECT {key}, id FROM {table} WHERE {key} IN ({placeholders})',
+                        keys))
+                    result['ids'].update(ids)
+                    result['changed_ids'].extend(ids[row[0]] for row in changed)
+                if result['changed_ids']:
+                    self._bump_matches_generation(conn)
+        finally:
+            conn.close()
+        return result
+    
+    def get_job_hashes(self):
+        """Get a dict of job source_id -> content hash"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return dict(conn.execute(
+                'SELECT source_id, content_hash FROM job_descriptions'))
+        finally:
+            conn.close()
+    
+    def delete_resumes(self, resume_ids):
+        """Delete resumes together with their matches"""
+        rows = [(resume_id,) for resume_id in resume_ids]
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                conn.executemany('DELETE FROM matches WHERE resume_id = ?', rows)
+                conn.executemany('DELETE FROM job_matches WHERE resume_id = ?', rows)
+                conn.executemany('DELETE FROM pending_matches WHERE resume_id = ?', rows)
+                conn.executemany('DELETE FROM resumes WHERE id = ?', rows)
+                self._bump_matches_generation(conn)
+        finally:
+            conn.close()
+    
+    @metrics.timed('sql', op='save_matches')
+    def save_matches(self, matches, resume_ids, prune=False):
+        """Store the new matches of the re-scored resume_ids in one transaction
+
+        Rows are upserted on (resume_id, job_id); rows whose scores and rank
+        did not change are left untouched, and matches of resume_ids that are
+        no longer in the result are deleted. Matches of other resumes are not
+        touched, except that prune also removes rows pointing at deleted
+        resumes or jobs. Returns {'upserted': n, 'deleted': n}.
+        """
+        rows = list(_iter_row_tuples(matches, MATCH_COLUMNS))
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                conn.execute('CREATE TEMP TABLE IF NOT EXISTS scored_resumes '
+                             '(resume_id INTEGER PRIMARY KEY)')
+                conn.execute(f'''
+                    CREATE TEMP TABLE IF NOT EXISTS new_matches (
+                        {', '.join(MATCH_COLUMNS)},
+                        PRIMARY KEY (resume_id, job_id)
+                    )
+                ''')
+                conn.executemany('INSERT OR IGNORE INTO scored_resumes VALUES (?)',
+                                 [(int(resume_id),) for resume_id in resume_ids])
+                conn.executemany(f'INSERT INTO new_matches VALUES '
+                                 f'({", ".join("?" * len(MATCH_COLUMNS))})', rows)
+                
+                deleted = conn.execute('''
+                    DELETE FROM matches
+                    WHERE resume_id IN (SELECT resume_id FROM scored_resumes)
+                    AND NOT EXISTS (
+                        SELECT 1 FROM new_matches n
+                        WHERE n.resume_id = matches.resume_id AND n.job_id = matches.job_id
+                    )
+                ''').rowcount
+                if prune:
+                    deleted += conn.execute('''
+                        DELETE FROM matches
+                        WHERE resume_id NOT IN (SELECT id FROM resumes)
+                        OR job_id NOT IN (SELECT id FROM job_descriptions)
+                    ''').rowcount
+                
+                upserted = conn.execute(f'''
+                    INSERT INTO matches ({', '.join(MATCH_COLUMNS)})
+                    SELECT {', '.join(MATCH_COLUMNS)} FROM new_matches WHERE true
+                    ON CONFLICT (resume_id, job_id) DO UPDATE SET
+                        content_similarity = excluded.content_similarity,
+                        skills_similarity = excluded.skills_similarity,
+                        combined_score = excluded.combined_score,
+                        rank = excluded.rank,
+                        created_at = CURRENT_TIMESTAMP
+                    WHERE content_similarity IS NOT excluded.content_similarity
+                    OR skills_similarity IS NOT excluded.skills_similarity
+                    OR combined_score IS NOT excluded.combined_score
+                    OR rank IS NOT excluded.rank
+                ''').rowcount
+                
+                conn.execute('DELETE FROM scored_resumes')
+                conn.execute('DELETE FROM new_matches')
+                if upserted or deleted:
+                    self._bump_matches_generation(conn)
+        finally:
+            conn.close()
+        return {'upserted': upserted, 'deleted': deleted}
+    
+    def _bump_matches_generation(self, conn):
+        conn.execute('''
+            INSERT INTO metadata (key, value) VALUES ('matches_generation', 1)
+            ON CONFLICT (key) DO UPDATE SET value = value + 1
+        ''')
+    
+    def get_matches_generation(self):
+        """Counter that changes whenever stored matches may read differently"""
+        row = self._reader().execute(
+            "SELECT value FROM metadata WHERE key = 'matches_generation'").fetchone()
+        return row[0] if row else 0
+    
+    @metrics.timed('sql', op='get_top_matches')
+    def get_top_matches(self, resume_filename, limit=5, after_rank=0):
+        """Stored matches of one resume in rank order (bound parameters)
+
+        Keyset pagination: pass the last rank already shown as after_rank to
+        get the next page.
+        """
+        cursor = self._reader().execute('''
+            SELECT m.resume_id, m.job_id, m.content_similarity, m.skills_similarity,
+                   m.combined_score, m.rank, r.filename, j.title, j.company
+            FROM resumes r
+            JOIN matches m ON m.resume_id = r.id
+            JOIN job_descriptions j ON j.id = m.job_id
+            WHERE r.filename = ? AND m.rank > ?
+            ORDER BY m.rank
+            LIMIT ?
+        ''', (resume_filename, int(after_rank), int(limit)))
+        columns = [column[0] for column in cursor.description]
+        return pd.DataFrame(cursor.fetchall(), columns=columns)
+    
+    def get_job_matches(self):
+        """All stored per-job top resumes"""
+        return self.read_sql(f"SELECT {', '.join(JOB_MATCH_COLUMNS)} FROM job_matches")
+    
+    @metrics.timed('sql', op='save_job_matches')
+    def replace_job_matches(self, job_matches):
+        """Replace the per-job top resumes in one transaction"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                conn.execute('DELETE FROM job_matches')
+                conn.executemany(
+                    f'INSERT INTO job_matches ({", ".join(JOB_MATCH_COLUMNS)}) '
+                    f'VALUES ({", ".join("?" * len(JOB_MATCH_COLUMNS))})',
+                    _iter_row_tuples(job_matches, JOB_MATCH_COLUMNS))
+                self._bump_matches_generation(conn)
+        finally:
+            conn.close()
+    
+    @metrics.timed('sql', op='get_top_candidates')
+    def get_top_candidates(self, job_id, limit=5, after_rank=0):
+        """Stored best resumes of one job in rank order (keyset pagination by rank)"""
+        cursor = self._reader().execute('''
+            SELECT m.job_id, m.resume_id, m.content_similarity, m.skills_similarity,
+                   m.combined_score, m.rank, r.filename, j.title, j.company
+            FROM job_matches m
+            JOIN resumes r ON r.id = m.resume_id
+            JOIN job_descriptions j ON j.id = m.job_id
+            WHERE m.job_id = ? AND m.rank > ?
+            ORDER BY m.rank
+            LIMIT ?
+        ''', (int(job_id), int(after_rank), int(limit)))
+        columns = [column[0] for column in cursor.description]
+        return pd.DataFrame(cursor.fetchall(), columns=columns)
+    
+    def iter_match_summary(self, chunk_size=1000):
+        """Yield the summary of all matches as DataFrames of up to chunk_size rows"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.execute('''
+                SELECT r.filename AS resume, j.title AS job_title, j.company,
+                       m.combined_score, m.rank
+                FROM resumes r
+                JOIN matches m ON m.resume_id = r.id
+                JOIN job_descriptions j ON j.id = m.job_id
+                ORDER BY r.filename, m.rank
+            ''')
+            columns = [column[0] for column in cursor.description]
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield pd.DataFrame(rows, columns=columns)
+        finally:
+            conn.close()
+    
+    def get_manifest(self, kind):
+        """Get active manifest entries for a kind of source file, keyed by path"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            rows = conn.execute(
+                "SELECT * FROM source_files WHERE kind = ? AND status = 'active'", (kind,))
+            return {row['path']: dict(row) for row in rows}
+        finally:
+            conn.close()
+    
+    def save_manifest_entries(self, kind, entries):
+        """Record (path, size, mtime, content_hash, record_id) tuples as active"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                conn.executemany('''
+                    INSERT INTO source_files
+                        (path, kind, size, mtime, content_hash, record_id, status)
+                    VALUES (?, ?, ?, ?, ?, ?, 'active')
+                    ON CONFLICT (path) DO UPDATE SET
+                        size = excluded.size,
+                        mtime = excluded.mtime,
+                        content_hash = excluded.content_hash,
+                        record_id = excluded.record_id,
+                        status = 'active',
+                        updated_at = CURRENT_TIMESTAMP
+                ''', [(path, kind, size, mtime, digest, record_id)
+                      for path, size, mtime, digest, record_id in entries])
+        finally:
+            conn.close()
+    
+    def tombstone_manifest_entries(self, paths):
+        """Mark source files as deleted, keeping their manifest rows"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                conn.executemany('''
+                    UPDATE source_files
+                    SET status = 'deleted', updated_at = CURRENT_TIMESTAMP
+                    WHERE path = ?
+                ''', [(path,) for path in paths])
+        finally:
+            conn.close()
+    
+    def mark_pending_matches(self, resume_ids=None):
+        """Flag resumes for re-matching (all resumes when resume_ids is None)"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                if resume_ids is None:
+                    conn.execute('INSERT OR IGNORE INTO pending_matches '
+                                 'SELECT id FROM resumes')
+                else:
+                    conn.executemany('INSERT OR IGNORE INTO pending_matches VALUES (?)',
+                                     [(int(resume_id),) for resume_id in resume_ids])
+        finally:
+            conn.close()
+    
+    def get_http_validators(self, urls):
+        """Get {url: (etag, last_modified)} for previously fetched urls"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            validators = {}
+            for chunk in _chunked(list(urls), 500):
+                placeholders = ','.join('?' * len(chunk))
+                rows = conn.execute(
+                    f'SELECT url, etag, last_modified FROM http_cache '
+                    f'WHERE url IN ({placeholders})', chunk)
+                validators.update({url: (etag, modified) for url, etag, modified in rows})
+            return validators
+        finally:
+            conn.close()
+    
+    def save_http_validators(self, entries):
+        """Store (url, etag, last_modified) tuples from successful fetches"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                conn.executemany('''
+                    INSERT INTO http_cache (url, etag, last_modified) VALUES (?, ?, ?)
+                    ON CONFLICT (url) DO UPDATE SET
+                        etag = excluded.etag,
+                        last_modified = excluded.last_modified,
+                        fetched_at = CURRENT_TIMESTAMP
+                ''', list(entries))
+        finally:
+            conn.close()
+    
+    def has_matches(self):
+        """Whether the matches table holds any rows"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute('SELECT 1 FROM matches LIMIT 1').fetchone() is not None
+        finally:
+            conn.close()
+    
+    def get_pending_matches(self):
+        """Get ids of resumes whose matches need recomputing"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return [row[0] for row in conn.execute('SELECT resume_id FROM pending_matches')]
+        finally:
+            conn.close()
+    
+    def clear_pending_matches(self, resume_ids=None):
+        """Unflag resumes once their matches are saved (all when resume_ids is None)"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                if resume_ids is None:
+                    conn.execute('DELETE FROM pending_matches')
+                else:
+                    conn.executemany('DELETE FROM pending_matches WHERE resume_id = ?',
+                                     [(int(resume_id),) for resume_id in resume_ids])
+        finally:
+            conn.close()
+    
     def get_resumes(self):
         """Get all resumes"""
-        return pd.read_sql('SELECT * FROM resumes', self.engine)
+        return self.read_sql('SELECT * FROM resumes')
     
     def get_jobs(self):
         """Get all job descriptions"""
-        return pd.read_sql('SELECT * FROM job_descriptions', self.engine)
+        return self.read_sql('SELECT * FROM job_descriptions')
+    
+    @metrics.timed('sql', op='get_embeddings')
+    def get_embeddings(self, model_name, hashes, chunk_size=500):
+        """Get cached embeddings as a dict of content hash -> float32 vector"""
+        hashes = list(dict.fromkeys(hashes))
+        found = {}
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for start in range(0, len(hashes), chunk_size):
+                chunk = hashes[start:start + chunk_size]
+                placeholders = ','.join('?' * len(chunk))
+                rows = conn.execute(
+                    f'SELECT content_hash, vector FROM embeddings '
+                    f'WHERE model_name = ? AND content_hash IN ({placeholders})',
+                    [model_name, *chunk]
+                )
+                for digest, blob in rows:
+                    found[digest] = np.frombuffer(blob, dtype=np.float32)
+        finally:
+            conn.close()
+        return found
+    
+    @metrics.timed('sql', op='save_embeddings')
+    def save_embeddings(self, model_name, hashes, vectors):
+        """Store embeddings as float32 BLOBs keyed by (model name, content hash)"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        rows = [
+            (model_name, digest, vector.shape[0], vector.tobytes())
+            for digest, vector in zip(hashes, vectors)
+        ]
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO embeddings '
+                    '(model_name, content_hash, dim, vector) VALUES (?, ?, ?, ?)',
+                    rows
+                )
+        finally:
+            conn.close()
+    
+    def purge_embeddings(self, keep_model):
+        """Drop cached embeddings produced by any model other than keep_model"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                cursor = conn.execute(
+                    'DELETE FROM embeddings WHERE model_name != ?', (keep_model,)
+                )
+            return cursor.rowcount
+        finally:
+            conn.close()
+    
+    def gc_embeddings(self, keep_model):
+        """Delete embeddings that no current resume or job references
+
+        Also drops every vector produced by a model other than keep_model.
+        Returns the number of removed vectors.
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            live = set()
+            for table in ('resumes', 'job_descriptions'):
+                for (text,) in conn.execute(f'SELECT processed_content FROM {table}'):
+                    live.add(content_hash(text))
+            
+            stale = [
+                (model_name, digest)
+                for model_name, digest in conn.execute(
+                    'SELECT model_name, content_hash FROM embeddings')
+                if model_name != keep_model or digest not in live
+            ]
+            with conn:
+                conn.executemany(
+                    'DELETE FROM embeddings WHERE model_name = ? AND content_hash = ?',
+                    stale
+                )
+            return len(stale)
+        finally:
+            conn.close()
+    
     def close(self):
         """Close the database connection"""
-        if hasattr(self, 'engine') and self.engine:
-            self.engine.dispose()
\ No newline at end of file
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers = []
+        self._local = threading.local()
+        if getattr(self, '_engine', None) is not None:
+            self._engine.dispose()
+            self._engine = None
\ No newline at end of file
@@ -0,0 +1,17 @@
+import hashlib
+
+
+def content_hash(text):
+    """Stable hex digest of a text, used as a content address"""
+    if not isinstance(text, str):
+        text = ""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """Hex digest of a file's bytes, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,145 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Upper bounds (seconds, or items for size histograms) of histogram buckets
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+PROMETHEUS_PREFIX = 'resume_matcher_'
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def to_dict(self):
+        return {'count': self.count, 'sum': self.sum, 'min': self.min, 'max': self.max,
+                'buckets': dict(zip([str(b) for b in self.buckets] + ['+Inf'], self.counts))}
+
+
+class Metrics:
+    """Process-wide counters, timers and histograms
+
+    Metrics are identified by a name plus optional labels, e.g.
+    metrics.inc('documents', 10, stage='transform'). Timers record
+    '<name>_seconds' histograms. Everything can be written as JSON or in the
+    Prometheus text format.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Time a block into the '<name>_seconds' histogram"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(f'{name}_seconds', time.perf_counter() - started, **labels)
+
+    def timed(self, name, **labels):
+        """Decorator form of timer"""
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def to_dict(self):
+        """Snapshot as a JSON-friendly dict, including documents/sec per stage"""
+        with self._lock:
+            counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                        for (name, labels), value in sorted(self.counters.items())]
+            histograms = [{'name': name, 'labels': dict(labels), **histogram.to_dict()}
+                          for (name, labels), histogram in sorted(self.histograms.items())]
+
+        seconds = {entry['labels'].get('stage'): entry['sum'] for entry in histograms
+                   if entry['name'] == 'stage_seconds'}
+        rates = {entry['labels']['stage']: entry['value'] / seconds[entry['labels']['stage']]
+                 for entry in counters
+                 if entry['name'] == 'documents' and seconds.get(entry['labels'].get('stage'))}
+        return {'counters': counters, 'histograms': histograms, 'docs_per_sec': rates}
+
+    def to_prometheus(self):
+        """Render in the Prometheus text exposition format"""
+        def label_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ''
+            return '{' + ','.join(f'{key}="{value}"' for key, value in pairs) + '}'
+
+        lines = []
+        with self._lock:
+            typed = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                metric = f'{PROMETHEUS_PREFIX}{name}_total'
+                if metric not in typed:
+                    lines.append(f'# TYPE {metric} counter')
+                    typed.add(metric)
+                lines.append(f'{metric}{label_text(labels)} {value}')
+
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                metric = f'{PROMETHEUS_PREFIX}{name}'
+                if metric not in typed:
+                    lines.append(f'# TYPE {metric} histogram')
+                    typed.add(metric)
+                cumulative = 0
+                for bound, count in zip(list(histogram.buckets) + ['+Inf'], histogram.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{label_text(labels, [("le", bound)])} '
+                                 f'{cumulative}')
+                lines.append(f'{metric}_sum{label_text(labels)} {histogram.sum}')
+                lines.append(f'{metric}_count{label_text(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Write metrics to path: Prometheus text for .prom/.txt, JSON otherwise"""
+        if path.endswith(('.prom', '.txt')):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.to_dict(), indent=2)
+        with open(path, 'w') as file:
+            file.write(content)
+
+
+metrics = Metrics()
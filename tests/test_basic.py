@@ -20,6 +20,11 @@ class TestTextProcessor:
         assert "javascript" in skills
         assert "sql" in skills
     
+    def test_extract_skills_aliases_and_batch(self):
+        texts = ["Deployed Node.js services on K8s", "Python-based machine learning"]
+        skills = self.processor.extract_skills_batch(texts)
+        assert skills == [["nodejs", "kubernetes"], ["python", "machine learning"]]
+    
     def test_calculate_similarity(self):
         text1 = "Python developer with Django experience"
         text2 = "Looking for Python programmer with web framework knowledge"
@@ -27,6 +32,46 @@ class TestTextProcessor:
         assert 0 <= similarity <= 1
         assert similarity > 0.5  # Should be reasonably similar
 
+    def test_preprocess_batch_matches_preprocess_text(self):
+        from nltk.tokenize import NLTKWordTokenizer
+        from src.nlp.text_processor import _TOKENIZER_SPLITS
+        texts = ["I cannot wait, gonna ship C++ & Node.js!", "  The   ÉCOLE\tdata-team 2024 ",
+                 None, 42, "", "wanna lemme gimme gotta wannabe", "Python\ndeveloper"] * 3
+        expected = [self.processor.preprocess_text(text) for text in texts]
+        assert self.processor.preprocess_batch(texts) == expected
+        assert self.processor.preprocess_batch(texts, num_workers=2, chunk_size=4) == expected
+
+        # The word splits mirror NLTK's tokenizer on letters-only text
+        for word, parts in _TOKENIZER_SPLITS.items():
+            assert NLTKWordTokenizer().tokenize(f"so {word} it") == ["so", *parts, "it"]
+
+    def test_tfidf_backend(self):
+        import numpy as np
+        processor = TextProcessor(backend="tfidf", max_features=10)
+        assert processor.model is None
+
+        jobs = ["python django web", "react javascript css", "pandas numpy python"]
+        engine = processor.fit_tfidf(jobs)
+        assert engine.dim == 8
+        scores = processor.similarity_matrix(["python django", "java"], jobs, tfidf=engine)
+        assert scores[0].argmax() == 0
+        assert np.allclose(scores[1], 0)
+
+        # Fitting leaves ad-hoc scoring on the texts' own terms
+        assert processor.calculate_similarity("rust golang", "rust golang") == pytest.approx(1.0)
+        blocks = processor.iter_similarity_blocks(["python django", "java"], jobs, 1, tfidf=engine)
+        assert np.allclose(np.vstack([block for _, block in blocks]), scores)
+
+        # Fixed-width embeddings
+        assert processor.encode_normalized(["java"]).shape == (1, 10)
+        assert processor.encode_normalized([]).shape == (0, 10)
+
+        # Deterministic embeddings, and sparse cosine equals dense cosine
+        processor = TextProcessor(backend="tfidf")
+        embeddings = processor.get_embeddings(jobs)
+        assert np.array_equal(embeddings, processor.get_embeddings(jobs))
+        assert np.allclose(processor.similarity_matrix(jobs, jobs), embeddings @ embeddings.T)
+
 class TestDatabase:
     def setup_method(self):
         self.db = DatabaseManager("test.db")
@@ -38,6 +83,93 @@ class TestDatabase:
         assert isinstance(resumes, pd.DataFrame)
         assert isinstance(jobs, pd.DataFrame)
     
+    def test_bulk_upsert_counts(self):
+        rows = pd.DataFrame([
+            {'filename': f"{i}.txt", 'content': f"resume {i}", 'skills': "python"}
+            for i in range(5)
+        ])
+        first = self.db.upsert_resumes(rows)
+        assert (first['inserted'], first['updated'], first['unchanged']) == (5, 0, 0)
+        
+        rows.loc[0, 'content'] = "changed"
+        second = self.db.upsert_resumes(rows, chunk_size=2)
+        assert (second['inserted'], second['updated'], second['unchanged']) == (0, 1, 4)
+        assert second['changed_ids'] == [first['ids']["0.txt"]]
+        assert len(self.db.get_resumes()) == 5
+
+    def test_bulk_upsert_keeps_missing_columns_and_rejects_null_keys(self):
+        self.db.upsert_resumes([{'filename': "a.txt", 'content': "old", 'skills': "python"}])
+        result = self.db.upsert_resumes(pd.DataFrame([{'filename': "a.txt", 'content': "new"}]))
+        assert (result['updated'], result['unchanged']) == (1, 0)
+        stored = self.db.read_sql("SELECT content, skills FROM resumes WHERE filename = 'a.txt'")
+        assert stored.values.tolist() == [["new", "python"]]
+
+        with pytest.raises(ValueError):
+            self.db.upsert_jobs([{'source_id': "x", 'title': "Dev"},
+                                 {'source_id': None, 'title': "QA"}])
+        with pytest.raises(ValueError):
+            self.db.upsert_jobs(pd.DataFrame([{'title': "Dev"}]))
+        assert self.db.read_sql("SELECT * FROM job_descriptions WHERE source_id = 'x'").empty
+
+    def test_legacy_job_keys_keep_distinct_postings(self):
+        import sqlite3
+        self.db.close()
+        conn = sqlite3.connect("test.db")
+        conn.execute("DROP INDEX idx_job_descriptions_source_id")
+        conn.execute("DELETE FROM job_descriptions")
+        conn.execute("UPDATE sqlite_sequence SET seq = 0 WHERE name = 'job_descriptions'")
+        conn.executemany("INSERT INTO job_descriptions (title, company, content) VALUES (?, ?, ?)",
+                         [("Dev", "Acme", "python"), ("Dev", "Acme", "python"),
+                          ("Dev", "Acme", "java"), ("QA", "Acme", "tests")])
+        conn.execute("DELETE FROM matches")
+        conn.execute("INSERT INTO matches (resume_id, job_id, combined_score, rank) "
+                     "VALUES (1, 2, 0.5, 1)")
+        conn.commit()
+        conn.close()
+
+        self.db = DatabaseManager("test.db")
+        jobs = self.db.read_sql("SELECT id, source_id, content FROM job_descriptions ORDER BY id")
+        assert jobs.values.tolist() == [[1, "Acme|Dev", "python"], [3, "Acme|Dev|3", "java"],
+                                        [4, "Acme|QA", "tests"]]
+        assert self.db.read_sql("SELECT * FROM matches").empty
+
+    def test_legacy_matches_migrated_and_upserted_incrementally(self):
+        import sqlite3
+        self.db.close()
+        conn = sqlite3.connect("test.db")
+        conn.execute("DROP INDEX idx_matches_resume_score")
+        conn.execute("DROP TABLE matches")
+        # Shape left behind by DataFrame.to_sql(if_exists='replace')
+        conn.execute("CREATE TABLE matches (resume_id INTEGER, resume_filename TEXT, "
+                     "job_id INTEGER, content_similarity REAL, skills_similarity REAL, "
+                     "combined_score REAL, rank INTEGER)")
+        conn.execute("INSERT INTO matches VALUES (1, 'a.txt', 7, 0.5, 0.5, 0.5, 1)")
+        conn.commit()
+        conn.close()
+        
+        self.db = DatabaseManager("test.db")
+        stored = self.db.read_sql("SELECT resume_id, job_id, combined_score FROM matches")
+        assert stored.values.tolist() == [[1, 7, 0.5]]
+        
+        def match(resume_id, job_id, score, rank):
+            return {'resume_id': resume_id, 'job_id': job_id, 'content_similarity': score,
+                    'skills_similarity': score, 'combined_score': score, 'rank': rank}
+        
+        self.db.save_matches([match(1, 7, 0.5, 1), match(1, 8, 0.4, 2),
+                              match(2, 7, 0.3, 1)], [1, 2])
+        # Re-scoring resume 1 keeps its unchanged row and replaces job 8 with 9
+        result = self.db.save_matches([match(1, 7, 0.5, 1), match(1, 9, 0.45, 2)], [1])
+        assert result == {'upserted': 1, 'deleted': 1}
+        stored = self.db.read_sql("SELECT resume_id, job_id FROM matches "
+                                  "ORDER BY resume_id, job_id")
+        assert stored.values.tolist() == [[1, 7], [1, 9], [2, 7]]
+        
+        conn = sqlite3.connect("test.db")
+        plan = conn.execute("EXPLAIN QUERY PLAN SELECT * FROM matches WHERE resume_id = 1 "
+                            "ORDER BY combined_score DESC").fetchall()
+        conn.close()
+        assert "idx_matches_resume_score" in str(plan)
+    
     def teardown_method(self):
     # Close the database connection first
         if hasattr(self, 'db') and self.db:
@@ -60,4 +192,698 @@ class TestJobScraper:
         assert len(jobs) > 0
         assert 'title' in jobs.columns
         assert 'company' in jobs.columns
-        assert 'content' in jobs.columns
\ No newline at end of file
+        assert 'content' in jobs.columns
+class TestResumeJobMatcher:
+    def setup_method(self):
+        from src.ranking.matcher import ResumeJobMatcher
+        self.db = DatabaseManager("test_matcher.db")
+        self.db.insert_resume("a.txt", "", "python developer django sql", "python, django, sql")
+        self.db.insert_resume("b.txt", "", "data scientist machine learning pandas", "machine learning, pandas")
+        self.db.insert_job("Backend", "Acme", "", "python django developer", "python, django")
+        self.db.insert_job("ML", "Beta", "", "machine learning pandas numpy", "machine learning, pandas, numpy")
+        self.db.insert_job("Frontend", "Gamma", "", "react javascript css", "react, javascript")
+        self.matcher = ResumeJobMatcher(db=self.db)
+    
+    def test_similarity_matrix_matches_pairwise(self):
+        processor = self.matcher.text_processor
+        texts1 = ["python developer django", "machine learning pandas"]
+        texts2 = ["python django", "react javascript", "pandas numpy"]
+        matrix = processor.similarity_matrix(texts1, texts2)
+        assert matrix.shape == (2, 3)
+        for i, text1 in enumerate(texts1):
+            for j, text2 in enumerate(texts2):
+                assert matrix[i, j] == pytest.approx(
+                    processor.calculate_similarity(text1, text2), abs=1e-5)
+    
+    def test_calculate_matches_top_k(self):
+        matches = self.matcher.calculate_matches(top_k=2)
+        assert len(matches) == 4
+        for _, group in matches.groupby('resume_id'):
+            assert list(group['rank']) == [1, 2]
+            assert group['combined_score'].is_monotonic_decreasing
+
+    def test_matching_leaves_adhoc_similarity_alone(self):
+        processor = self.matcher.text_processor
+        text = "rust golang kubernetes"
+        before = processor.calculate_similarity(text, text)
+        self.matcher.calculate_matches(top_k=2)
+        self.matcher.job_corpus()
+        assert processor.calculate_similarity(text, text) == pytest.approx(before)
+        assert before == pytest.approx(1.0)
+
+    def test_score_stage_excludes_embedding_time(self):
+        import time
+        from src.utils.metrics import metrics
+        score_blocks = self.matcher.iter_score_blocks
+
+        def slow_blocks(resumes_df, jobs_df, block_size=None):
+            for block in score_blocks(resumes_df, jobs_df, block_size):
+                with metrics.timer('stage', stage='embed'):
+                    time.sleep(0.2)
+                yield block
+
+        def seconds(stage):
+            histogram = metrics.histograms.get(('stage_seconds', (('stage', stage),)))
+            return histogram.sum if histogram is not None else 0.0
+
+        self.matcher.iter_score_blocks = slow_blocks
+        embed, score = seconds('embed'), seconds('score')
+        self.matcher.calculate_matches(top_k=2, block_size=1, num_workers=1)
+        assert seconds('embed') - embed >= 0.4
+        assert 0 < seconds('score') - score < 0.2
+
+    def test_block_size_does_not_change_matches(self):
+        whole = self.matcher.calculate_matches(top_k=2, block_size=100)
+        blocked = self.matcher.calculate_matches(top_k=2, block_size=1)
+        pd.testing.assert_frame_equal(whole, blocked)
+    
+    def test_match_file_scores_like_batch_without_storing(self, tmp_path):
+        import numpy as np
+        path = tmp_path / "upload.txt"
+        path.write_text("python developer django sql")
+        batch = self.matcher.calculate_matches(top_k=3)
+        stored = self.db.read_sql("SELECT COUNT(*) AS n FROM matches")['n'][0]
+        
+        single = self.matcher.match_file(str(path), top_k=3)
+        expected = batch[batch['resume_filename'] == "a.txt"].reset_index(drop=True)
+        assert list(single['resume_filename']) == ["upload.txt"] * 3
+        assert list(single['job_id']) == list(expected['job_id'])
+        assert np.allclose(single['combined_score'], expected['combined_score'])
+        assert self.db.read_sql("SELECT COUNT(*) AS n FROM matches")['n'][0] == stored
+        
+        # The job corpus is reused until jobs change
+        corpus = self.matcher.job_corpus()
+        self.matcher.match_file(str(path))
+        assert self.matcher.job_corpus() is corpus
+    
+    def test_top_candidates_per_job_from_same_pass(self):
+        import numpy as np
+        self.matcher.calculate_matches(top_k=1, block_size=1, job_top_k=2)
+        scores = self.matcher.score_matrix(self.db.get_resumes(), self.db.get_jobs())
+        resumes = self.db.get_resumes()
+        for job_row, job_id in enumerate(self.db.get_jobs()['id']):
+            order = np.argsort(-scores['combined'][:, job_row], kind='stable')[:2]
+            candidates = self.matcher.get_top_candidates_for_job(job_id, top_k=5)
+            assert list(candidates['filename']) == list(resumes['filename'][order])
+            assert list(candidates['rank']) == [1, 2]
+        
+        # Incremental runs merge re-scored resumes into the stored lists
+        self.db.mark_pending_matches([resumes['id'][0]])
+        self.matcher.calculate_matches(top_k=1, incremental=True, job_top_k=2)
+        backend = self.matcher.get_top_candidates_for_job(self.db.get_jobs()['id'][0])
+        assert list(backend['filename']) == ["a.txt", "b.txt"]
+    
+    def test_top_matches_pages_and_cache_invalidation(self):
+        self.matcher.calculate_matches(top_k=3)
+        first = self.matcher.get_top_matches_for_resume("a.txt", top_k=2)
+        assert list(first['rank']) == [1, 2] and first.iloc[0]['title'] == "Backend"
+        rest = self.matcher.get_top_matches_for_resume("a.txt", top_k=2, after_rank=2)
+        assert list(rest['rank']) == [3]
+        assert self.matcher.get_top_matches_for_resume("a.txt'; --", top_k=2).empty
+        
+        # Cached until the stored matches change
+        assert ("a.txt", 2, 0) in self.matcher._match_cache
+        self.matcher.calculate_matches(top_k=1)
+        assert list(self.matcher.get_top_matches_for_resume("a.txt", top_k=2)['rank']) == [1]
+        
+        summary = pd.concat(self.matcher.iter_match_summary(chunk_size=1))
+        assert list(summary['resume']) == ["a.txt", "b.txt"]
+
+    def test_sharded_matching_equals_single_process(self):
+        import threading
+        from src.ranking.sharded import MatchingCancelled
+        for i in range(7):
+            self.db.insert_resume(f"c{i}.txt", "", "python pandas react" if i % 2 else "css",
+                                  "python, react" if i % 3 else "")
+
+        single = self.matcher.calculate_matches(top_k=2, block_size=2, num_workers=1,
+                                                job_top_k=3)
+        single_jobs = self.db.get_job_matches()
+        progress = []
+        sharded = self.matcher.calculate_matches(top_k=2, block_size=2, num_workers=2,
+                                                 job_top_k=3,
+                                                 progress=lambda *args: progress.append(args))
+        pd.testing.assert_frame_equal(sharded, single)
+        pd.testing.assert_frame_equal(self.db.get_job_matches(), single_jobs)
+        assert progress[-1] == (9, 9)
+
+        cancel = threading.Event()
+        cancel.set()
+        with pytest.raises(MatchingCancelled):
+            self.matcher.calculate_matches(block_size=2, num_workers=2, cancel=cancel)
+
+    def teardown_method(self):
+        self.db.close()
+        import os
+        if os.path.exists("test_matcher.db"):
+            try:
+                os.remove("test_matcher.db")
+            except PermissionError:
+                pass
+
+class TestEmbeddingCache:
+    def setup_method(self):
+        self.db = DatabaseManager("test_embeddings.db")
+    
+    def test_encodes_only_cache_misses(self):
+        import numpy as np
+        
+        class CountingModel:
+            def __init__(self):
+                self.encoded = []
+            
+            def encode(self, texts, batch_size=32, convert_to_numpy=True):
+                self.encoded.extend(texts)
+                return np.array([[len(text), 1.0, 2.0] for text in texts])
+        
+        processor = TextProcessor(embedding_cache=self.db)
+        processor.model = CountingModel()
+        first = processor.encode_normalized(["python developer", "data scientist"])
+        second = processor.encode_normalized(["data scientist", "react developer"])
+        
+        assert processor.model.encoded == ["python developer", "data scientist",
+                                           "react developer"]
+        assert np.allclose(first[1], second[0])
+    
+    def test_gc_removes_orphans_and_other_models(self):
+        from src.utils.hashing import content_hash
+        self.db.insert_resume("a.txt", "", "python developer", "python")
+        live = content_hash("python developer")
+        self.db.save_embeddings("model-a", [live, content_hash("gone")], [[1.0], [2.0]])
+        self.db.save_embeddings("model-b", [live], [[3.0]])
+        
+        assert self.db.gc_embeddings(keep_model="model-a") == 2
+        assert list(self.db.get_embeddings("model-a", [live])) == [live]
+        assert self.db.get_embeddings("model-b", [live]) == {}
+    
+    def teardown_method(self):
+        self.db.close()
+        import os
+        if os.path.exists("test_embeddings.db"):
+            try:
+                os.remove("test_embeddings.db")
+            except PermissionError:
+                pass
+
+class TestBucketedBatching:
+    def test_batches_follow_token_budget_and_keep_order(self):
+        import numpy as np
+        from src.nlp.batching import plan_batches, token_lengths
+
+        class LengthModel:
+            max_seq_length = 20
+
+            def __init__(self):
+                self.batches = []
+
+            def encode(self, texts, batch_size=32, convert_to_numpy=True):
+                self.batches.append(len(texts))
+                return np.array([[len(text.split()), 1.0] for text in texts])
+
+        texts = [" ".join(["word"] * n) for n in (3, 40, 1, 8, 3, 18, 5)]
+        model = LengthModel()
+        lengths = token_lengths(texts, model)
+        assert list(lengths) == [5, 20, 3, 10, 5, 20, 7]
+
+        batches = plan_batches(lengths, max_tokens=30, max_batch_size=4)
+        assert sorted(np.concatenate(batches)) == list(range(len(texts)))
+        assert all(len(batch) * lengths[batch].max() <= 30 or len(batch) == 1
+                   for batch in batches)
+
+        processor = TextProcessor(max_batch_tokens=30, max_batch_size=4)
+        processor.model = model
+        embeddings = processor.get_embeddings(texts)
+        assert list(embeddings[:, 0]) == [3, 40, 1, 8, 3, 18, 5]
+        assert model.batches == [len(batch) for batch in batches]
+
+        stats = processor.embedding_stats()
+        assert stats['texts'] == 7 and stats['tokens'] == int(lengths.sum())
+        assert 0 <= stats['padding_ratio'] < 0.5
+
+        # Totals since a snapshot cover only the later calls
+        before = processor.batch_stats.copy()
+        processor.get_embeddings(texts[:2])
+        assert processor.embedding_stats(since=before)['texts'] == 2
+        assert processor.embedding_stats()['texts'] == 9
+
+class TestIVFIndex:
+    def setup_method(self):
+        import numpy as np
+        rng = np.random.default_rng(42)
+        self.vectors = rng.normal(size=(400, 16)).astype(np.float32)
+        self.ids = np.arange(1000, 1400)
+        self.queries = rng.normal(size=(20, 16)).astype(np.float32)
+    
+    def _exact(self, k):
+        import numpy as np
+        from src.nlp.similarity import cosine_similarity_matrix
+        scores = cosine_similarity_matrix(self.queries, self.vectors)
+        return self.ids[np.argsort(-scores, axis=1, kind='stable')[:, :k]]
+    
+    def test_full_probe_is_exact(self):
+        from src.ranking.ann_index import IVFIndex, recall_at_k
+        index = IVFIndex(n_lists=10)
+        index.build(self.ids, self.vectors)
+        approx_ids, scores = index.search(self.queries, 5, n_probe=10)
+        assert recall_at_k(self._exact(5), approx_ids) == 1.0
+        assert (scores[:, :-1] >= scores[:, 1:]).all()
+    
+    def test_incremental_update_and_persistence(self, tmp_path):
+        from src.ranking.ann_index import IVFIndex
+        index = IVFIndex(n_lists=8)
+        index.build(self.ids[:300], self.vectors[:300])
+        index.add(self.ids[300:], self.vectors[300:])
+        index.remove([1000, 1001])
+        
+        path = str(tmp_path / "job_index.npz")
+        index.save(path)
+        loaded = IVFIndex.load(path)
+        assert len(loaded) == 398
+        
+        approx_ids, _ = loaded.search(self.queries, 3, n_probe=8)
+        assert not set(approx_ids.ravel()) & {1000, 1001}
+        assert set(approx_ids.ravel()) <= set(self.ids.tolist())
+
+class TestEmbeddingStore:
+    def setup_method(self):
+        import numpy as np
+        from src.nlp.similarity import normalize_rows
+        rng = np.random.default_rng(7)
+        self.vectors = normalize_rows(rng.normal(size=(300, 32)).astype(np.float32))
+        self.queries = normalize_rows(rng.normal(size=(10, 32)).astype(np.float32))
+        self.ids = np.arange(500, 800)
+
+    def test_quantized_scores_close_to_float32(self, tmp_path):
+        import numpy as np
+        from src.ranking.embedding_store import EmbeddingStore
+        exact = self.queries @ self.vectors.T
+        for dtype, tolerance in (('float32', 1e-6), ('float16', 2e-3), ('int8', 2e-2)):
+            store = EmbeddingStore(str(tmp_path / f"jobs.{dtype}.npy"), dtype, chunk_rows=64)
+            store.build(self.ids, [str(i) for i in self.ids], list(self.vectors),
+                        lambda chunk: np.array(chunk), model_name="m")
+
+            loaded = EmbeddingStore(store.path, dtype)
+            assert loaded.load()
+            assert isinstance(loaded.matrix, np.memmap)
+            assert list(loaded.ids) == list(self.ids)
+            assert loaded.is_current(self.ids, [str(i) for i in self.ids], "m")
+            assert np.abs(loaded.similarity(self.queries) - exact).max() < tolerance
+        assert store.nbytes < self.vectors.nbytes / 3
+
+    def test_matcher_scores_against_store(self):
+        import os
+        import numpy as np
+        from src.ranking.matcher import ResumeJobMatcher
+
+        class WordModel:
+            words = ["python", "django", "pandas", "react", "sql"]
+
+            def encode(self, texts, batch_size=32, convert_to_numpy=True):
+                return np.array([[text.split().count(w) + 0.1 for w in self.words]
+                                 for text in texts])
+
+        db = DatabaseManager("test_store.db")
+        try:
+            db.insert_resume("a.txt", "", "python django sql", "python")
+            db.insert_job("Backend", "Acme", "", "python django", "python")
+            db.insert_job("Frontend", "Gamma", "", "react", "react")
+            matcher = ResumeJobMatcher(db=db, use_daemon=False)
+            matcher.text_processor.model = WordModel()
+            exact = matcher.calculate_matches(top_k=2)
+
+            matcher.use_embedding_store = True
+            stored = matcher.calculate_matches(top_k=2)
+            assert os.path.exists(matcher.embedding_store_path('float16'))
+            assert list(stored['job_id']) == list(exact['job_id'])
+            assert np.allclose(stored['content_similarity'], exact['content_similarity'],
+                               atol=1e-3)
+
+            report = matcher.evaluate_embedding_store(top_k=1, dtype='int8')
+            assert report['recall_at_k'] == 1.0
+            assert report['bytes'] < report['float32_bytes']
+        finally:
+            db.close()
+            for path in ("test_store.db", "job_embeddings.float16.npy",
+                         "job_embeddings.float16.npy.meta.npz", "job_embeddings.int8.npy",
+                         "job_embeddings.int8.npy.meta.npz"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+class TestTopK:
+    def test_top_k_indices_matches_full_sort(self):
+        import numpy as np
+        from src.ranking.topk import top_k_indices
+        rng = np.random.default_rng(0)
+        scores = rng.integers(0, 5, size=(50, 30)).astype(np.float32)
+        expected = np.argsort(-scores, axis=1, kind='stable')[:, :4]
+        assert (top_k_indices(scores, 4) == expected).all()
+        assert top_k_indices(scores, 100).shape == (50, 30)
+    
+    def test_running_top_k_over_row_blocks(self):
+        import numpy as np
+        from src.ranking.topk import RunningTopK
+        rng = np.random.default_rng(1)
+        scores = rng.integers(0, 5, size=(50, 30)).astype(np.float32)
+        running = RunningTopK(4)
+        for start in range(0, 50, 7):
+            running.update(start, scores[start:start + 7], doubled=scores[start:start + 7] * 2)
+        expected = np.argsort(-scores.T, axis=1, kind='stable')[:, :4]
+        assert (running.rows == expected).all()
+        assert (running.values['doubled'] == running.scores * 2).all()
+
+class TestSkillVocabulary:
+    def test_matrix_jaccard(self):
+        import numpy as np
+        from src.nlp.skill_vocabulary import SkillVocabulary, skills_similarity_matrix
+        resumes = ["python, SQL, django", "pandas", ""]
+        jobs = ["python, django", "sql, pandas, numpy", "react"]
+        vocabulary = SkillVocabulary().fit(jobs + resumes)
+        
+        expected = np.array([
+            [2 / 3, 1 / 5, 0.0],
+            [0.0, 1 / 3, 0.0],
+            [0.0, 0.0, 0.0]
+        ])
+        dense = skills_similarity_matrix(vocabulary.encode(resumes), vocabulary.encode(jobs))
+        assert np.allclose(dense, expected)
+
+class TestIncrementalETL:
+    def setup_method(self):
+        import tempfile
+        from src.etl.pipeline import ETLPipeline
+        self.tmp = tempfile.mkdtemp()
+        self.folder = f"{self.tmp}/resumes"
+        self.db = DatabaseManager(f"{self.tmp}/etl.db")
+        self.pipeline = ETLPipeline(db=self.db, resume_folder=self.folder)
+        self.pipeline.job_sources = []
+        self.pipeline.extract_jobs = lambda: JobScraper().create_sample_jobs()
+        for name in ("a", "b"):
+            self._write(name, f"{name} knows Python and SQL")
+    
+    def _write(self, name, text):
+        with open(f"{self.folder}/{name}.txt", "w") as file:
+            file.write(text)
+    
+    def test_only_changed_files_are_processed(self):
+        import os
+        resumes, jobs = self.pipeline.run_etl()
+        assert len(resumes) == 2 and len(jobs) == 3
+        assert len(self.db.get_pending_matches()) == 2
+        self.db.clear_pending_matches()
+        
+        resumes, jobs = self.pipeline.run_etl()
+        assert len(resumes) == 0 and len(jobs) == 0
+        
+        # Touching a file without changing it does not reprocess it
+        os.utime(f"{self.folder}/a.txt", (1, 1))
+        resumes, _ = self.pipeline.run_etl()
+        assert len(resumes) == 0
+        
+        self._write("a", "a now knows Java and Docker")
+        self._write("c", "c knows React")
+        os.remove(f"{self.folder}/b.txt")
+        resumes, _ = self.pipeline.run_etl()
+        
+        assert sorted(resumes['filename']) == ["a.txt", "c.txt"]
+        stored = self.db.get_resumes().set_index('filename')
+        assert sorted(stored.index) == ["a.txt", "c.txt"]
+        assert set(stored.loc["a.txt", "skills"].split(", ")) == {"java", "docker"}
+        assert sorted(self.db.get_pending_matches()) == sorted(stored['id'])
+    
+    def _fail_parsing(self, name):
+        """Make the parser report an error for one file; returns a restore function"""
+        parser = self.pipeline.resume_parser
+        iter_parse = parser.iter_parse
+
+        def failing_iter_parse(file_paths):
+            for result in iter_parse([p for p in file_paths if not p.endswith(name)]):
+                yield result
+            for path in file_paths:
+                if path.endswith(name):
+                    yield {'file_path': path, 'error': 'worker process crashed'}
+
+        parser.iter_parse = failing_iter_parse
+        return lambda: setattr(parser, 'iter_parse', iter_parse)
+
+    def test_relative_and_absolute_folder_share_the_manifest(self):
+        import os
+        self.pipeline.resume_parser.resume_folder = os.path.relpath(self.folder)
+        self.pipeline.run_etl()
+        self.pipeline.resume_parser.resume_folder = self.folder
+        self.pipeline.run_etl()
+        assert sorted(self.db.get_resumes()['filename']) == ["a.txt", "b.txt"]
+        self.pipeline.run_etl_streaming()
+        assert sorted(self.db.get_resumes()['filename']) == ["a.txt", "b.txt"]
+
+        os.remove(f"{self.folder}/a.txt")
+        self.pipeline.run_etl()
+        assert list(self.db.get_resumes()['filename']) == ["b.txt"]
+
+    def test_failed_files_are_retried(self):
+        restore = self._fail_parsing("b.txt")
+        resumes, _ = self.pipeline.run_etl()
+        assert list(resumes['filename']) == ["a.txt"]
+        assert [path.endswith("a.txt") for path in self.db.get_manifest('resume')] == [True]
+
+        restore()
+        resumes, _ = self.pipeline.run_etl()
+        assert list(resumes['filename']) == ["b.txt"]
+
+    def test_streaming_retries_failed_files(self):
+        restore = self._fail_parsing("b.txt")
+        assert self.pipeline.run_etl_streaming(batch_size=1)[0] == 1
+        assert [path.endswith("a.txt") for path in self.db.get_manifest('resume')] == [True]
+
+        restore()
+        assert self.pipeline.run_etl_streaming(batch_size=1)[0] == 1
+        assert len(self.db.get_manifest('resume')) == 2
+
+    def test_streaming_commits_each_batch(self):
+        self._write("c", "c knows React")
+        upsert = self.db.upsert_resumes
+        calls = []
+        
+        def failing_upsert(rows):
+            calls.append(len(rows))
+            if len(calls) == 2:
+                raise RuntimeError("crash")
+            return upsert(rows)
+        
+        self.db.upsert_resumes = failing_upsert
+        with pytest.raises(RuntimeError):
+            self.pipeline.run_etl_streaming(batch_size=1)
+        assert len(self.db.get_resumes()) == 1
+        assert len(self.db.get_manifest('resume')) == 1
+        
+        # The next run only loads the files the crashed run did not finish
+        self.db.upsert_resumes = upsert
+        resume_count, job_count = self.pipeline.run_etl_streaming(batch_size=1)
+        assert (resume_count, job_count) == (2, 0)
+        stored = self.db.get_resumes()
+        assert sorted(stored['filename']) == ["a.txt", "b.txt", "c.txt"]
+        assert sorted(self.db.get_pending_matches()) == sorted(stored['id'])
+    
+    def test_incremental_matching_rescores_pending_resumes(self):
+        from src.ranking.matcher import ResumeJobMatcher
+        matcher = ResumeJobMatcher(db=self.db, use_daemon=False)
+        self.pipeline.run_etl()
+        assert len(matcher.calculate_matches(top_k=2)) == 4
+        assert self.db.get_pending_matches() == []
+        
+        self._write("b", "b switched to React")
+        self.pipeline.run_etl()
+        rescored = matcher.calculate_matches(top_k=2, incremental=True)
+        assert list(rescored['resume_filename'].unique()) == ["b.txt"]
+        stored = self.db.read_sql('SELECT resume_id FROM matches')
+        assert len(stored) == 4
+
+    def test_incremental_job_lists_equal_full_run(self):
+        from src.ranking.matcher import ResumeJobMatcher
+        matcher = ResumeJobMatcher(db=self.db, use_daemon=False)
+        self.db.insert_job("Dev", "Acme", "", "python django sql", "python, django, sql")
+        rows = pd.DataFrame([
+            {'filename': f"r{i}.txt", 'content': text, 'processed_content': text, 'skills': skills}
+            for i, (text, skills) in enumerate([("python django sql", "python, django, sql"),
+                                                ("cooking", ""),
+                                                ("python django", "python, django"),
+                                                ("python", "python")])
+        ])
+        ids = self.db.upsert_resumes(rows)['ids']
+        matcher.calculate_matches(top_k=1, job_top_k=2)
+
+        rows.loc[0, ['content', 'processed_content', 'skills']] = ["java", "java", "java"]
+        self.db.upsert_resumes(rows)
+        self.db.mark_pending_matches([ids["r0.txt"]])
+        matcher.calculate_matches(top_k=1, job_top_k=2, incremental=True)
+        incremental = self.db.get_job_matches()
+
+        matcher.calculate_matches(top_k=1, job_top_k=2)
+        full = self.db.get_job_matches()
+        assert list(full['resume_id']) == [ids["r2.txt"], ids["r3.txt"]]
+        pd.testing.assert_frame_equal(incremental, full)
+
+    def test_deleted_resumes_are_refilled_incrementally(self):
+        from src.ranking.matcher import ResumeJobMatcher
+        matcher = ResumeJobMatcher(db=self.db, use_daemon=False)
+        self.db.insert_job("Dev", "Acme", "", "python django sql", "python, django, sql")
+        rows = pd.DataFrame([
+            {'filename': f"r{i}.txt", 'content': text, 'processed_content': text, 'skills': skills}
+            for i, (text, skills) in enumerate([("python django sql", "python, django, sql"),
+                                                ("cooking", ""),
+                                                ("python django", "python, django"),
+                                                ("python", "python")])
+        ])
+        ids = self.db.upsert_resumes(rows)['ids']
+        matcher.calculate_matches(top_k=1, job_top_k=2)
+
+        self.db.delete_resumes([ids["r0.txt"]])
+        matcher.calculate_matches(top_k=1, job_top_k=2, incremental=True)
+        incremental = self.db.get_job_matches()
+
+        matcher.calculate_matches(top_k=1, job_top_k=2)
+        full = self.db.get_job_matches()
+        assert list(full['resume_id']) == [ids["r2.txt"], ids["r3.txt"]]
+        pd.testing.assert_frame_equal(incremental, full)
+
+    def test_failed_save_keeps_pending_resumes(self):
+        from src.ranking.matcher import ResumeJobMatcher
+        matcher = ResumeJobMatcher(db=self.db, use_daemon=False)
+        self.pipeline.run_etl()
+        pending = sorted(self.db.get_pending_matches())
+
+        def failing_save(*args, **kwargs):
+            raise RuntimeError("disk full")
+
+        self.db.save_matches = failing_save
+        matcher.calculate_matches(top_k=2, incremental=True)
+        assert sorted(self.db.get_pending_matches()) == pending
+
+    def teardown_method(self):
+        import shutil
+        self.db.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+class TestParallelParsing:
+    def setup_method(self):
+        import tempfile
+        from src.data_fetchers.resume_parser import ResumeParser
+        self.tmp = tempfile.mkdtemp()
+        self.parser = ResumeParser(self.tmp, num_workers=2, timeout=1)
+        self.paths = []
+        for name in ("a", "b", "slow", "c"):
+            path = f"{self.tmp}/{name}.txt"
+            with open(path, "w") as file:
+                file.write(f"{name} resume")
+            self.paths.append(path)
+    
+    def test_parallel_matches_serial(self):
+        import multiprocessing
+        serial = type(self.parser)(self.tmp).parse_files(self.paths)
+        results = list(self.parser.iter_parse_parallel(
+            self.paths, mp_context=multiprocessing.get_context("fork")))
+        parallel = pd.DataFrame(results).sort_values('filename').reset_index(drop=True)
+        assert parallel.equals(serial.sort_values('filename').reset_index(drop=True))
+    
+    def test_slow_file_times_out_without_blocking_others(self, monkeypatch):
+        import multiprocessing
+        import time
+        from src.data_fetchers.resume_parser import ResumeParser
+        read_text = ResumeParser.extract_text_from_txt
+        
+        def extract(self, path):
+            if "slow" in path:
+                time.sleep(30)
+            return read_text(self, path)
+        
+        monkeypatch.setattr(ResumeParser, "extract_text_from_txt", extract)
+        started = time.monotonic()
+        results = list(self.parser.iter_parse_parallel(
+            self.paths, mp_context=multiprocessing.get_context("fork")))
+        assert time.monotonic() - started < 10
+        
+        errors = [result for result in results if 'error' in result]
+        assert [result['file_path'] for result in errors] == [f"{self.tmp}/slow.txt"]
+        assert sorted(r['filename'] for r in results if 'error' not in r) == \
+            ["a.txt", "b.txt", "c.txt"]
+    
+    def test_crashed_worker_is_replaced_once(self, monkeypatch):
+        import multiprocessing
+        import os
+        import time
+        from src.data_fetchers.resume_parser import ResumeParser
+        read_text = ResumeParser.extract_text_from_txt
+        
+        def extract(self, path):
+            if "slow" in path:
+                os._exit(1)
+            return read_text(self, path)
+        
+        monkeypatch.setattr(ResumeParser, "extract_text_from_txt", extract)
+        results = []
+        for result in self.parser.iter_parse_parallel(
+                self.paths, mp_context=multiprocessing.get_context("fork")):
+            results.append(result)
+            if 'error' in result:
+                # A slow consumer lets the crashed file's deadline pass
+                time.sleep(1.5)
+        
+        errors = [result for result in results if 'error' in result]
+        assert errors == [{'file_path': f"{self.tmp}/slow.txt", 'error': 'worker process crashed'}]
+        assert len(results) == 4
+    
+    def test_pdf_text_is_cached_and_pages_split(self, monkeypatch):
+        import PyPDF2
+        from src.data_fetchers.resume_parser import ResumeParser
+        source = PyPDF2.PdfReader("data/resumes/CVturki3.pdf")
+        writer = PyPDF2.PdfWriter()
+        for _ in range(3):
+            writer.add_page(source.pages[0])
+        path = f"{self.tmp}/long.pdf"
+        with open(path, "wb") as file:
+            writer.write(file)
+        
+        serial = ResumeParser(self.tmp).extract_text_from_pdf(path)
+        parser = ResumeParser(self.tmp, cache_dir=f"{self.tmp}/cache",
+                              page_workers=2, parallel_page_threshold=2)
+        assert parser.parse_resume(path)['content'] == serial
+        assert serial == source.pages[0].extract_text() * 3
+        
+        # Unchanged files are served from the cache without touching PyPDF2
+        monkeypatch.setattr(PyPDF2, "PdfReader", None)
+        assert parser.parse_resume(path)['content'] == serial
+    
+    def test_failed_cached_extraction_is_reported(self):
+        import os
+        from src.data_fetchers.resume_parser import ResumeParser
+        path = f"{self.tmp}/broken.pdf"
+        with open(path, "wb") as file:
+            file.write(b"not a pdf")
+        parser = ResumeParser(self.tmp, cache_dir=f"{self.tmp}/cache")
+        assert 'error' in parser.parse_resume(path)
+        assert parser.parse_files([path]).empty
+        assert not os.path.exists(f"{self.tmp}/cache") or not os.listdir(f"{self.tmp}/cache")
+    
+    def teardown_method(self):
+        import shutil
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+class TestMetrics:
+    def test_timers_counters_and_exports(self, tmp_path):
+        import json
+        from src.utils.metrics import Metrics
+        metrics = Metrics()
+        with metrics.timer('stage', stage='transform'):
+            pass
+        metrics.inc('documents', 4, stage='transform')
+        metrics.observe('model_batch_size', 32, buckets=(16, 64))
+        
+        snapshot = metrics.to_dict()
+        assert snapshot['docs_per_sec']['transform'] > 0
+        assert snapshot['histograms'][0]['buckets'] == {'16': 0, '64': 1, '+Inf': 0}
+        
+        text = metrics.to_prometheus()
+        assert 'resume_matcher_documents_total{stage="transform"} 4' in text
+        assert 'resume_matcher_model_batch_size_bucket{le="+Inf"} 1' in text
+        
+        metrics.write(str(tmp_path / "metrics.json"))
+        assert json.loads((tmp_path / "metrics.json").read_text())['counters'][0]['value'] == 4
@@ -0,0 +1,31 @@
+from benchmarks.run import compare_to_baseline, run_benchmarks
+from benchmarks.synthetic import SyntheticCorpus
+
+
+class TestSyntheticCorpus:
+    def test_corpus_is_deterministic(self):
+        first = SyntheticCorpus(n_resumes=5, n_jobs=3, seed=7)
+        second = SyntheticCorpus(n_resumes=5, n_jobs=3, seed=7)
+        assert first.resumes() == second.resumes()
+        assert first.jobs() == second.jobs()
+        assert first.resumes() != SyntheticCorpus(n_resumes=5, n_jobs=3, seed=8).resumes()
+        assert first.jobs()[0]['content'].startswith("Job Title: Engineer 0")
+
+
+class TestBenchmarkRun:
+    def test_report_covers_every_stage(self, tmp_path):
+        corpus = SyntheticCorpus(n_resumes=20, n_jobs=5, resume_words=40, job_words=30)
+        report = run_benchmarks(corpus, str(tmp_path), batch_size=8, top_k=2)
+        
+        assert list(report['stages']) == ['parse', 'preprocess', 'extract_skills', 'db_load',
+                                          'embed', 'score', 'calculate_matches', 'query']
+        for result in report['stages'].values():
+            assert result['documents'] > 0
+            assert result['p50_ms'] <= result['p99_ms']
+            assert result['peak_rss_growth_mb'] is None or result['peak_rss_growth_mb'] >= 0
+        assert report['stages']['parse']['documents'] == 20
+        
+        assert compare_to_baseline(report, report) == []
+        slower = {'stages': {'score': {'docs_per_sec':
+                                       report['stages']['score']['docs_per_sec'] * 2}}}
+        assert [r['stage'] for r in compare_to_baseline(report, slower)] == ['score']
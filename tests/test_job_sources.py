@@ -0,0 +1,125 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.data_fetchers.job_sources import FolderJobSource, HttpJobSource
+from src.utils.database import DatabaseManager
+
+
+class StubJobBoard(BaseHTTPRequestHandler):
+    """Serves /jobs/<n> as JSON with an ETag; /flaky fails once with 503"""
+
+    requests = []
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.requests.append((self.path, self.headers.get('If-None-Match')))
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+        try:
+            time.sleep(0.02)
+            if self.path == '/flaky' and sum(path == '/flaky' for path, _ in cls.requests) == 1:
+                self._send(503, b'busy')
+                return
+            etag = f'"{self.path}-v1"'
+            if self.headers.get('If-None-Match') == etag:
+                self._send(304, b'')
+                return
+            number = self.path.rsplit('/', 1)[-1]
+            body = json.dumps({'title': f'Engineer {number}', 'company': 'Stub Inc',
+                               'content': f'python engineer {number}'}).encode()
+            self._send(200, body, {'ETag': etag, 'Content-Type': 'application/json'})
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHttpJobSource:
+    def setup_method(self):
+        import tempfile
+        self.tmp = tempfile.mkdtemp()
+        self.db = DatabaseManager(f"{self.tmp}/jobs.db")
+        StubJobBoard.requests = []
+        StubJobBoard.max_active = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubJobBoard)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.server.server_port}"
+
+    def teardown_method(self):
+        import shutil
+        self.server.shutdown()
+        self.server.server_close()
+        self.db.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_fetch_retries_and_limits_concurrency(self):
+        urls = [f"{self.base}/jobs/{n}" for n in range(12)] + [f"{self.base}/flaky"]
+        source = HttpJobSource(urls, db=self.db, max_per_host=3, rate=0, backoff=0.01)
+        jobs = source.fetch()
+
+        assert len(jobs) == 13
+        assert set(jobs['source_id']) == set(urls)
+        assert source.stats['retries'] == 1 and source.stats['failed'] == 0
+        assert StubJobBoard.max_active <= 3
+
+    def test_conditional_requests_skip_unchanged_postings(self):
+        urls = [f"{self.base}/jobs/{n}" for n in range(3)]
+        source = HttpJobSource(urls, db=self.db, rate=0)
+        assert len(source.fetch()) == 3
+        # Validators are only stored once the postings are loaded
+        assert len(source.fetch()) == 3
+        source.save_validators()
+
+        StubJobBoard.requests = []
+        assert len(source.fetch()) == 0
+        assert source.stats['not_modified'] == 3
+        assert all(etag for _, etag in StubJobBoard.requests)
+
+    def test_token_bucket_limits_request_rate(self):
+        urls = [f"{self.base}/jobs/{n}" for n in range(6)]
+        started = time.monotonic()
+        HttpJobSource(urls, rate=20, burst=1).fetch()
+        # One token up front, then 5 more at 20 per second
+        assert time.monotonic() - started >= 0.2
+
+
+class TestFolderJobSource:
+    def test_reads_titles_from_job_files(self, tmp_path):
+        (tmp_path / "backend.txt").write_text("Job Title: Backend Engineer\n\nPython and SQL")
+        (tmp_path / "untitled.txt").write_text("Kubernetes operator work")
+        (tmp_path / "notes.md").write_text("ignored")
+
+        jobs = FolderJobSource(str(tmp_path), num_workers=2).fetch()
+        assert list(jobs['title']) == ["Backend Engineer", "untitled"]
+        assert list(jobs['source_id']) == ["file:backend.txt", "file:untitled.txt"]
+
+    def test_streaming_pipeline_reads_jobs_in_batches(self, tmp_path):
+        from src.etl.pipeline import ETLPipeline
+        for n in range(5):
+            (tmp_path / f"job{n}.txt").write_text(f"Job Title: Engineer {n}\n\nPython {n}")
+        source = FolderJobSource(str(tmp_path))
+        assert [len(jobs) for jobs in source.iter_fetch(2)] == [2, 2, 1]
+
+        db = DatabaseManager(str(tmp_path / "etl.db"))
+        pipeline = ETLPipeline(db=db, resume_folder=str(tmp_path / "resumes"))
+        pipeline.job_sources = [source]
+        pipeline.extract_jobs = None  # the full job list must not be built
+        assert pipeline.run_etl_streaming(batch_size=2) == (0, 5)
+        assert len(db.get_jobs()) == 5
+        db.close()
@@ -0,0 +1,79 @@
+import threading
+
+import numpy as np
+import pytest
+
+from src.service.client import DaemonClient
+from src.service.daemon import MatcherDaemon
+from src.utils.database import DatabaseManager
+
+
+class SlowModel:
+    """Deterministic fake encoder that records how often it was called"""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        self.calls += 1
+        threading.Event().wait(0.05)
+        return np.array([[len(text), text.count('a'), 1.0] for text in texts])
+
+
+class TestMatcherDaemon:
+    def setup_method(self):
+        from src.ranking.matcher import ResumeJobMatcher
+        import tempfile
+        self.tmp = tempfile.mkdtemp()
+        self.db = DatabaseManager(f"{self.tmp}/daemon.db")
+        self.db.insert_job("Backend", "Acme", "", "python django developer", "python, django")
+        self.db.insert_job("Frontend", "Gamma", "", "react javascript css", "react, javascript")
+        
+        matcher = ResumeJobMatcher(db=self.db, use_daemon=False)
+        self.model = SlowModel()
+        matcher.text_processor.model = self.model
+        self.daemon = MatcherDaemon(f"{self.tmp}/matcher.sock", matcher=matcher,
+                                    max_batch_size=64, max_wait_ms=20)
+        self.daemon.start()
+        self.client = DaemonClient(self.daemon.socket_path)
+    
+    def teardown_method(self):
+        import shutil
+        self.daemon.stop()
+        self.db.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+    
+    def test_ping_and_encode(self):
+        assert self.client.available()
+        embeddings = self.client.encode(["abc", "aaaa"])
+        assert np.allclose(embeddings, [[3, 1, 1], [4, 4, 1]])
+    
+    def test_daemon_with_another_model_is_unavailable(self):
+        model_name = self.daemon.matcher.text_processor.model_name
+        assert self.client.available(model_name)
+        assert not self.client.available("some-other-model")
+    
+    def test_concurrent_requests_are_coalesced(self):
+        results = {}
+        
+        def call(i):
+            results[i] = self.client.encode(["a" * i])
+        
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(1, 9)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert all(np.allclose(results[i], [[i, i, 1]]) for i in range(1, 9))
+        assert self.model.calls < 8
+    
+    def test_top_k(self):
+        matches = self.client.top_k("Senior Python developer using Django", top_k=1)
+        assert len(matches) == 1
+        assert matches[0]['job_title'] == "Backend"
+    
+    def test_unknown_op_is_reported(self):
+        from src.service.client import DaemonError
+        with pytest.raises(DaemonError):
+            self.client.request('nope')
@@ -0,0 +1,39 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Wall-clock budget for starting a read-only command; override on slow runners
+STARTUP_BUDGET_SECONDS = float(os.getenv('STARTUP_BUDGET_SECONDS', '1.0'))
+
+HEAVY_MODULES = ['torch', 'sentence_transformers', 'spacy', 'nltk', 'PyPDF2', 'docx']
+
+READ_ONLY_STARTUP = """
+import json, sys
+from src.main import cli
+from src.utils.database import DatabaseManager
+from src.ranking.matcher import ResumeJobMatcher
+ResumeJobMatcher(db=DatabaseManager(sys.argv[1]))
+print(json.dumps(sorted(m for m in {heavy} if m in sys.modules)))
+""".format(heavy=HEAVY_MODULES)
+
+
+def run_python(code, *args):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', code, *args], cwd=PROJECT_ROOT,
+                            capture_output=True, text=True, check=True)
+    return result.stdout, time.perf_counter() - start
+
+
+def test_read_only_startup_skips_heavy_imports(tmp_path):
+    stdout, elapsed = run_python(READ_ONLY_STARTUP, str(tmp_path / "startup.db"))
+    assert json.loads(stdout.strip().splitlines()[-1]) == []
+    assert elapsed < STARTUP_BUDGET_SECONDS, f"startup took {elapsed:.2f}s"
+
+
+def test_cli_help_is_fast():
+    _, elapsed = run_python("from src.main import cli; cli(['--help'], standalone_mode=False)")
+    assert elapsed < STARTUP_BUDGET_SECONDS, f"--help took {elapsed:.2f}s"